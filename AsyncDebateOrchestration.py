@@ -0,0 +1,318 @@
+from typing import AsyncGenerator, Dict, Any, List, Optional, Tuple, Union
+import asyncio
+import time
+from DebateAgent import DebateAgent, ArgumentAnalysis
+from batch_evaluation import BatchEvaluator
+from DebateOrchestration import DebateModeration
+from config import DebateConfig
+from debate_evaluation import EvaluationCriteria
+from llm_backend import LLMBackend
+from prompt_templates import CompiledPrompt
+from structured_output import EVALUATION_SCHEMA, ROUND_EVALUATION_SCHEMA, arequest_structured
+from token_accounting import TokenBudgetExceeded
+from turn_scheduler import TurnKey, TurnScheduler, turn_graph
+from call_context import llm_call_context
+
+
+class AsyncDebateAgent(DebateAgent):
+    """asyncio-native DebateAgent; every query path awaits the foundation's async client"""
+
+    async def _aquery(self, prompt: Union[str, CompiledPrompt], stage: str,
+                      response_format: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """Async counterpart of _query"""
+        user, system, tags = self._split_prompt(prompt)
+        with llm_call_context(agent_id=self.agentid, stage=stage, **tags):
+            return await self.foundation.aquery_llm(user, system, response_format=response_format)
+
+    async def _amanage_context(self):
+        """Maintain relevant context while preventing token overflow"""
+        summary = await self._aquery(self._context_summary_prompt(), 'context_summary')
+        self._mark_summarized()
+        return summary
+
+    async def _aformat_argument_prompt(self, task: str, opponent_argument: Optional[str] = None) -> CompiledPrompt:
+        # Update context periodically
+        if self._needs_context_refresh():
+            self.context = await self._amanage_context()
+        return self._build_argument_prompt(task, opponent_argument)
+
+    async def areturn_introduction(self, topic: str, opponent_argument: Optional[str] = None) -> str:
+        prompt = await self._aformat_argument_prompt(self._introduction_task(topic), opponent_argument)
+
+        response = await self._aquery(prompt, 'introduction')
+        if response:
+            self._record_argument(response, 0, 'introduction')
+            return response
+        return "Failed to generate introduction"
+
+    async def areturn_rebuttal(self, opponent_argument: str) -> str:
+        """Generate a rebuttal to the opponent's argument"""
+        current_round = self._record_opponent_argument(opponent_argument)
+
+        prompt = await self._aformat_argument_prompt(self._rebuttal_task(), opponent_argument)
+        response = await self._aquery(prompt, 'rebuttal')
+
+        if response:
+            self._record_argument(response, current_round, 'rebuttal')
+
+            improved_prompt = await self._areview_rebuttal(response)
+            if improved_prompt is not None:
+                response = self._replace_last_argument(await self._aquery(improved_prompt, 'regeneration'))
+
+            return response
+        return "Failed to generate rebuttal"
+
+    async def _areview_rebuttal(self, response: str) -> Optional[CompiledPrompt]:
+        """Async counterpart of _review_rebuttal"""
+        if not self.should_evaluate():
+            return None
+        return self._regeneration_prompt(await self._aevaluate_argument(response, self.context))
+
+    async def areturn_conclusion(self) -> str:
+        """Generate a concluding argument"""
+        prompt = await self._aformat_argument_prompt(self._conclusion_task())
+        response = await self._aquery(prompt, 'conclusion')
+
+        if response:
+            self._record_argument(response, len(self.argument_history), 'conclusion')
+            return response
+        return "Failed to generate conclusion"
+
+    async def _aevaluate_argument(self, argument: str, context: str = None) -> Optional[EvaluationCriteria]:
+        """Evaluate the quality of an argument"""
+        result = await arequest_structured(
+            lambda prompt, response_format: self._aquery(prompt, 'evaluation', response_format),
+            self._evaluation_prompt(argument, context), EVALUATION_SCHEMA,
+            self.foundation.config.structured_output, self.foundation.config.structured_output_repairs
+        )
+        return self._accept_evaluation(result)
+
+    async def _atimed_query(self, prompt: str, stage: str) -> Tuple[Optional[str], float]:
+        started = time.perf_counter()
+        return await self._aquery(prompt, stage), time.perf_counter() - started
+
+    async def _afact_check(self, argument: str) -> Dict[str, Any]:
+        with llm_call_context(agent_id=self.agentid, stage='fact_check'):
+            return await self.foundation.afact_check(argument)
+
+    async def aanalyze_argument(self, argument: str, responding_to: Optional[str] = None) -> ArgumentAnalysis:
+        """Analyze an argument for key points and evidence; the analysis and fact check run concurrently"""
+        started = time.perf_counter()
+        (analysis, analysis_time), fact_check = await asyncio.gather(
+            self._atimed_query(self._analysis_prompt(argument), 'analysis'),
+            self._afact_check(argument)
+        )
+        timings = {
+            'analysis': analysis_time,
+            'fact_check': fact_check.get('timings', {}).get('total', 0.0),
+            'total': time.perf_counter() - started
+        }
+        return self._build_analysis(argument, analysis, fact_check, responding_to, timings)
+
+
+class AsyncDebateModeration(DebateModeration):
+    """
+    asyncio-native counterpart of DebateModeration.
+    Construction performs no I/O; use `await AsyncDebateModeration.create(config)`
+    so agent context gathering runs on the event loop.
+    """
+
+    def _initialize_agents(self) -> Dict[str, AsyncDebateAgent]:
+        # Context is gathered on the event loop by initialize()
+        return {}
+
+    @classmethod
+    async def create(cls, config: DebateConfig, backend: Optional[LLMBackend] = None) -> "AsyncDebateModeration":
+        """Build a moderator and gather every agent's context concurrently"""
+        debate = cls(config, backend)
+        await debate.initialize()
+        return debate
+
+    async def _agather_context(self, agent_id: str, position: str) -> str:
+        context = self.semantic_lookup('context', position)
+        if context is None:
+            with llm_call_context(agent_id=agent_id, stage='context_gathering'):
+                context = await self.aquery_llm(self._context_prompt(position))
+            self.semantic_store('context', position, context)
+        return context
+
+    async def initialize(self):
+        seats = self._seats()
+        contexts = await asyncio.gather(*(self._agather_context(agent_id, position) for _, agent_id, position in seats))
+        self.agents = {
+            seat: self._build_agent(agent_id, position, context)
+            for (seat, agent_id, position), context in zip(seats, contexts)
+        }
+
+    def _build_agent(self, agent_id: str, position: str, context: str) -> AsyncDebateAgent:
+        return AsyncDebateAgent(
+            config=self._agent_config(agent_id),
+            memory=context,
+            position=position,
+            persona=DebateConfig.get_default_persona()
+        )
+
+    async def arun_rounds(self) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Run the debate rounds, yielding each round as it completes. Round latencies are
+        recorded as in run_rounds. config.evaluation_mode='background' does not apply:
+        each rebuttal is evaluated inline before the opponent answers, so the
+        speculation stats stay at zero.
+        """
+        if not self.agents:
+            await self.initialize()
+
+        try:
+            self.state.status = 'in_progress'
+            self._round_started = time.perf_counter()
+
+            if self.is_panel:
+                async for round_result in self._arun_panel_rounds():
+                    yield round_result
+                self.state.status = 'completed'
+                return
+
+            # Opening arguments, unless resumed past them
+            if self._next_round == 0:
+                pro_opening = await self.pro_agent.areturn_introduction(self.config.topic)
+                against_opening = await self.against_agent.areturn_introduction(
+                    self.config.topic,
+                    pro_opening
+                )
+
+                self._record_round_latency()
+                yield self._complete_round(0, 'opening', pro_opening, against_opening)
+                self._round_started = time.perf_counter()
+            against_opening = self._previous_argument
+
+            # Rebuttal rounds
+            for round_num in range(self._next_round, self.config.rounds + 1):
+                self.state.round_number = round_num
+
+                # Pro rebuttal
+                self.state.current_turn = 'pro'
+                pro_rebuttal = await self.pro_agent.areturn_rebuttal(against_opening)
+
+                # Against rebuttal
+                self.state.current_turn = 'against'
+                against_rebuttal = await self.against_agent.areturn_rebuttal(pro_rebuttal)
+
+                # Update for next round
+                against_opening = against_rebuttal
+
+                self._record_round_latency()
+                yield self._complete_round(round_num, 'rebuttal', pro_rebuttal, against_rebuttal)
+                self._round_started = time.perf_counter()
+
+            self.state.status = 'completed'
+
+        except TokenBudgetExceeded as error:
+            self.state.status = 'aborted'
+            self.logger.log_error(
+                prompt="Debate aborted on token budget",
+                error=error,
+                metadata={"round": self.state.round_number, "usage": self.token_ledger.summary()}
+            )
+            raise
+
+        except Exception as error:
+            self.state.status = 'error'
+            self.logger.log_error(
+                prompt="Debate round execution failed",
+                error=error,
+                metadata={"round": self.state.round_number}
+            )
+            raise
+
+    async def _arun_panel_rounds(self) -> AsyncGenerator[Dict[str, Any], None]:
+        """Async counterpart of DebateModeration._run_panel_rounds"""
+        seats = [seat for seat, _, _ in self._seats()]
+        graph = turn_graph(seats, self._next_round, self.config.rounds, self.config.turn_order)
+        completed = {(self._next_round - 1, seat): argument
+                     for seat, argument in (self._previous_argument or {}).items()}
+        scheduler = TurnScheduler()
+        finished: Dict[int, Dict[str, str]] = {}
+        next_round = self._next_round
+
+        async for (round_number, seat), argument in scheduler.arun(graph, self._apanel_turn, completed):
+            self.peak_parallel_turns = max(self.peak_parallel_turns, scheduler.peak_parallelism)
+            self.state.current_turn = seat
+            finished.setdefault(round_number, {})[seat] = argument
+            while len(finished.get(next_round, ())) == len(seats):
+                arguments = finished.pop(next_round)
+                self.state.round_number = next_round
+                self._record_round_latency()
+                yield self._complete_panel_round(
+                    next_round, 'opening' if next_round == 0 else 'rebuttal', {seat: arguments[seat] for seat in seats}
+                )
+                self._round_started = time.perf_counter()
+                next_round += 1
+
+    async def _apanel_turn(self, key: TurnKey, arguments: Dict[TurnKey, str]) -> str:
+        round_number, seat = key
+        agent = self.agents[seat]
+        opponents = self._panel_opponents(seat, arguments)
+        with llm_call_context(round=round_number):
+            if round_number == 0:
+                return await agent.areturn_introduction(self.config.topic, opponents)
+            return await agent.areturn_rebuttal(opponents)
+
+    async def aconclusion(self) -> Dict[str, Any]:
+        """Generate concluding arguments from both agents, or every panelist at once"""
+        if self.state.status != 'completed':
+            raise ValueError("Cannot generate conclusion before debate completion")
+        if self.is_panel:
+            seats = list(self.agents)
+            conclusions = await asyncio.gather(*(self.agents[seat].areturn_conclusion() for seat in seats))
+            return {'type': 'conclusion', 'arguments': dict(zip(seats, conclusions))}
+
+        pro_conclusion = await self.pro_agent.areturn_conclusion()
+        against_conclusion = await self.against_agent.areturn_conclusion()
+
+        return {
+            'type': 'conclusion',
+            'pro_argument': pro_conclusion,
+            'against_argument': against_conclusion
+        }
+
+    async def aevaluate_round(self, pro_argument: str, against_argument: str,
+                              round_number: Optional[int] = None) -> Tuple[EvaluationCriteria, EvaluationCriteria]:
+        """Evaluate both arguments from a debate round (the current one unless `round_number` is given)"""
+        with llm_call_context(stage='round_evaluation'):
+            result = await arequest_structured(
+                lambda prompt, response_format: self.aquery_llm(prompt, response_format=response_format),
+                self._round_evaluation_prompt(pro_argument, against_argument), ROUND_EVALUATION_SCHEMA,
+                self.config.structured_output, self.config.structured_output_repairs
+            )
+        return self._accept_round_evaluation(result, round_number)
+
+    async def aevaluate_rounds(self, rounds: List[Dict[str, Any]]) -> List[Tuple[EvaluationCriteria, ...]]:
+        """Async counterpart of DebateModeration.evaluate_rounds"""
+        evaluator = BatchEvaluator(
+            None, self.config.model,
+            aquery=lambda prompt, max_tokens, response_format: self.aquery_llm(
+                prompt, max_tokens=max_tokens, response_format=response_format
+            ),
+            mode=self.config.structured_output
+        )
+        with llm_call_context(stage='batch_evaluation'):
+            results = await evaluator.aevaluate(self._batch_items(rounds))
+        return self._accept_batch_evaluations(rounds, results)
+
+    async def aquery_llm(self, prompt, context=None, max_tokens=None, response_format=None):
+        """Async counterpart of DebateModeration.query_llm"""
+        messages, params = self._request(prompt, context, max_tokens, response_format)
+        with self._backend_errors(prompt, context), self._llm_span(messages) as span:
+            response = await self.backend.acomplete(messages, **params)
+            return self._accept_response(span, prompt, messages, response)
+
+
+async def run_debate(config: DebateConfig, backend: Optional[LLMBackend] = None) -> Dict[str, Any]:
+    """Run one debate end to end, returning its rounds and conclusions"""
+    debate = await AsyncDebateModeration.create(config, backend)
+    rounds = [round_result async for round_result in debate.arun_rounds()]
+    return {
+        'rounds': rounds,
+        'conclusion': await debate.aconclusion(),
+        'state': debate.get_debate_state()
+    }
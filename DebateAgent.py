@@ -1,8 +1,24 @@
-from dataclasses import dataclass
-from typing import List, Dict, Optional, Any
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import List, Dict, Optional, Any, Generator, Tuple, Union
 from DebateFoundation import DebateFoundation
-from debate_evaluation import EvaluationCriteria, ArgumentQuality
-import json
+from debate_evaluation import CRITERIA, EvaluationCriteria, ArgumentQuality
+from structured_output import EVALUATION_SCHEMA, StructuredResult, request_structured
+from llm_backend import truncate_to_tokens
+from agent_memory import AgentMemory, MemoryChunk, MemoryDocuments
+from call_context import llm_call_context
+from prompt_templates import CompiledPrompt, PromptTemplate
+import contextvars
+import time
+
+
+# Yielded by the stream_* methods when a draft is discarded and regenerated
+STREAM_RESTART = object()
+
+_CRITERIA_LIST = "\n        ".join(
+    f"{number}. {name.replace('_', ' ').capitalize()}" for number, name in enumerate(CRITERIA, 1)
+)
+_EVALUATION_FORMAT = EVALUATION_SCHEMA.skeleton()
 
 
 @dataclass
@@ -20,12 +36,28 @@ class ArgumentAnalysis:
     response_to: Optional[List[str]]  # Points being responded to
     fact_check_results: Dict[str, Any]
     evaluation: Optional[EvaluationCriteria]
+    timings: Dict[str, float] = field(default_factory=dict)  # Seconds per pipeline stage
 
 
 class DebateAgent:
+    # Context block size once the debate passes its soft token budget
+    SOFT_BUDGET_CONTEXT_TOKENS = 500
+    # Retrieved chunks per argument prompt in 'retrieval' mode, unless context_token_budget is set
+    RETRIEVAL_TOKEN_BUDGET = 800
+    # Rebuttals scoring below this average are regenerated
+    REGENERATION_THRESHOLD = 3.5
+    # Volatile sections of an argument prompt, after the static framework and task
+    ARGUMENT_SECTIONS = (
+        ('context', 'CONTEXT'),
+        ('opponent_argument', "OPPONENT'S ARGUMENT"),
+        ('previous_arguments', 'PREVIOUS ARGUMENTS'),
+        ('task', 'TASK'),
+    )
+
     def __init__(self, config: Dict, memory: str, position: str, persona: str):
         self.config = config
         self.agentid = config['agent_id']
+        self.seat = config.get('seat', self.agentid)  # 'pro' / 'against', or the panel agent id
         self.context = memory
         self.position = position
         self.persona = persona
@@ -33,6 +65,15 @@ class DebateAgent:
         self.argument_history: List[Argument] = []
         self.opponent_arguments: List[Argument] = []
         self.argument_analysis: List[ArgumentAnalysis] = []
+        # 'full' re-summarizes the whole history, 'incremental' folds only new arguments into the summary
+        self.context_mode = config.get('context_mode', 'full')
+        self.context_token_budget: Optional[int] = config.get('context_token_budget')
+        # 'retrieval' replaces summaries with an index of the context and earlier arguments
+        self.memory = AgentMemory() if self.context_mode == 'retrieval' else None
+        self.retrieval_top_k = config.get('retrieval_top_k', 8)
+        self._summarized_arguments = 0
+        self._summarized_opponent_arguments = 0
+        self._templates: Dict[Optional[str], PromptTemplate] = {}
 
     def _create_system_prompt(self) -> str:
         return f"""You are a debate agent with the following characteristics:
@@ -48,9 +89,10 @@ class DebateAgent:
         6. Be respectful while being assertive
         """
 
-    def _manage_context(self):
-        """Maintain relevant context while preventing token overflow"""
-        context_summary_prompt = f"""
+    def _context_summary_prompt(self) -> str:
+        if self.context_mode == 'incremental':
+            return self._incremental_summary_prompt()
+        return f"""
         Summarize the key points and evidence from the following debate history,
         maintaining crucial information for the ongoing discussion:
 
@@ -58,147 +100,353 @@ class DebateAgent:
         Opponent Arguments: {self.opponent_arguments}
         """
 
-        return self.foundation.query_llm(context_summary_prompt)
+    def _unsummarized_arguments(self) -> Tuple[List[Argument], List[Argument]]:
+        """Arguments added to either history since the last summary"""
+        return (
+            self.argument_history[self._summarized_arguments:],
+            self.opponent_arguments[self._summarized_opponent_arguments:]
+        )
+
+    def _incremental_summary_prompt(self) -> str:
+        new_arguments, new_opponent_arguments = self._unsummarized_arguments()
+        budget = f" Keep the summary under {self.context_token_budget} tokens." if self.context_token_budget else ""
+        own = "\n".join(f"Round {arg.round_number} ({arg.argument_type}): {arg.content}" for arg in new_arguments)
+        opponent = "\n".join(f"Round {arg.round_number}: {arg.content}" for arg in new_opponent_arguments)
+        return f"""
+        Update the running summary of this debate with the new arguments below.
+        Keep the key points and evidence still relevant to the ongoing discussion
+        and drop anything the new arguments supersede.{budget}
+
+        Current Summary:
+        {self.context}
+
+        New Arguments:
+        {own or 'None'}
+
+        New Opponent Arguments:
+        {opponent or 'None'}
+        """
+
+    def _needs_context_refresh(self) -> bool:
+        if self.memory is not None or len(self.argument_history) % 2 != 0:
+            return False
+        if self.context_mode == 'incremental':
+            # Nothing new to fold in, keep the current summary as is
+            return any(self._unsummarized_arguments())
+        return True
+
+    def _mark_summarized(self):
+        self._summarized_arguments = len(self.argument_history)
+        self._summarized_opponent_arguments = len(self.opponent_arguments)
+
+    @staticmethod
+    def _split_prompt(prompt: Union[str, CompiledPrompt]) -> Tuple[str, Optional[str], Dict[str, Any]]:
+        """User message, system message and extra call tags for a plain or compiled prompt"""
+        if isinstance(prompt, CompiledPrompt):
+            return prompt.user, prompt.system, {'prefix_tokens': prompt.prefix_tokens}
+        return prompt, None, {}
+
+    def _query(self, prompt: Union[str, CompiledPrompt], stage: str,
+               response_format: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """Query the foundation with this agent's id and the pipeline stage attached to the call"""
+        user, system, tags = self._split_prompt(prompt)
+        with llm_call_context(agent_id=self.agentid, stage=stage, **tags):
+            return self.foundation.query_llm(user, system, response_format=response_format)
+
+    def _stream(self, prompt: Union[str, CompiledPrompt], stage: str) -> Generator[str, None, Optional[str]]:
+        """Streaming counterpart of _query"""
+        user, system, tags = self._split_prompt(prompt)
+        return self.foundation.stream_llm(user, system, tags={'agent_id': self.agentid, 'stage': stage, **tags})
+
+    def _over_soft_budget(self) -> bool:
+        ledger = getattr(self.foundation, 'token_ledger', None)
+        return ledger is not None and ledger.over_soft_budget
 
-    def _format_argument_prompt(self, task: str, opponent_argument: Optional[str] = None):
+    def _manage_context(self):
+        """Maintain relevant context while preventing token overflow"""
+        summary = self._query(self._context_summary_prompt(), 'context_summary')
+        self._mark_summarized()
+        return summary
+
+    def _context_block(self) -> str:
+        budget = self.context_token_budget
+        if self._over_soft_budget():
+            budget = min(budget or self.SOFT_BUDGET_CONTEXT_TOKENS, self.SOFT_BUDGET_CONTEXT_TOKENS)
+        if budget:
+            return truncate_to_tokens(self.context, budget)
+        return self.context
+
+    def _memory_documents(self, opponent_argument: Optional[str]) -> MemoryDocuments:
+        documents: MemoryDocuments = {'context': (self.context or "", 'context', None)}
+        for index, argument in enumerate(self.argument_history):
+            documents[f"own:{index}"] = (argument.content, 'own', argument.round_number)
+        for index, argument in enumerate(self.opponent_arguments):
+            # The argument being answered is quoted in full already
+            if argument.content != opponent_argument:
+                documents[f"opponent:{index}"] = (argument.content, 'opponent', argument.round_number)
+        return documents
+
+    def _retrieve(self, task: str, opponent_argument: Optional[str]) -> List[MemoryChunk]:
+        """Chunks of the context and earlier arguments most relevant to the argument being answered"""
+        budget = self.context_token_budget or self.RETRIEVAL_TOKEN_BUDGET
+        if self._over_soft_budget():
+            budget = min(budget, self.SOFT_BUDGET_CONTEXT_TOKENS)
+        self.memory.sync(self._memory_documents(opponent_argument))
+        return self.memory.retrieve(opponent_argument or f"{self.position}\n{task}", self.retrieval_top_k, budget)
+
+    def _format_argument_prompt(self, task: str, opponent_argument: Optional[str] = None) -> CompiledPrompt:
         # Update context periodically
-        if len(self.argument_history) % 2 == 0:
+        if self._needs_context_refresh():
             self.context = self._manage_context()
+        return self._build_argument_prompt(task, opponent_argument)
+
+    def _template(self, task: Optional[str] = None) -> PromptTemplate:
+        """
+        The argument prompt template for a fixed task, compiled on first use. The
+        framework goes in the system message and the task opens the user message,
+        so both stay ahead of the per-turn sections. Without a task, the task is
+        rendered per call after the other sections.
+        """
+        template = self._templates.get(task)
+        if template is None:
+            template = self._templates[task] = PromptTemplate(
+                system=f"=== DEBATE FRAMEWORK ===\n{self._create_system_prompt()}",
+                head=f"=== TASK ===\n{task}" if task else "",
+                sections=self.ARGUMENT_SECTIONS if task is None else self.ARGUMENT_SECTIONS[:-1]
+            )
+        return template
+
+    def _build_argument_prompt(self, task: str, opponent_argument: Optional[str] = None,
+                               fixed_task: bool = True) -> CompiledPrompt:
+        """
+        Args:
+            task (str): What to write
+            opponent_argument (str, optional): Argument being answered
+            fixed_task (bool): Whether the task text repeats across turns and belongs in the cached prefix
+        """
+        if self.memory is not None:
+            chunks = self._retrieve(task, opponent_argument)
+            context = "\n\n".join(
+                chunk.text if chunk.source == 'context' else f"Opponent, round {chunk.round_number}: {chunk.text}"
+                for chunk in chunks if chunk.source != 'own'
+            )
+            previous = "\n".join(f"Round {chunk.round_number}: {chunk.text}" for chunk in chunks if chunk.source == 'own')
+        else:
+            context = self._context_block()
+            # Only include last 2 arguments
+            previous = "\n".join(f"Round {arg.round_number}: {arg.content}" for arg in self.argument_history[-2:])
+        sections = {
+            'context': context,
+            'opponent_argument': opponent_argument,
+            'previous_arguments': previous
+        }
+        if fixed_task:
+            return self._template(task).render(**sections)
+        return self._template().render(task=task, **sections)
+
+    @staticmethod
+    def _introduction_task(topic: str) -> str:
+        return f"Create a compelling opening argument for the topic: {topic}"
+
+    def _rebuttal_task(self) -> str:
+        return f"""Create a compelling rebuttal to your opponent's argument. Your rebuttal should:
+        1. Address the key points of their argument
+        2. Identify any logical flaws or unsupported claims
+        3. Present counter-evidence where appropriate
+        4. Strengthen your position on {self.position}
 
-        prompt_parts = [
-            "=== DEBATE FRAMEWORK ===",
-            self._create_system_prompt(),
-            f"\n=== CONTEXT ===\n{self.context}",
-        ]
+        Keep your response focused and limited to two paragraphs."""
 
-        if opponent_argument:
-            prompt_parts.append(f"\n=== OPPONENT'S ARGUMENT ===\n{opponent_argument}")
+    def _conclusion_task(self) -> str:
+        return f"""Create a powerful concluding argument for your position: {self.position}
 
-        if self.argument_history:
-            prompt_parts.append("\n=== PREVIOUS ARGUMENTS ===")
-            for arg in self.argument_history[-2:]:  # Only include last 2 arguments
-                prompt_parts.append(f"Round {arg.round_number}: {arg.content}")
+        Your conclusion should:
+        1. Summarize your key arguments
+        2. Address how you've countered opponent's main points
+        3. Provide a compelling final perspective
+        4. Demonstrate why your position is the most reasonable
 
-        prompt_parts.append(f"\n=== TASK ===\n{task}")
+        Limit your response to three paragraphs."""
 
-        return "\n".join(prompt_parts)
+    def _record_opponent_argument(self, opponent_argument: str) -> int:
+        """Store the opponent's argument and return the current round number"""
+        current_round = len(self.argument_history)
+        self.opponent_arguments.append(Argument(
+            content=opponent_argument,
+            round_number=current_round,
+            argument_type='opponent_argument'
+        ))
+        return current_round
+
+    def _record_argument(self, content: str, round_number: int, argument_type: str):
+        self.argument_history.append(Argument(
+            content=content,
+            round_number=round_number,
+            argument_type=argument_type
+        ))
+
+    def _replace_last_argument(self, content: Optional[str]) -> str:
+        """
+        Swap the latest argument for its regenerated version so later prompts see what was
+        actually said. Returns the argument that now stands: the original if regeneration failed.
+        """
+        if content and self.argument_history:
+            self.argument_history[-1] = replace(self.argument_history[-1], content=content)
+        return self.argument_history[-1].content
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Capture the mutable debate state so a speculative turn can be rolled back"""
+        return {
+            'context': self.context,
+            'argument_history': list(self.argument_history),
+            'opponent_arguments': list(self.opponent_arguments),
+            'summarized_arguments': self._summarized_arguments,
+            'summarized_opponent_arguments': self._summarized_opponent_arguments
+        }
+
+    def restore(self, snapshot: Dict[str, Any]):
+        self.context = snapshot['context']
+        self.argument_history = list(snapshot['argument_history'])
+        self.opponent_arguments = list(snapshot['opponent_arguments'])
+        self._summarized_arguments = snapshot['summarized_arguments']
+        self._summarized_opponent_arguments = snapshot['summarized_opponent_arguments']
 
     def return_introduction(self, topic: str, opponent_argument: Optional[str] = None) -> str:
-        task = f"Create a compelling opening argument for the topic: {topic}"
-        prompt = self._format_argument_prompt(task, opponent_argument)
+        prompt = self._format_argument_prompt(self._introduction_task(topic), opponent_argument)
 
-        response = self.foundation.query_llm(prompt)
+        response = self._query(prompt, 'introduction')
         if response:
-            argument = Argument(
-                content=response,
-                round_number=0,
-                argument_type='introduction'
-            )
-            self.argument_history.append(argument)
+            self._record_argument(response, 0, 'introduction')
             return response
         return "Failed to generate introduction"
 
+    def prepare_rebuttal(self, opponent_argument: str) -> Tuple[CompiledPrompt, int]:
+        """Record the opponent's argument and build the rebuttal prompt; returns the prompt and round"""
+        current_round = self._record_opponent_argument(opponent_argument)
+        return self._format_argument_prompt(self._rebuttal_task(), opponent_argument), current_round
+
     def return_rebuttal(self, opponent_argument: str) -> str:
         """Generate a rebuttal to the opponent's argument"""
-        current_round = len(self.argument_history)
+        prompt, current_round = self.prepare_rebuttal(opponent_argument)
+        response = self._query(prompt, 'rebuttal')
 
-        # Store opponent's argument
-        opponent_arg = Argument(
-            content=opponent_argument,
-            round_number=current_round,
-            argument_type='opponent_argument'
-        )
-        self.opponent_arguments.append(opponent_arg)
+        if response:
+            self._record_argument(response, current_round, 'rebuttal')
 
-        task = f"""Create a compelling rebuttal to your opponent's argument. Your rebuttal should:
-        1. Address the key points of their argument
-        2. Identify any logical flaws or unsupported claims
-        3. Present counter-evidence where appropriate
-        4. Strengthen your position on {self.position}
+            improved_prompt = self._review_rebuttal(response)
+            if improved_prompt is not None:
+                response = self._replace_last_argument(self._query(improved_prompt, 'regeneration'))
 
-        Keep your response focused and limited to two paragraphs."""
+            return response
+        return "Failed to generate rebuttal"
 
-        prompt = self._format_argument_prompt(task, opponent_argument)
-        response = self.foundation.query_llm(prompt)
+    def should_evaluate(self) -> bool:
+        # Evaluation is optional; skip it once the debate is over its soft token budget
+        return not self._over_soft_budget()
 
-        if response:
-            argument = Argument(
-                content=response,
-                round_number=current_round,
-                argument_type='rebuttal'
-            )
-            self.argument_history.append(argument)
+    def needs_regeneration(self, evaluation: Optional[EvaluationCriteria]) -> bool:
+        # No usable evaluation is no evidence the argument is weak, so it is kept
+        return evaluation is not None and evaluation.calculate_score() < self.REGENERATION_THRESHOLD
 
-            # Evaluate the argument
-            evaluation = self._evaluate_argument(response, self.context)
+    def _review_rebuttal(self, response: str) -> Optional[CompiledPrompt]:
+        """Evaluate a rebuttal and return a regeneration prompt if it falls below the quality threshold"""
+        if not self.should_evaluate():
+            return None
+        return self._regeneration_prompt(self._evaluate_argument(response, self.context))
 
-            # If quality is below threshold, regenerate
-            if evaluation.calculate_score() < 3.5:
-                improved_prompt = self._generate_improved_prompt(evaluation)
-                response = self.foundation.query_llm(improved_prompt)
+    def _regeneration_prompt(self, evaluation: Optional[EvaluationCriteria]) -> Optional[CompiledPrompt]:
+        # If quality is below threshold, regenerate
+        if self.needs_regeneration(evaluation):
+            return self._generate_improved_prompt(evaluation)
+        return None
 
-            return response
-        return "Failed to generate rebuttal"
+    def regenerate_rebuttal(self, evaluation: EvaluationCriteria) -> str:
+        """Regenerate the latest rebuttal from its evaluation, replacing it in the history"""
+        return self._replace_last_argument(self._query(self._generate_improved_prompt(evaluation), 'regeneration'))
 
     def return_conclusion(self) -> str:
         """Generate a concluding argument"""
-        task = f"""Create a powerful concluding argument for your position: {self.position}
+        prompt = self._format_argument_prompt(self._conclusion_task())
+        response = self._query(prompt, 'conclusion')
 
-        Your conclusion should:
-        1. Summarize your key arguments
-        2. Address how you've countered opponent's main points
-        3. Provide a compelling final perspective
-        4. Demonstrate why your position is the most reasonable
+        if response:
+            self._record_argument(response, len(self.argument_history), 'conclusion')
+            return response
+        return "Failed to generate conclusion"
 
-        Limit your response to three paragraphs."""
+    def stream_introduction(self, topic: str,
+                            opponent_argument: Optional[str] = None) -> Generator[str, None, str]:
+        """Streaming counterpart of return_introduction; yields text chunks and returns the full argument"""
+        prompt = self._format_argument_prompt(self._introduction_task(topic), opponent_argument)
+
+        response = yield from self._stream(prompt, 'introduction')
+        if response:
+            self._record_argument(response, 0, 'introduction')
+            return response
+        return "Failed to generate introduction"
+
+    def stream_rebuttal(self, opponent_argument: str) -> Generator[Union[str, object], None, str]:
+        """
+        Streaming counterpart of return_rebuttal. Yields STREAM_RESTART before
+        streaming a regenerated rebuttal that replaces the chunks sent so far.
+        """
+        current_round = self._record_opponent_argument(opponent_argument)
 
-        prompt = self._format_argument_prompt(task)
-        response = self.foundation.query_llm(prompt)
+        prompt = self._format_argument_prompt(self._rebuttal_task(), opponent_argument)
+        response = yield from self._stream(prompt, 'rebuttal')
 
         if response:
-            argument = Argument(
-                content=response,
-                round_number=len(self.argument_history),
-                argument_type='conclusion'
-            )
-            self.argument_history.append(argument)
+            self._record_argument(response, current_round, 'rebuttal')
+
+            improved_prompt = self._review_rebuttal(response)
+            if improved_prompt is not None:
+                yield STREAM_RESTART
+                regenerated = yield from self._stream(improved_prompt, 'regeneration')
+                response = self._replace_last_argument(regenerated)
+
+            return response
+        return "Failed to generate rebuttal"
+
+    def stream_conclusion(self) -> Generator[str, None, str]:
+        """Streaming counterpart of return_conclusion"""
+        prompt = self._format_argument_prompt(self._conclusion_task())
+        response = yield from self._stream(prompt, 'conclusion')
+
+        if response:
+            self._record_argument(response, len(self.argument_history), 'conclusion')
             return response
         return "Failed to generate conclusion"
 
-    def _evaluate_argument(self, argument: str, context: str = None) -> EvaluationCriteria:
+    def _evaluate_argument(self, argument: str, context: str = None) -> Optional[EvaluationCriteria]:
         """
         Evaluate the quality of an argument
         Args:
             argument (str): The argument to evaluate
             context (str, optional): Additional context for evaluation
         Returns:
-            EvaluationCriteria: Quality assessment of the argument
+            EvaluationCriteria: Quality assessment of the argument, None if no valid one was returned
         """
-        evaluation_prompt = f"""
+        result = request_structured(
+            lambda prompt, response_format: self._query(prompt, 'evaluation', response_format),
+            self._evaluation_prompt(argument, context), EVALUATION_SCHEMA,
+            self.foundation.config.structured_output, self.foundation.config.structured_output_repairs
+        )
+        return self._accept_evaluation(result)
+
+    def _record_evaluation(self, evaluation: EvaluationCriteria):
+        """Feed a self-evaluation of the latest argument into the foundation's evaluation store"""
+        round_number = self.argument_history[-1].round_number if self.argument_history else 0
+        self.foundation.record_evaluation(evaluation, round_number, self.seat, self.position, 'self')
+
+    @staticmethod
+    def _evaluation_prompt(argument: str, context: str = None) -> str:
+        return f"""
         Evaluate this debate argument and rate each criterion from 1 (POOR) to 5 (EXCELLENT):
 
-        1. Argument coherence
-        2. Evidence quality
-        3. Rebuttal relevance
-        4. Counter-argument strength
-        5. Factual accuracy
-        6. Persuasiveness
-        7. Clarity
-        8. Intellectual honesty
-        9. Fallacy avoidance
-
-        Provide ratings in JSON format like:
-        {{
-            "argument_coherence": 5,
-            "evidence_quality": 4,
-            "rebuttal_relevance": 4,
-            "counter_argument_strength": 3,
-            "factual_accuracy": 5,
-            "persuasiveness": 4,
-            "clarity": 5,
-            "intellectual_honesty": 4,
-            "fallacy_avoidance": 4
-        }}
+        {_CRITERIA_LIST}
+
+        Provide ratings in JSON format, responding with only a JSON object of this form:
+        {_EVALUATION_FORMAT}
 
         Argument to evaluate:
         {argument}
@@ -207,38 +455,46 @@ class DebateAgent:
         {context if context else 'No additional context provided'}
         """
 
-        # Use the foundation (DebateModeration) instance directly
-        eval_response = self.foundation.query_llm(evaluation_prompt)
-
-        try:
-            ratings = json.loads(eval_response)
-            return EvaluationCriteria(
-                argument_coherence=ArgumentQuality(ratings['argument_coherence']),
-                evidence_quality=ArgumentQuality(ratings['evidence_quality']),
-                rebuttal_relevance=ArgumentQuality(ratings['rebuttal_relevance']),
-                counter_argument_strength=ArgumentQuality(ratings['counter_argument_strength']),
-                factual_accuracy=ArgumentQuality(ratings['factual_accuracy']),
-                persuasiveness=ArgumentQuality(ratings['persuasiveness']),
-                clarity=ArgumentQuality(ratings['clarity']),
-                intellectual_honesty=ArgumentQuality(ratings['intellectual_honesty']),
-                fallacy_avoidance=ArgumentQuality(ratings['fallacy_avoidance']),
-                source_credibility=ArgumentQuality(ratings['source_credibility'])
-            )
-        except (json.JSONDecodeError, KeyError) as e:
-            self.foundation.logger.log_error(f"Failed to parse evaluation response: {str(e)}")
-            # Return default evaluation with all criteria set to SATISFACTORY
-            return EvaluationCriteria(
-                *[ArgumentQuality.SATISFACTORY] * 9  # Creates 9 SATISFACTORY ratings
+    def _accept_evaluation(self, result: StructuredResult) -> Optional[EvaluationCriteria]:
+        if not result.ok:
+            self.foundation.logger.log_error(
+                prompt="Failed to parse evaluation response",
+                error=ValueError("; ".join(result.errors)),
+                metadata={"agent_id": self.agentid, "response": result.raw}
             )
-
-    def _generate_improved_prompt(self, evaluation: EvaluationCriteria) -> str:
-        # Implementation of _generate_improved_prompt method
-        # This method should return a prompt to regenerate the rebuttal
-        pass
-
-    def analyze_argument(self, argument: str, responding_to: Optional[str] = None) -> ArgumentAnalysis:
-        """Analyze an argument for key points and evidence"""
-        analysis_prompt = f"""
+            return None
+        evaluation = EvaluationCriteria.from_ratings(result.value)
+        self._record_evaluation(evaluation)
+        return evaluation
+
+    def _generate_improved_prompt(self, evaluation: EvaluationCriteria) -> CompiledPrompt:
+        """Prompt to regenerate the latest rebuttal, targeting its weakest criteria"""
+        ratings = vars(evaluation)
+        weakest = [
+            name.replace('_', ' ')
+            for name, quality in sorted(ratings.items(), key=lambda item: item[1].value)
+            if quality.value < ArgumentQuality.GOOD.value
+        ] or [min(ratings, key=lambda name: ratings[name].value).replace('_', ' ')]
+        draft = self.argument_history[-1].content if self.argument_history else ''
+        opponent_argument = self.opponent_arguments[-1].content if self.opponent_arguments else None
+
+        task = f"""{self._rebuttal_task()}
+
+        Your previous draft scored {evaluation.calculate_score():.1f}/5 and was weakest on: {', '.join(weakest)}.
+        Rewrite it to fix those weaknesses while keeping its strongest points.
+
+        Previous draft:
+        {draft}"""
+        return self._build_argument_prompt(task, opponent_argument, fixed_task=False)
+
+    def prompt_prefix_tokens(self) -> Dict[str, int]:
+        """Cache-eligible prefix length, in estimated tokens, of each argument prompt template compiled so far"""
+        return {task.splitlines()[0] if task else 'regeneration': template.prefix_tokens
+                for task, template in self._templates.items()}
+
+    @staticmethod
+    def _analysis_prompt(argument: str) -> str:
+        return f"""
         Analyze this argument:
         {argument}
 
@@ -248,9 +504,31 @@ class DebateAgent:
         3. Main claims that need verification
         """
 
-        analysis = self.foundation.query_llm(analysis_prompt)
-        fact_check = self.foundation.fact_check(argument)
+    def _timed_query(self, prompt: str, stage: str) -> Tuple[Optional[str], float]:
+        started = time.perf_counter()
+        return self._query(prompt, stage), time.perf_counter() - started
 
+    def analyze_argument(self, argument: str, responding_to: Optional[str] = None) -> ArgumentAnalysis:
+        """Analyze an argument for key points and evidence; the analysis and fact check run concurrently"""
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="debate-analysis") as pool:
+            analysis_future = pool.submit(
+                contextvars.copy_context().run, self._timed_query, self._analysis_prompt(argument), 'analysis'
+            )
+            with llm_call_context(agent_id=self.agentid, stage='fact_check'):
+                fact_check = self.foundation.fact_check(argument)
+            analysis, analysis_time = analysis_future.result()
+
+        timings = {
+            'analysis': analysis_time,
+            'fact_check': fact_check.get('timings', {}).get('total', 0.0),
+            'total': time.perf_counter() - started
+        }
+        return self._build_analysis(argument, analysis, fact_check, responding_to, timings)
+
+    def _build_analysis(self, argument: str, analysis: str, fact_check: Dict[str, Any],
+                        responding_to: Optional[str] = None,
+                        timings: Optional[Dict[str, float]] = None) -> ArgumentAnalysis:
         # Parse response and create ArgumentAnalysis
         key_points = self._extract_key_points(analysis)
         evidence = self._extract_evidence(analysis)
@@ -262,7 +540,8 @@ class DebateAgent:
             evidence_used=evidence,
             response_to=response_points,
             fact_check_results=fact_check,
-            evaluation=None  # Will be set by moderator
+            evaluation=None,  # Will be set by moderator
+            timings=timings or {}
         )
 
     def _extract_key_points(self, analysis: str) -> List[str]:
@@ -288,7 +567,7 @@ class DebateAgent:
             ]
             return points
         except Exception as e:
-            self.foundation.logger.log_error(f"Failed to extract key points: {str(e)}")
+            self.foundation.logger.log_error(prompt="Failed to extract key points", error=e)
             return []
 
     def _extract_evidence(self, analysis: str) -> List[str]:
@@ -314,7 +593,7 @@ class DebateAgent:
             ]
             return evidence
         except Exception as e:
-            self.foundation.logger.log_error(f"Failed to extract evidence: {str(e)}")
+            self.foundation.logger.log_error(prompt="Failed to extract evidence", error=e)
             return []
 
     def _extract_response_points(self, analysis: str, responding_to: Optional[str]) -> Optional[List[str]]:
@@ -343,5 +622,5 @@ class DebateAgent:
             ]
             return responses
         except Exception as e:
-            self.foundation.logger.log_error(f"Failed to extract response points: {str(e)}")
+            self.foundation.logger.log_error(prompt="Failed to extract response points", error=e)
             return None
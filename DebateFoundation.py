@@ -1,8 +1,20 @@
-from openai import OpenAI
-from tenacity import retry, stop_after_attempt, wait_exponential
-from typing import Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Generator, List, Tuple
+import asyncio
+import contextvars
+import re
+import threading
 import time
-from config import APIConfig, DebateConfig
+import uuid
+from config import DebateConfig
+from llm_backend import LLMBackend, LLMResponse, create_backend, estimate_tokens
+from call_context import current_call_context
+from token_accounting import TokenBudget, TokenBudgetExceeded, TokenLedger
+from tracing import NOOP_SPAN, get_tracer
+from evaluation_store import get_evaluation_store
+from semantic_cache import get_semantic_cache
+from structured_output import FACT_CHECK_SCHEMA, StructuredResult, arequest_structured, request_structured
+from debate_evaluation import EvaluationCriteria
 from DebateLogger import DebateLogger
 import json
 import os
@@ -11,85 +23,373 @@ from dotenv import load_dotenv
 # Load the .env file
 load_dotenv()
 
+FACT_CHECK_FIELDS = ("claims", "confidence_scores", "evidence", "context_notes")
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+# Sentences with one of these are treated as checkable factual claims
+_FACTUAL_MARKERS = re.compile(
+    r'\d|%|\bpercent\b|\baccording to\b|\bstud(?:y|ies)\b|\bresearch\b|\breports?\b|'
+    r'\bdata\b|\bsurveys?\b|\bevidence\b|\bestimates?\b|\bstatistics?\b',
+    re.IGNORECASE
+)
+_FACT_CHECK_FORMAT = FACT_CHECK_SCHEMA.skeleton()
+# A claim is checked with this many neighbouring sentences on each side, not the whole argument
+_CLAIM_WINDOW_SENTENCES = 1
+
+
+_fact_check_executor: Optional[ThreadPoolExecutor] = None
+_fact_check_lock = threading.Lock()
+
+
+def _get_fact_check_executor() -> ThreadPoolExecutor:
+    global _fact_check_executor
+    with _fact_check_lock:
+        if _fact_check_executor is None:
+            _fact_check_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="debate-fact-check")
+        return _fact_check_executor
+
 
 class DebateFoundation:
-    def __init__(self, config: DebateConfig):
-        # Initialize OpenAI API and logger
-        self.api = OpenAI(api_key=APIConfig().api_key)
-        self.logger = DebateLogger()
+    def __init__(self, config: DebateConfig, backend: Optional[LLMBackend] = None):
+        # Initialize LLM backend and logger
+        self.backend = backend or create_backend(config)
+        self.debate_id = config.debate_id or uuid.uuid4().hex[:16]
+        self.logger = DebateLogger(debate_id=self.debate_id)
         self.config = config
+        self.token_ledger = TokenLedger(TokenBudget(
+            soft_tokens=config.soft_token_budget,
+            hard_tokens=config.token_budget,
+            hard_cost=config.cost_budget
+        ))
+        self.tracer = get_tracer()
+        self.evaluation_store = get_evaluation_store()
+        self.semantic_cache = get_semantic_cache(config.semantic_cache_path) if config.semantic_cache else None
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10)
-    )
-    def query_llm(self, prompt: str, context: Optional[str] = None) -> Optional[str]:
+    def record_evaluation(self, evaluation: EvaluationCriteria, round_number: int, side: str,
+                          position: str = "", source: str = 'round'):
+        """Add an evaluation to the process-wide evaluation store; a no-op without numpy"""
+        if self.evaluation_store is not None:
+            self.evaluation_store.add(evaluation, self.debate_id, round_number, side, position, source)
+
+    def semantic_lookup(self, kind: str, text: str) -> Optional[str]:
+        """A result stored for a near-duplicate of text (a position or claim); None when disabled or missed"""
+        if self.semantic_cache is None:
+            return None
+        return self.semantic_cache.get(kind, self.config.model, text, self.config.semantic_cache_threshold)
+
+    def semantic_store(self, kind: str, text: str, value: Optional[str]):
+        if self.semantic_cache is not None and value:
+            self.semantic_cache.put(kind, self.config.model, text, value)
+
+    def query_llm(self, prompt: str, context: Optional[str] = None,
+                  response_format: Optional[Dict[str, Any]] = None) -> Optional[str]:
         """
-        Query the LLM with retry logic and proper error handling
+        Query the LLM with proper error handling; retries happen in the backend (resilience.py)
         """
+        messages = self._build_messages(prompt, context)
+        max_tokens = self._prepare_call(messages, self.config.max_tokens)
         try:
-            messages = []
-            if context:
-                messages.append({"role": "system", "content": context})
-            messages.append({"role": "user", "content": prompt})
-
-            llm_response = self.api.chat.completions.create(
-                model=self.config.model,
-                messages=messages,
-                temperature=self.config.temperature,
-                max_tokens=self.config.max_tokens,
-                stream=False
-            )
+            with self._llm_span(messages) as span:
+                llm_response = self.backend.complete(
+                    messages,
+                    model=self.config.model,
+                    temperature=self._sampling_temperature(),
+                    max_tokens=max_tokens,
+                    response_format=response_format
+                )
+                self._trace_response(span, llm_response)
+            self._record_usage(messages, llm_response)
+            return self._handle_response(prompt, llm_response)
 
-            content = llm_response.choices[0].message.content
-            self.logger.log_query(
-                prompt=prompt,
-                response=content,
-                metadata={
-                    "model": self.config.model,
-                    "temperature": self.config.temperature,
-                    "max_tokens": self.config.max_tokens
-                }
-            )
-            return content
+        except Exception as e:
+            self._handle_error(prompt, context, e)
+            raise
+
+    async def aquery_llm(self, prompt: str, context: Optional[str] = None,
+                         response_format: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """Async counterpart of query_llm"""
+        messages = self._build_messages(prompt, context)
+        max_tokens = self._prepare_call(messages, self.config.max_tokens)
+        try:
+            with self._llm_span(messages) as span:
+                llm_response = await self.backend.acomplete(
+                    messages,
+                    model=self.config.model,
+                    temperature=self._sampling_temperature(),
+                    max_tokens=max_tokens,
+                    response_format=response_format
+                )
+                self._trace_response(span, llm_response)
+            self._record_usage(messages, llm_response)
+            return self._handle_response(prompt, llm_response)
 
         except Exception as e:
-            self.logger.log_error(
-                prompt=prompt,
-                error=e,
-                metadata={"context": context if context else "No context provided"}
-            )
+            self._handle_error(prompt, context, e)
+            raise
+
+    def stream_llm(self, prompt: str, context: Optional[str] = None,
+                   tags: Optional[Dict[str, Any]] = None) -> Generator[str, None, Optional[str]]:
+        """
+        Stream the LLM response as text chunks and return the full text once done.
+        A stream is retried in the backend (resilience.py) only until its first chunk is out;
+        a failure after that is raised, since the caller has already consumed chunks.
+        Call tags are passed explicitly because a generator cannot hold a call context across yields.
+        """
+        tags = {**current_call_context(), **(tags or {})}
+        messages = self._build_messages(prompt, context)
+        max_tokens = self._prepare_call(messages, self.config.max_tokens)
+        try:
+            # The span includes time the consumer spends between chunks
+            with self._llm_span(messages, tags) as span:
+                llm_response = yield from self.backend.stream(
+                    messages,
+                    model=self.config.model,
+                    temperature=self._sampling_temperature(),
+                    max_tokens=max_tokens
+                )
+                self._trace_response(span, llm_response)
+            self._record_usage(messages, llm_response, tags)
+            return self._handle_response(prompt, llm_response)
+
+        except Exception as e:
+            self._handle_error(prompt, context, e)
             raise
 
+    def _sampling_temperature(self) -> Optional[float]:
+        return self.config.temperature
+
+    @staticmethod
+    def _build_messages(prompt: str, context: Optional[str] = None) -> List[Dict[str, str]]:
+        messages = []
+        if context:
+            messages.append({"role": "system", "content": context})
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+    def _prepare_call(self, messages: List[Dict[str, str]], max_tokens: Optional[int]) -> Optional[int]:
+        """Enforce the hard budget before a call and return the max_tokens it may use"""
+        prompt_tokens = sum(estimate_tokens(m.get("content")) for m in messages)
+        self.token_ledger.check(self.config.model, prompt_tokens)
+        return self.token_ledger.completion_allowance(prompt_tokens, max_tokens)
+
+    def _current_round(self) -> int:
+        return 0
+
+    def _llm_span(self, messages: List[Dict[str, str]], tags: Optional[Dict[str, Any]] = None):
+        """Span around one LLM call, tagged from the call context; a no-op while tracing is disabled"""
+        if not self.tracer.enabled:
+            return NOOP_SPAN
+        if tags is None:
+            tags = current_call_context()
+        return self.tracer.span(
+            "llm.query",
+            self.debate_id,
+            stage=tags.get("stage"),
+            **{
+                "debate.id": self.debate_id,
+                "debate.agent_id": tags.get("agent_id"),
+                "debate.round": tags.get("round", self._current_round()),
+                "gen_ai.request.model": self.config.model,
+                "debate.prompt_chars": sum(len(m.get("content") or "") for m in messages)
+            }
+        )
+
+    @staticmethod
+    def _trace_response(span, llm_response: LLMResponse):
+        if span is NOOP_SPAN:
+            return
+        span.set(**{
+            "gen_ai.usage.input_tokens": llm_response.prompt_tokens,
+            "gen_ai.usage.output_tokens": llm_response.completion_tokens,
+            "debate.completion_chars": len(llm_response.content or ""),
+            "debate.cached": llm_response.cached
+        })
+
+    def _record_usage(self, messages: List[Dict[str, str]], llm_response: LLMResponse,
+                      tags: Optional[Dict[str, Any]] = None):
+        if tags is None:
+            tags = current_call_context()
+        self.token_ledger.record(
+            self.config.model,
+            messages,
+            llm_response,
+            agent_id=tags.get("agent_id"),
+            round_number=tags.get("round", self._current_round()),
+            stage=tags.get("stage"),
+            prefix_tokens=tags.get("prefix_tokens", 0)
+        )
+
+    def _handle_response(self, prompt: str, llm_response: LLMResponse) -> str:
+        content = llm_response.content
+        self.logger.log_query(
+            prompt=prompt,
+            response=content,
+            metadata={
+                "model": self.config.model,
+                "temperature": self.config.temperature,
+                "max_tokens": self.config.max_tokens,
+                "round": self._current_round(),
+                **current_call_context()
+            }
+        )
+        return content
+
+    def _handle_error(self, prompt: str, context: Optional[str], error: Exception):
+        self.logger.log_error(
+            prompt=prompt,
+            error=error,
+            metadata={"context": context if context else "No context provided"}
+        )
+
     def fact_check(self, argument: str) -> Dict[str, Any]:
-        """Verify factual claims in an argument"""
-        fact_check_prompt = f"""
-        Analyze the following argument for factual claims:
-        {argument}
+        """
+        Verify factual claims in an argument. The argument is split into claims
+        which are checked concurrently on a shared pool, at most
+        config.fact_check_concurrency at once.
+        """
+        started = time.perf_counter()
+        claims = self._split_claims(argument, self.config.max_fact_check_claims)
+        workers = max(1, min(self.config.fact_check_concurrency, len(claims)))
+        # Each worker checks every workers-th claim in turn, in a copy of the caller's
+        # context so its call tags carry over
+        futures = [
+            _get_fact_check_executor().submit(
+                contextvars.copy_context().run, self._check_claims, claims[offset::workers], argument
+            )
+            for offset in range(workers)
+        ]
+        results = [None] * len(claims)
+        for offset, future in enumerate(futures):
+            results[offset::workers] = future.result()
+        return self._merge_fact_checks(claims, results, time.perf_counter() - started)
+
+    async def afact_check(self, argument: str) -> Dict[str, Any]:
+        """Async counterpart of fact_check"""
+        started = time.perf_counter()
+        claims = self._split_claims(argument, self.config.max_fact_check_claims)
+        semaphore = asyncio.Semaphore(max(1, self.config.fact_check_concurrency))
+
+        async def check(claim: str) -> Tuple[Dict[str, Any], float]:
+            async with semaphore:
+                return await self._acheck_claim(claim, argument)
+
+        results = await asyncio.gather(*[check(claim) for claim in claims])
+        return self._merge_fact_checks(claims, results, time.perf_counter() - started)
+
+    def _check_claims(self, claims: List[str], argument: str) -> List[Tuple[Dict[str, Any], float]]:
+        return [self._check_claim(claim, argument) for claim in claims]
+
+    def _check_claim(self, claim: str, argument: str) -> Tuple[Dict[str, Any], float]:
+        started = time.perf_counter()
+        cached = self.semantic_lookup('fact_check', claim)
+        if cached is not None:
+            return json.loads(cached), time.perf_counter() - started
+        try:
+            result = self._fact_check_result(request_structured(
+                lambda prompt, response_format: self.query_llm(prompt, response_format=response_format),
+                self._fact_check_prompt(claim, self._claim_excerpt(claim, argument)), FACT_CHECK_SCHEMA,
+                self.config.structured_output, self.config.structured_output_repairs
+            ))
+            self._store_fact_check(claim, result)
+        except TokenBudgetExceeded:
+            raise
+        except Exception as e:
+            # One failed claim should not sink the others
+            result = {"error": str(e)}
+        return result, time.perf_counter() - started
+
+    async def _acheck_claim(self, claim: str, argument: str) -> Tuple[Dict[str, Any], float]:
+        started = time.perf_counter()
+        cached = self.semantic_lookup('fact_check', claim)
+        if cached is not None:
+            return json.loads(cached), time.perf_counter() - started
+        try:
+            result = self._fact_check_result(await arequest_structured(
+                lambda prompt, response_format: self.aquery_llm(prompt, response_format=response_format),
+                self._fact_check_prompt(claim, self._claim_excerpt(claim, argument)), FACT_CHECK_SCHEMA,
+                self.config.structured_output, self.config.structured_output_repairs
+            ))
+            self._store_fact_check(claim, result)
+        except TokenBudgetExceeded:
+            raise
+        except Exception as e:
+            result = {"error": str(e)}
+        return result, time.perf_counter() - started
+
+    def _store_fact_check(self, claim: str, result: Dict[str, Any]):
+        # Only verified claims are reused; a failed check is tried again next time
+        if "error" not in result:
+            self.semantic_store('fact_check', claim, json.dumps(result))
+
+    @staticmethod
+    def _split_claims(argument: str, max_claims: int) -> List[str]:
+        """Sentences of the argument that make factual claims; the whole argument if none stand out"""
+        sentences = [s.strip() for s in _SENTENCE_BOUNDARY.split(argument or "") if len(s.split()) >= 5]
+        claims = [s for s in sentences if _FACTUAL_MARKERS.search(s)]
+        return claims[:max_claims] or [argument]
 
-        For each claim:
-        1. Identify the specific claim
+    @staticmethod
+    def _claim_excerpt(claim: str, argument: str) -> Optional[str]:
+        """The claim's sentence with its neighbours, or None when the claim is the whole argument"""
+        sentences = [s.strip() for s in _SENTENCE_BOUNDARY.split(argument or "")]
+        if claim not in sentences or len(sentences) == 1:
+            return None
+        index = sentences.index(claim)
+        return " ".join(sentences[max(0, index - _CLAIM_WINDOW_SENTENCES):index + _CLAIM_WINDOW_SENTENCES + 1])
+
+    @staticmethod
+    def _fact_check_prompt(claim: str, excerpt: Optional[str] = None) -> str:
+        source = f"""
+
+        Excerpt of the argument it comes from:
+        {excerpt}""" if excerpt else ""
+        return f"""
+        Fact check the following claim:
+        {claim}
+
+        For the claim:
+        1. State the specific claim
         2. Rate confidence (1-5) in its accuracy
         3. Provide supporting or contradicting evidence
         4. Note any context or nuance needed
 
         Format response as JSON with fields:
-        - claims: list of identified claims
+        - claims: list containing the claim
         - confidence_scores: corresponding confidence ratings
         - evidence: supporting/contradicting evidence
         - context_notes: additional context or nuance
+
+        Respond with only a JSON object of this form:
+        {_FACT_CHECK_FORMAT}{source}
         """
 
-        llm_result = self.query_llm(fact_check_prompt)
-        try:
-            return json.loads(llm_result)
-        except json.JSONDecodeError as e:
-            self.logger.log_error(
-                prompt="Failed to parse fact check response",
-                error=e,
-                metadata={"failed_response": llm_result}
-            )
-            return {"error": "Failed to parse fact check response"}
+    @staticmethod
+    def _merge_fact_checks(claims: List[str], results: List[Tuple[Dict[str, Any], float]],
+                           elapsed: float) -> Dict[str, Any]:
+        """Concatenate per-claim results into a single fact check in the original response format"""
+        merged: Dict[str, Any] = {field: [] for field in FACT_CHECK_FIELDS}
+        merged["errors"] = []
+        for claim, (result, _) in zip(claims, results):
+            if "error" in result:
+                merged["errors"].append({"claim": claim, "error": result["error"]})
+                continue
+            for field in FACT_CHECK_FIELDS:
+                value = result.get(field, [])
+                merged[field].extend(value if isinstance(value, list) else [value])
+        merged["timings"] = {
+            "claims": [seconds for _, seconds in results],
+            "total": elapsed
+        }
+        return merged
+
+    def _fact_check_result(self, result: StructuredResult) -> Dict[str, Any]:
+        if result.ok:
+            return result.value
+        self.logger.log_error(
+            prompt="Failed to parse fact check response",
+            error=ValueError("; ".join(result.errors)),
+            metadata={"failed_response": result.raw}
+        )
+        return {"error": "Failed to parse fact check response"}
 
 
 if __name__ == "__main__":
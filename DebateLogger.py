@@ -1,17 +1,312 @@
+import atexit
 import traceback
 import datetime
 import json
 import logging
-from typing import Any, Dict
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional, Tuple
 from pathlib import Path
 from debate_evaluation import EvaluationCriteria
+from log_store import BlobStore, IndexKeys, LogStore, index_keys, intern_text, ndjson_blob_path
+
+
+DURABILITY_LEVELS = ("buffered", "fsync", "immediate")
+STORAGE_FORMATS = ("ndjson", "store")
+OVERFLOW_POLICIES = ("block", "drop")
+
+
+@dataclass
+class LogWriterStats:
+    enqueued: int = 0
+    written: int = 0
+    dropped: int = 0  # Entries discarded because the queue was full (overflow='drop')
+    blocked: int = 0  # Writes that had to wait for queue space (overflow='block')
+    block_time: float = 0.0
+    batches: int = 0
+    bytes_written: int = 0
+    rotations: int = 0
+    max_queue_depth: int = 0
+
+
+class LogWriter:
+    """
+    Appends NDJSON lines to one file from a background thread.
+    Entries are queued (bounded) and written in batches with a single write call: a batch
+    is written once batch_size entries are in or flush_interval seconds after its first,
+    and the file size is tracked in memory so rotation needs no per-write stat().
+    Durability levels: 'buffered' flushes each batch to the OS, 'fsync' also
+    fsyncs it, 'immediate' writes and fsyncs every entry on the caller's thread.
+    With storage='store' batches go to a compressed, indexed LogStore in the
+    directory named after the file (debate_logs.ndjson -> debate_logs/) instead.
+    With dedup_prompts, prompts passed to write() are split into repeated segments,
+    stored in a BlobStore and referenced from the entry, on the writer thread.
+    """
+
+    _STOP = object()
+    _FLUSH = object()
+
+    def __init__(self, path: str, max_file_size: int = 10 * 1024 * 1024,
+                 queue_size: int = 10000, batch_size: int = 500,
+                 flush_interval: float = 0.5, durability: str = "buffered",
+                 overflow: str = "block", storage: Optional[str] = None,
+                 compression: str = "gzip", dedup_prompts: bool = True,
+                 min_blob_bytes: int = 256):
+        storage = storage or os.getenv("DEBATE_LOG_STORAGE", "ndjson")
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Unknown durability level: {durability}")
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        if storage not in STORAGE_FORMATS:
+            raise ValueError(f"Unknown log storage format: {storage}")
+        self.path = Path(path)
+        self.max_file_size = max_file_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.durability = durability
+        self.overflow = overflow
+        self.stats = LogWriterStats()
+        self._stats_lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._store: Optional[LogStore] = None
+        self._file = None
+        self._size = 0
+        if storage == "store":
+            # Segments roll over at max_file_size instead of the file being renamed
+            self._store = LogStore(str(self.path.with_suffix("")), compression, max_segment_bytes=max_file_size)
+            blobs_path = self._store.path / "blobs.sqlite"
+        else:
+            self._file = open(self.path, "a", encoding="utf-8")
+            self._size = self._file.tell()
+            blobs_path = ndjson_blob_path(str(self.path))
+        self.min_blob_bytes = min_blob_bytes
+        self.blobs: Optional[BlobStore] = BlobStore(str(blobs_path)) if dedup_prompts else None
+        self.pid = os.getpid()
+        self.closed = False
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        if durability != "immediate":
+            self._thread = threading.Thread(target=self._run, name="debate-log-writer", daemon=True)
+            self._thread.start()
+
+    def write(self, line: str, keys: IndexKeys = (None, None, None, None), prompt: Optional[str] = None):
+        """
+        Queue one serialized entry (a JSON object without trailing newline) with its index keys.
+        A prompt is added to the entry when written: as prompt_parts with dedup_prompts, else as prompt.
+        """
+        item = (line, keys, prompt)
+        if self._thread is None:
+            self._write_batch([item])
+            with self._stats_lock:
+                self.stats.enqueued += 1
+            return
+
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            if self.overflow == "drop":
+                with self._stats_lock:
+                    self.stats.dropped += 1
+                return
+            start = time.perf_counter()
+            self._queue.put(item)
+            with self._stats_lock:
+                self.stats.blocked += 1
+                self.stats.block_time += time.perf_counter() - start
+        with self._stats_lock:
+            self.stats.enqueued += 1
+            self.stats.max_queue_depth = max(self.stats.max_queue_depth, self._queue.qsize())
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            done = any(item is self._STOP for item in batch)
+            items = [item for item in batch if item is not self._STOP and item is not self._FLUSH]
+            try:
+                if items:
+                    self._write_batch(items)
+            except Exception:
+                logging.getLogger('DebateSystem').exception("Log writer failed to write %d entries", len(items))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if done:
+                return
+
+    def _next_batch(self) -> List[Any]:
+        """
+        Entries queued until batch_size of them are in or flush_interval has passed since
+        the first; a flush() or close() ends the batch early
+        """
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and batch[-1] is not self._STOP and batch[-1] is not self._FLUSH:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_batch(self, items: List[Tuple[str, IndexKeys, Optional[str]]]):
+        lines = self._serialize_prompts(items)
+        if self._store is not None:
+            size = self._store.append(lines, [keys for _, keys, _ in items], fsync=self.durability != "buffered")
+        else:
+            data = "\n".join(lines) + "\n"
+            size = len(data.encode("utf-8"))
+            with self._file_lock:
+                if self._size > self.max_file_size:
+                    self._rotate()
+                self._file.write(data)
+                self._file.flush()
+                if self.durability != "buffered":
+                    os.fsync(self._file.fileno())
+                self._size += size
+        with self._stats_lock:
+            self.stats.written += len(lines)
+            self.stats.batches += 1
+            self.stats.bytes_written += size
+
+    def _serialize_prompts(self, items: List[Tuple[str, IndexKeys, Optional[str]]]) -> List[str]:
+        if all(prompt is None for _, _, prompt in items):
+            return [line for line, _, _ in items]
+        if self.blobs is None:
+            return [line if prompt is None else self._add_field(line, "prompt", prompt) for line, _, prompt in items]
+        # The batch's blobs are committed together, before any entry referencing them is written
+        with self.blobs.batch():
+            return [
+                line if prompt is None else
+                self._add_field(line, "prompt_parts", intern_text(prompt, self.blobs, self.min_blob_bytes))
+                for line, _, prompt in items
+            ]
+
+    @staticmethod
+    def _add_field(line: str, name: str, value: Any) -> str:
+        separator = ", " if line != "{}" else ""
+        return f"{line[:-1]}{separator}{json.dumps(name)}: {json.dumps(value)}}}"
+
+    def _rotate(self):
+        # Rotated files keep using the original log's blob store; see log_store.ndjson_blob_path
+        self._file.close()
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        new_name = self.path.with_name(f"{self.path.stem}_{timestamp}{self.path.suffix}")
+        suffix = 1
+        while new_name.exists():
+            new_name = self.path.with_name(f"{self.path.stem}_{timestamp}_{suffix}{self.path.suffix}")
+            suffix += 1
+        self.path.rename(new_name)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._size = 0
+        with self._stats_lock:
+            self.stats.rotations += 1
+
+    def rotate_if_needed(self):
+        with self._file_lock:
+            if self._file is not None and self._size > self.max_file_size:
+                self._rotate()
+
+    def flush(self):
+        """Block until every queued entry has been written, without waiting out flush_interval"""
+        if self._thread is not None:
+            self._queue.put(self._FLUSH)
+            self._queue.join()
+
+    def close(self):
+        self.closed = True
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+        with self._file_lock:
+            if self._store is not None:
+                self._store.close()
+            else:
+                self._file.close()
+        if self.blobs is not None:
+            self.blobs.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            data = asdict(self.stats)
+        data["queue_depth"] = self._queue.qsize()
+        data["file_size"] = self._size
+        if self.blobs is not None:
+            data["blob_bytes_stored"] = self.blobs.stored_bytes
+            data["blob_bytes_referenced"] = self.blobs.referenced_bytes
+        return data
+
+
+_writers: Dict[Path, LogWriter] = {}
+_writer_options: Dict[Path, Dict[str, Any]] = {}
+_writers_lock = threading.Lock()
+
+
+def get_log_writer(path: str, max_file_size: int = 10 * 1024 * 1024) -> LogWriter:
+    """Return the process-wide writer for a log file, so every logger appending to it shares one queue"""
+    key = Path(path).resolve()
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            options = {"max_file_size": max_file_size, **_writer_options.get(key, {})}
+            writer = LogWriter(str(path), **options)
+            _writers[key] = writer
+        return writer
+
+
+def configure_log_writer(path: str = "debate_logs.ndjson", **options) -> LogWriter:
+    """
+    Set writer options (queue_size, batch_size, flush_interval, durability, overflow,
+    max_file_size, storage, compression, dedup_prompts, min_blob_bytes) for a log file, replacing its current writer after flushing it
+    """
+    key = Path(path).resolve()
+    with _writers_lock:
+        _writer_options[key] = options
+        previous = _writers.pop(key, None)
+    if previous is not None:
+        previous.close()
+    return get_log_writer(path, options.get("max_file_size", 10 * 1024 * 1024))
+
+
+def _forget_writers_after_fork():
+    # A forked child inherits the writers but not their threads; it opens its own on first use
+    global _writers_lock
+    _writers.clear()
+    _writers_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_writers_after_fork)
+
+
+def flush_log_writers():
+    """Block until every writer's queue is drained"""
+    with _writers_lock:
+        writers = list(_writers.values())
+    for writer in writers:
+        writer.flush()
+
+
+@atexit.register
+def close_log_writers():
+    """Flush and close every writer; runs at interpreter exit"""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
 
 
 # Logger for Debate
 class DebateLogger:
-    def __init__(self, log_file="debate_logs.ndjson", max_file_size_mb=10):
+    def __init__(self, log_file="debate_logs.ndjson", max_file_size_mb=10, debate_id: Optional[str] = None):
         self.log_file = Path(log_file)
         self.max_file_size = max_file_size_mb * 1024 * 1024
+        self.debate_id = debate_id  # Stamped on every entry so the log store can index by debate
+        self.writer = get_log_writer(str(self.log_file), self.max_file_size)
         self.setup_logging()
 
     def setup_logging(self):
@@ -21,17 +316,31 @@ class DebateLogger:
         )
         self.logger = logging.getLogger('DebateSystem')
 
+    def _current_writer(self) -> LogWriter:
+        # Re-resolve after a fork, or after configure_log_writer replaced the writer
+        if self.writer.closed or self.writer.pid != os.getpid():
+            self.writer = get_log_writer(str(self.log_file), self.max_file_size)
+        return self.writer
+
     def rotate_log_if_needed(self):
-        if self.log_file.exists() and self.log_file.stat().st_size > self.max_file_size:
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            new_name = self.log_file.with_name(f"{self.log_file.stem}_{timestamp}{self.log_file.suffix}")
-            self.log_file.rename(new_name)
+        self._current_writer().rotate_if_needed()
 
     def write_entry(self, entry: Dict[str, Any]):
-        self.rotate_log_if_needed()
-        with open(self.log_file, "a") as f:
-            f.write(json.dumps(entry) + "\n")
-        self.logger.info(f"Logged entry of type: {entry.get('type', 'unknown')}")
+        if self.debate_id is not None and "debate_id" not in entry:
+            entry = {"debate_id": self.debate_id, **entry}
+        writer = self._current_writer()
+        prompt = None
+        if writer.blobs is not None and isinstance(entry.get("prompt"), str):
+            # Interned into prompt_parts on the writer thread, off the caller's path
+            entry = dict(entry)
+            prompt = entry.pop("prompt")
+        # Serialized here so later changes to `entry` cannot leak into the log
+        writer.write(json.dumps(entry), index_keys(entry), prompt)
+        self.logger.debug(f"Logged entry of type: {entry.get('type', 'unknown')}")
+
+    def flush(self):
+        """Block until every entry logged so far is written"""
+        self._current_writer().flush()
 
     def log_query(self, prompt: str, response: str, metadata: Dict[str, Any] = None):
         entry = {
@@ -58,6 +367,19 @@ class DebateLogger:
         self.write_entry(entry)
         self.logger.error(f"Error occurred: {str(error)}")
 
+    def log_speculation(self, round_num: int, side: str, score: float, policy: str, action: str):
+        """Log how a late background evaluation was reconciled"""
+        entry = {
+            "timestamp": datetime.datetime.now().isoformat(),
+            "type": "speculation",
+            "round": round_num,
+            "side": side,
+            "score": score,
+            "policy": policy,
+            "action": action
+        }
+        self.write_entry(entry)
+
     def log_evaluation(self, round_num: int, pro_eval: EvaluationCriteria, against_eval: EvaluationCriteria):
         """Log debate round evaluations"""
         entry = {
@@ -66,15 +388,7 @@ class DebateLogger:
             "round": round_num,
             "pro_score": pro_eval.calculate_score(),
             "against_score": against_eval.calculate_score(),
-            "pro_criteria": {
-                "argument_coherence": pro_eval.argument_coherence.value,
-                "evidence_quality": pro_eval.evidence_quality.value,
-                # ... other criteria
-            },
-            "against_criteria": {
-                "argument_coherence": against_eval.argument_coherence.value,
-                "evidence_quality": against_eval.evidence_quality.value,
-                # ... other criteria
-            }
+            "pro_criteria": pro_eval.to_ratings(),
+            "against_criteria": against_eval.to_ratings()
         }
         self.write_entry(entry)
@@ -1,136 +1,541 @@
-from typing import Generator, Dict, Any, List, Tuple
-from dataclasses import dataclass
-from DebateAgent import DebateAgent
+from typing import Generator, Dict, Any, List, Optional, Tuple, Union
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict, replace
+import threading
+import time
+from DebateAgent import DebateAgent, STREAM_RESTART
 from DebateFoundation import DebateFoundation
 from DebateFoundation import DebateLogger
+from batch_evaluation import BatchEvaluator, EvaluationItem
+from debate_checkpoint import (
+    DebateCheckpoint, dump_agent, dump_evaluation, dump_usage, load_agent, load_checkpoint, load_usage,
+    save_checkpoint
+)
 from config import DebateConfig
-from debate_evaluation import EvaluationCriteria, ArgumentQuality
+from llm_backend import LLMBackend, LLMBackendError, LLMResponse
+from call_context import llm_call_context
+from token_accounting import TokenBudgetExceeded
+from turn_scheduler import TURN_ORDERS, TurnKey, TurnScheduler, turn_graph
+from debate_evaluation import CRITERIA, EvaluationCriteria, ArgumentQuality
+from structured_output import ROUND_EVALUATION_SCHEMA, StructuredResult, request_structured
 
 
 @dataclass
 class DebateState:
     round_number: int
-    status: str  # 'initializing', 'in_progress', 'completed', 'error'
-    current_turn: str  # 'pro' or 'against'
+    status: str  # 'initializing', 'in_progress', 'completed', 'error', 'aborted'
+    current_turn: str  # 'pro' or 'against', or a panel agent's id
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost: float = 0.0
+
+
+@dataclass
+class PendingEvaluation:
+    """A committed rebuttal whose self-evaluation is still running in the background"""
+    round_number: int
+    side: str
+    agent: DebateAgent
+    evaluation: Optional[Future] = None
+
+
+@dataclass
+class SpeculationStats:
+    evaluations: int = 0
+    below_threshold: int = 0
+    regenerations: int = 0
+    restarts: int = 0  # Opponent turns redone against a regenerated rebuttal
+    discarded_generations: int = 0  # Speculative opponent generations thrown away (still billed) by a restart
+
+
+SPECULATION_POLICIES = ('accept', 'restart', 'log')
+_ROUND_EVALUATION_FORMAT = ROUND_EVALUATION_SCHEMA.skeleton()
+
+
+_construction_executor: Optional[ThreadPoolExecutor] = None
+_construction_lock = threading.Lock()
+
+
+def _get_construction_executor() -> ThreadPoolExecutor:
+    global _construction_executor
+    with _construction_lock:
+        if _construction_executor is None:
+            _construction_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="debate-init")
+        return _construction_executor
 
 
 class DebateModeration(DebateFoundation):
-    def __init__(self, config: DebateConfig):
-        super().__init__(config)
+    def __init__(self, config: DebateConfig, backend: Optional[LLMBackend] = None,
+                 checkpoint: Optional[DebateCheckpoint] = None):
+        super().__init__(config, backend)
         self.config = config
+        self._validate_seats()
         self.state = DebateState(
             round_number=0,
             status='initializing',
-            current_turn='pro'
+            current_turn=self._seats()[0][0]
+        )
+        self.evaluations: List[Tuple[EvaluationCriteria, ...]] = []  # Per evaluated round, in seat order
+        self.speculation = SpeculationStats()
+        self.round_latencies: List[float] = []  # Generation wall time per round, excluding time spent by the consumer
+        self.peak_parallel_turns = 0  # Most panel turns generated at once
+        self._next_round = 0  # First round run_rounds still has to play
+        # Against's last argument, answered by pro next; a panel keeps its whole last round by agent id
+        self._previous_argument: Optional[Union[str, Dict[str, str]]] = None
+        if checkpoint is not None:
+            self._restore(checkpoint)
+        else:
+            self.agents: Dict[str, DebateAgent] = self._initialize_agents()
+
+    @classmethod
+    def resume(cls, checkpoint: Union[str, DebateCheckpoint], backend: Optional[LLMBackend] = None,
+               **overrides) -> "DebateModeration":
+        """
+        Rebuild a debate from a checkpoint without re-issuing completed calls;
+        run_rounds then continues from the round after the last checkpointed one
+        Args:
+            checkpoint (str | DebateCheckpoint): Checkpoint or the path it was saved to
+            backend (LLMBackend, optional): Backend to use instead of the configured one
+            **overrides: DebateConfig fields to change, e.g. rounds or checkpoint_path
+        """
+        if isinstance(checkpoint, str):
+            checkpoint = load_checkpoint(checkpoint)
+        config = replace(DebateConfig(**checkpoint.config), debate_id=checkpoint.debate_id, **overrides)
+        return cls(config, backend, checkpoint=checkpoint)
+
+    @property
+    def is_panel(self) -> bool:
+        return bool(self.config.positions)
+
+    @property
+    def pro_agent(self) -> DebateAgent:
+        return self.agents.get('pro')
+
+    @property
+    def against_agent(self) -> DebateAgent:
+        return self.agents.get('against')
+
+    def _seats(self) -> List[Tuple[str, str, str]]:
+        """(seat, agent id, position) per debater: 'pro' and 'against', or one seat per panel position keyed by agent id"""
+        if self.is_panel:
+            agent_ids = self.config.agent_ids or [f"agent{index + 1}" for index in range(len(self.config.positions))]
+            return [(agent_id, agent_id, position) for agent_id, position in zip(agent_ids, self.config.positions)]
+        return [('pro', self.config.agent1_id, self.config.pro_position),
+                ('against', self.config.agent2_id, self.config.against_position)]
+
+    def _validate_seats(self):
+        config = self.config
+        if not config.positions:
+            if not (config.pro_position and config.against_position):
+                raise ValueError("Set pro_position and against_position, or positions for a panel debate")
+            return
+        if len(config.positions) < 2:
+            raise ValueError("A panel debate needs at least two positions")
+        if config.agent_ids and len(config.agent_ids) != len(config.positions):
+            raise ValueError("agent_ids must name one agent per position")
+        if len(set(config.agent_ids)) != len(config.agent_ids) or {'pro', 'against'} & set(config.agent_ids):
+            raise ValueError("Panel agent ids must be unique and not 'pro' or 'against'")
+        if config.turn_order not in TURN_ORDERS:
+            raise ValueError(f"Unknown turn order: {config.turn_order}")
+
+    def _restore(self, checkpoint: DebateCheckpoint):
+        self.state = DebateState(**checkpoint.state)
+        self.token_ledger.restore(load_usage(checkpoint.usage))
+        self.evaluations = [
+            tuple(EvaluationCriteria.from_ratings(ratings) for ratings in round_ratings)
+            for round_ratings in checkpoint.evaluations
+        ]
+        self.speculation = SpeculationStats(**checkpoint.speculation)
+        self._next_round = checkpoint.next_round
+        self._previous_argument = checkpoint.previous_argument
+
+        # Agents are rebuilt from the saved context, so context gathering is not repeated
+        self.agents = {}
+        for seat, agent_id, position in self._seats():
+            self.agents[seat] = self._build_agent(agent_id, position, checkpoint.agents[seat]['context'])
+            load_agent(self.agents[seat], checkpoint.agents[seat])
+
+    def checkpoint(self, snapshots: Optional[Dict[str, Dict[str, Any]]] = None) -> DebateCheckpoint:
+        """
+        Capture the debate after its last completed round
+        Args:
+            snapshots (dict, optional): Agent snapshots by side to save instead of the live
+                state, for an agent that has already started on the next round
+        """
+        snapshots = snapshots or {}
+        return DebateCheckpoint(
+            debate_id=self.debate_id,
+            config=asdict(self.config),
+            state=asdict(self.state),
+            next_round=self._next_round,
+            previous_argument=self._previous_argument,
+            agents={seat: dump_agent(agent, snapshots.get(seat)) for seat, agent in self.agents.items()},
+            usage=dump_usage(list(self.token_ledger.records)),
+            evaluations=[tuple(dump_evaluation(evaluation) for evaluation in round_evaluations)
+                         for round_evaluations in self.evaluations],
+            speculation=asdict(self.speculation)
         )
-        self.pro_agent = self._initialize_pro_agent()
-        self.against_agent = self._initialize_against_agent()
-        self.evaluations: List[Tuple[EvaluationCriteria, EvaluationCriteria]] = []
-
-    def _initialize_pro_agent(self) -> DebateAgent:
-        """Initialize the pro-position debate agent"""
-        # Use self instead of creating a new foundation instance
-        # since DebateModeration already has the concrete query_llm implementation
 
-        # Gather context for pro position
-        context_prompt = f"""Gather key information and evidence to support the position: {self.config.pro_position}
+    @classmethod
+    def create_future(cls, config: DebateConfig, backend: Optional[LLMBackend] = None,
+                      executor: Optional[ThreadPoolExecutor] = None) -> "Future[DebateModeration]":
+        """
+        Start building a moderator in the background and return immediately
+        Args:
+            config (DebateConfig): Debate configuration
+            backend (LLMBackend, optional): Backend to use instead of the configured one
+            executor (ThreadPoolExecutor, optional): Executor to construct on, defaults to a shared pool
+        Returns:
+            Future: Resolves to a ready-to-run DebateModeration
+        """
+        return (executor or _get_construction_executor()).submit(cls, config, backend)
+
+    def _initialize_agents(self) -> Dict[str, DebateAgent]:
+        """Gather context for every agent concurrently; the queries are independent"""
+        seats = self._seats()
+        with ThreadPoolExecutor(max_workers=len(seats), thread_name_prefix="debate-context") as pool:
+            futures = {seat: pool.submit(self._initialize_agent, agent_id, position) for seat, agent_id, position in seats}
+            return {seat: future.result() for seat, future in futures.items()}
+
+    @staticmethod
+    def _context_prompt(position: str) -> str:
+        return f"""Gather key information and evidence to support the position: {position}
         Focus on factual data, research, and logical arguments."""
-        context = self.query_llm(context_prompt)
 
-        # Create agent config dict
-        pro_config = {
-            'agent_id': self.config.agent1_id,
-            'foundation': self  # Pass self as the foundation
+    def _agent_config(self, agent_id: str) -> Dict[str, Any]:
+        # Pass self as the foundation since DebateModeration
+        # already has the concrete query_llm implementation
+        seat = next((seat for seat, seat_agent_id, _ in self._seats() if seat_agent_id == agent_id), agent_id)
+        return {
+            'agent_id': agent_id,
+            'seat': seat,
+            'foundation': self,
+            'context_mode': self.config.context_mode,
+            'context_token_budget': self.config.context_token_budget,
+            'retrieval_top_k': self.config.retrieval_top_k
         }
 
+    def _build_agent(self, agent_id: str, position: str, context: str) -> DebateAgent:
         return DebateAgent(
-            config=pro_config,
+            config=self._agent_config(agent_id),
             memory=context,
-            position=self.config.pro_position,
+            position=position,
             persona=DebateConfig.get_default_persona()
         )
 
-    def _initialize_against_agent(self) -> DebateAgent:
-        """Initialize the against-position debate agent"""
-        # Use self instead of creating a new foundation instance
-
-        # Gather context for against position
-        context_prompt = f"""Gather key information and evidence to support the position: {self.config.against_position}
-        Focus on factual data, research, and logical arguments."""
-        context = self.query_llm(context_prompt)
-
-        # Create agent config dict
-        against_config = {
-            'agent_id': self.config.agent2_id,
-            'foundation': self  # Pass self as the foundation
-        }
+    def _initialize_agent(self, agent_id: str, position: str) -> DebateAgent:
+        """Gather context for a position and build its debate agent"""
+        context = self.semantic_lookup('context', position)
+        if context is None:
+            with llm_call_context(agent_id=agent_id, stage='context_gathering'):
+                context = self.query_llm(self._context_prompt(position))
+            self.semantic_store('context', position, context)
+        return self._build_agent(agent_id, position, context)
 
-        return DebateAgent(
-            config=against_config,
-            memory=context,
-            position=self.config.against_position,
-            persona=DebateConfig.get_default_persona()
-        )
+    def run_rounds(self, stream: bool = False) -> Generator[Dict[str, Any], None, None]:
+        """
+        Run the debate rounds with proper state management
+        Args:
+            stream (bool): Also yield incremental events while arguments are generated:
+                'chunk' (text delta), 'restart' (a rebuttal is being regenerated) and
+                'argument' (one side's finished argument), ahead of each round result.
+                Streaming always evaluates inline, whatever config.evaluation_mode says.
+                Panel debates generate turns concurrently, so they only stream 'argument' events.
+        """
+        background = self.config.evaluation_mode == 'background' and not stream
+        if background and self.config.speculation_policy not in SPECULATION_POLICIES:
+            raise ValueError(f"Unknown speculation policy: {self.config.speculation_policy}")
 
-    def run_rounds(self) -> Generator[Dict[str, Any], None, None]:
-        """Run the debate rounds with proper state management"""
         try:
             self.state.status = 'in_progress'
+            self._round_started = time.perf_counter()
+
+            if self.is_panel:
+                yield from self._run_panel_rounds(stream)
+            else:
+                yield from self._run_two_sided_rounds(stream, background)
 
-            # Opening arguments
-            pro_opening = self.pro_agent.return_introduction(self.config.topic)
-            against_opening = self.against_agent.return_introduction(
-                self.config.topic,
-                pro_opening
+            self.state.status = 'completed'
+
+        except TokenBudgetExceeded as error:
+            self.state.status = 'aborted'
+            self.logger.log_error(
+                prompt="Debate aborted on token budget",
+                error=error,
+                metadata={"round": self.state.round_number, "usage": self.token_ledger.summary()}
             )
+            raise
 
-            yield {
-                'round': 0,
-                'type': 'opening',
-                'pro_argument': pro_opening,
-                'against_argument': against_opening
-            }
+        except Exception as error:
+            self.state.status = 'error'
+            self.logger.log_error(
+                prompt="Debate round execution failed",
+                error=error,
+                metadata={"round": self.state.round_number}
+            )
+            raise
+
+    def _run_two_sided_rounds(self, stream: bool, background: bool) -> Generator[Dict[str, Any], None, None]:
+        """Openings and rebuttals of a pro/against debate, each side answering the other in turn"""
+        # Opening arguments, unless resumed past them
+        if self._next_round == 0:
+            pro_opening = yield from self._take_turn(
+                'pro', self.pro_agent, 'introduction', stream, self.config.topic
+            )
+            against_opening = yield from self._take_turn(
+                'against', self.against_agent, 'introduction', stream, self.config.topic, pro_opening
+            )
+
+            yield from self._emit_round(0, 'opening', pro_opening, against_opening)
+        against_opening = self._previous_argument
+        first_round = self._next_round
 
-            # Rebuttal rounds
-            for round_num in range(1, self.config.rounds + 1):
+        # Rebuttal rounds
+        if background:
+            yield from self._run_speculative_rebuttals(against_opening, first_round)
+        else:
+            for round_num in range(first_round, self.config.rounds + 1):
                 self.state.round_number = round_num
 
                 # Pro rebuttal
                 self.state.current_turn = 'pro'
-                pro_rebuttal = self.pro_agent.return_rebuttal(against_opening)
+                pro_rebuttal = yield from self._take_turn('pro', self.pro_agent, 'rebuttal', stream, against_opening)
 
                 # Against rebuttal
                 self.state.current_turn = 'against'
-                against_rebuttal = self.against_agent.return_rebuttal(pro_rebuttal)
+                against_rebuttal = yield from self._take_turn(
+                    'against', self.against_agent, 'rebuttal', stream, pro_rebuttal
+                )
 
                 # Update for next round
                 against_opening = against_rebuttal
 
-                yield {
-                    'round': round_num,
-                    'type': 'rebuttal',
-                    'pro_argument': pro_rebuttal,
-                    'against_argument': against_rebuttal
-                }
+                yield from self._emit_round(round_num, 'rebuttal', pro_rebuttal, against_rebuttal)
 
-            self.state.status = 'completed'
+    def _run_panel_rounds(self, stream: bool) -> Generator[Dict[str, Any], None, None]:
+        """
+        Openings and rebuttals of a panel debate, scheduled by config.turn_order.
+        Turns whose dependencies have finished are generated concurrently and
+        each round is emitted once all of its turns are in.
+        """
+        seats = [seat for seat, _, _ in self._seats()]
+        graph = turn_graph(seats, self._next_round, self.config.rounds, self.config.turn_order)
+        completed = {(self._next_round - 1, seat): argument
+                     for seat, argument in (self._previous_argument or {}).items()}
+        scheduler = TurnScheduler(max_workers=len(seats))
+        finished: Dict[int, Dict[str, str]] = {}
+        next_round = self._next_round
+
+        for (round_number, seat), argument in scheduler.run(graph, self._panel_turn, completed):
+            self.peak_parallel_turns = max(self.peak_parallel_turns, scheduler.peak_parallelism)
+            self.state.current_turn = seat
+            if stream:
+                yield {'type': 'argument', 'round': round_number, 'side': seat,
+                       'argument_type': 'introduction' if round_number == 0 else 'rebuttal', 'content': argument}
+            finished.setdefault(round_number, {})[seat] = argument
+            while len(finished.get(next_round, ())) == len(seats):
+                arguments = finished.pop(next_round)
+                self.state.round_number = next_round
+                yield from self._emit_panel_round(
+                    next_round, 'opening' if next_round == 0 else 'rebuttal', {seat: arguments[seat] for seat in seats}
+                )
+                next_round += 1
+
+    def _panel_opponents(self, seat: str, arguments: Dict[TurnKey, str]) -> Optional[str]:
+        """The other panelists' arguments a turn answers, labelled with their positions"""
+        positions = {other: position for other, _, position in self._seats()}
+        return "\n\n".join(
+            f"{other} ({positions[other]}):\n{argument}"
+            for (_, other), argument in arguments.items() if other != seat
+        ) or None
+
+    def _panel_turn(self, key: TurnKey, arguments: Dict[TurnKey, str]) -> str:
+        round_number, seat = key
+        agent = self.agents[seat]
+        opponents = self._panel_opponents(seat, arguments)
+        with llm_call_context(round=round_number):
+            if round_number == 0:
+                return agent.return_introduction(self.config.topic, opponents)
+            return agent.return_rebuttal(opponents)
+
+    def _take_turn(self, side: str, agent: DebateAgent, kind: str, stream: bool,
+                   *args) -> Generator[Dict[str, Any], None, str]:
+        """Have `agent` produce its `kind` argument, yielding stream events when streaming"""
+        if not stream:
+            return getattr(agent, f'return_{kind}')(*args)
+
+        round_number = self.state.round_number
+        chunks = getattr(agent, f'stream_{kind}')(*args)
+        while True:
+            try:
+                chunk = next(chunks)
+            except StopIteration as done:
+                content = done.value
+                break
+            event = {'round': round_number, 'side': side, 'argument_type': kind}
+            if chunk is STREAM_RESTART:
+                yield {'type': 'restart', **event}
+            else:
+                yield {'type': 'chunk', 'text': chunk, **event}
+
+        yield {'type': 'argument', 'round': round_number, 'side': side, 'argument_type': kind, 'content': content}
+        return content
+
+    def _emit_round(self, round_number: int, kind: str, pro_argument: str, against_argument: str,
+                    snapshots: Optional[Dict[str, Dict[str, Any]]] = None) -> Generator[Dict[str, Any], None, None]:
+        self._record_round_latency()
+        yield self._complete_round(round_number, kind, pro_argument, against_argument, snapshots)
+        self._round_started = time.perf_counter()
+
+    def _record_round_latency(self):
+        self.round_latencies.append(time.perf_counter() - self._round_started)
+
+    def _complete_round(self, round_number: int, kind: str, pro_argument: str, against_argument: str,
+                        snapshots: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Mark a round as done and checkpoint it before the result is handed out"""
+        self._next_round = round_number + 1
+        self._previous_argument = against_argument
+        if self.config.checkpoint_path:
+            save_checkpoint(self.checkpoint(snapshots), self.config.checkpoint_path)
+        return {
+            'round': round_number,
+            'type': kind,
+            'pro_argument': pro_argument,
+            'against_argument': against_argument
+        }
 
-        except Exception as error:
-            self.state.status = 'error'
-            self.logger.log_error(
-                prompt="Debate round execution failed",
-                error=error,
-                metadata={"round": self.state.round_number}
-            )
-            raise
+    def _emit_panel_round(self, round_number: int, kind: str,
+                          arguments: Dict[str, str]) -> Generator[Dict[str, Any], None, None]:
+        self._record_round_latency()
+        yield self._complete_panel_round(round_number, kind, arguments)
+        self._round_started = time.perf_counter()
+
+    def _complete_panel_round(self, round_number: int, kind: str, arguments: Dict[str, str]) -> Dict[str, Any]:
+        """Panel counterpart of _complete_round; the result maps agent ids to their arguments"""
+        self._next_round = round_number + 1
+        self._previous_argument = arguments
+        if self.config.checkpoint_path:
+            save_checkpoint(self.checkpoint(), self.config.checkpoint_path)
+        return {
+            'round': round_number,
+            'type': kind,
+            'arguments': arguments
+        }
+
+    @staticmethod
+    def _tagged(round_number: int, fn, *args):
+        # Worker threads do not inherit the caller's call context, so the round is attached here
+        with llm_call_context(round=round_number):
+            return fn(*args)
+
+    def _run_speculative_rebuttals(self, previous: str, first_round: int = 1) -> Generator[Dict[str, Any], None, None]:
+        """
+        Rebuttal rounds with each self-evaluation taken off the critical path.
+        A rebuttal is committed as soon as it is generated and the opponent starts
+        answering it while its evaluation runs in the background. A late regenerate
+        decision is reconciled by config.speculation_policy: 'accept' regenerates the
+        rebuttal but keeps the opponent's reply, 'restart' regenerates it and redoes
+        the opponent's turn against the new version, 'log' only records the evaluation.
+        """
+        turns = [(round_num, side) for round_num in range(first_round, self.config.rounds + 1)
+                 for side in ('pro', 'against')]
+        arguments: Dict[Tuple[int, str], str] = {}
+        pending: Optional[PendingEvaluation] = None
+        index = 0
+
+        with ThreadPoolExecutor(max_workers=3, thread_name_prefix="debate-speculative") as pool:
+            while index < len(turns):
+                round_num, side = turns[index]
+                agent = self.pro_agent if side == 'pro' else self.against_agent
+                self.state.round_number = round_num
+                self.state.current_turn = side
+
+                snapshot = agent.snapshot()
+                prompt, argument_round = agent.prepare_rebuttal(previous)
+                generation = pool.submit(self._tagged, round_num, agent._query, prompt, 'rebuttal')
+
+                if pending is not None:
+                    regenerated = self._reconcile(pending, arguments)
+                    if pending.side == 'against':
+                        # This turn's agent has already moved into the next round; checkpoint it as it was
+                        yield from self._emit_round(
+                            pending.round_number, 'rebuttal',
+                            arguments[(pending.round_number, 'pro')],
+                            arguments[(pending.round_number, 'against')],
+                            {side: snapshot}
+                        )
+                    pending = None
+                    if regenerated is not None and self.config.speculation_policy == 'restart':
+                        # This turn is answering a draft that no longer exists. Its call is
+                        # already running and cannot be stopped: it completes, is billed, and
+                        # its result is thrown away
+                        agent.restore(snapshot)
+                        self.speculation.restarts += 1
+                        self.speculation.discarded_generations += 1
+                        previous = regenerated
+                        continue
+
+                response = generation.result()
+                pending = PendingEvaluation(round_num, side, agent)
+                if response:
+                    agent._record_argument(response, argument_round, 'rebuttal')
+                    if agent.should_evaluate():
+                        pending.evaluation = pool.submit(
+                            self._tagged, round_num, agent._evaluate_argument, response, agent.context
+                        )
+                else:
+                    response = "Failed to generate rebuttal"
+                arguments[(round_num, side)] = response
+                previous = response
+                index += 1
+
+            if pending is not None:
+                self._reconcile(pending, arguments)
+                yield from self._emit_round(
+                    pending.round_number, 'rebuttal',
+                    arguments[(pending.round_number, 'pro')],
+                    arguments[(pending.round_number, 'against')]
+                )
+
+    def _reconcile(self, pending: PendingEvaluation, arguments: Dict[Tuple[int, str], str]) -> Optional[str]:
+        """Apply the speculation policy to a background evaluation; returns the regenerated rebuttal, if any"""
+        if pending.evaluation is None:
+            return None
+        evaluation = pending.evaluation.result()
+        self.speculation.evaluations += 1
+        if not pending.agent.needs_regeneration(evaluation):
+            return None
+
+        self.speculation.below_threshold += 1
+        policy = self.config.speculation_policy
+        score = evaluation.calculate_score()
+        if policy == 'log':
+            self.logger.log_speculation(pending.round_number, pending.side, score, policy, 'kept')
+            return None
+
+        with llm_call_context(round=pending.round_number):
+            regenerated = pending.agent.regenerate_rebuttal(evaluation)
+        arguments[(pending.round_number, pending.side)] = regenerated
+        self.speculation.regenerations += 1
+        self.logger.log_speculation(
+            pending.round_number, pending.side, score, policy,
+            'regenerated_and_restarted' if policy == 'restart' else 'regenerated'
+        )
+        return regenerated
+
+    def get_speculation_stats(self) -> Dict[str, Any]:
+        return {**asdict(self.speculation), 'round_latencies': list(self.round_latencies)}
 
     def get_debate_state(self) -> DebateState:
         return self.state
 
     def conclusion(self) -> Dict[str, Any]:
-        """Generate concluding arguments from both agents"""
+        """Generate concluding arguments from both agents, or every panelist at once"""
         if self.state.status != 'completed':
             raise ValueError("Cannot generate conclusion before debate completion")
+        if self.is_panel:
+            return self._panel_conclusion()
 
         pro_conclusion = self.pro_agent.return_conclusion()
         against_conclusion = self.against_agent.return_conclusion()
@@ -141,9 +546,128 @@ class DebateModeration(DebateFoundation):
             'against_argument': against_conclusion
         }
 
-    def evaluate_round(self, pro_argument: str, against_argument: str) -> Tuple[EvaluationCriteria, EvaluationCriteria]:
-        """Evaluate both arguments from a debate round"""
-        evaluation_prompt = f"""
+    def stream_conclusion(self) -> Generator[Dict[str, Any], None, Dict[str, Any]]:
+        """Streaming counterpart of conclusion; yields events, then the conclusion result"""
+        if self.state.status != 'completed':
+            raise ValueError("Cannot generate conclusion before debate completion")
+        if self.is_panel:
+            result = self._panel_conclusion()
+            for seat, content in result['arguments'].items():
+                yield {'type': 'argument', 'round': self.state.round_number, 'side': seat,
+                       'argument_type': 'conclusion', 'content': content}
+            yield result
+            return result
+
+        pro_conclusion = yield from self._take_turn('pro', self.pro_agent, 'conclusion', True)
+        against_conclusion = yield from self._take_turn('against', self.against_agent, 'conclusion', True)
+
+        result = {
+            'type': 'conclusion',
+            'pro_argument': pro_conclusion,
+            'against_argument': against_conclusion
+        }
+        yield result
+        return result
+
+    def _panel_conclusion(self) -> Dict[str, Any]:
+        with ThreadPoolExecutor(max_workers=len(self.agents), thread_name_prefix="debate-conclusion") as pool:
+            futures = {seat: pool.submit(agent.return_conclusion) for seat, agent in self.agents.items()}
+            return {
+                'type': 'conclusion',
+                'arguments': {seat: future.result() for seat, future in futures.items()}
+            }
+
+    def evaluate_round(self, pro_argument: str, against_argument: str,
+                       round_number: Optional[int] = None) -> Tuple[EvaluationCriteria, EvaluationCriteria]:
+        """Evaluate both arguments from a debate round (the current one unless `round_number` is given)"""
+        with llm_call_context(stage='round_evaluation'):
+            result = request_structured(
+                lambda prompt, response_format: self.query_llm(prompt, response_format=response_format),
+                self._round_evaluation_prompt(pro_argument, against_argument), ROUND_EVALUATION_SCHEMA,
+                self.config.structured_output, self.config.structured_output_repairs
+            )
+        return self._accept_round_evaluation(result, round_number)
+
+    def _accept_round_evaluation(self, result: StructuredResult,
+                                 round_number: Optional[int]) -> Tuple[EvaluationCriteria, EvaluationCriteria]:
+        """
+        The pro and against evaluations of a structured response. An unusable response
+        is logged and rated SATISFACTORY throughout, but kept out of the evaluation store.
+        """
+        if result.ok:
+            pro_eval = EvaluationCriteria.from_ratings(result.value['pro'])
+            against_eval = EvaluationCriteria.from_ratings(result.value['against'])
+            self._record_round_evaluation(
+                self.state.round_number if round_number is None else round_number,
+                {'pro': pro_eval, 'against': against_eval}, 'round'
+            )
+        else:
+            self.logger.log_error(
+                prompt="Failed to parse evaluation response",
+                error=ValueError("; ".join(result.errors)),
+                metadata={"response": result.raw}
+            )
+            pro_eval = against_eval = EvaluationCriteria.from_ratings(
+                dict.fromkeys(CRITERIA, ArgumentQuality.SATISFACTORY.value)
+            )
+        self.evaluations.append((pro_eval, against_eval))
+        return pro_eval, against_eval
+
+    def _batch_evaluator(self) -> BatchEvaluator:
+        return BatchEvaluator(
+            lambda prompt, max_tokens, response_format: self.query_llm(
+                prompt, max_tokens=max_tokens, response_format=response_format
+            ),
+            self.config.model,
+            mode=self.config.structured_output
+        )
+
+    @staticmethod
+    def _round_arguments(round_result: Dict[str, Any]) -> Dict[str, str]:
+        """Arguments of a run_rounds result by seat: 'pro' and 'against', or panel agent ids"""
+        if 'arguments' in round_result:
+            return round_result['arguments']
+        return {'pro': round_result['pro_argument'], 'against': round_result['against_argument']}
+
+    def _batch_items(self, rounds: List[Dict[str, Any]]) -> List[EvaluationItem]:
+        return [
+            EvaluationItem(f"{index}:{seat}", argument)
+            for index, round_result in enumerate(rounds)
+            for seat, argument in self._round_arguments(round_result).items()
+        ]
+
+    def evaluate_rounds(self, rounds: List[Dict[str, Any]]) -> List[Tuple[EvaluationCriteria, ...]]:
+        """
+        Evaluate every argument of many rounds (results yielded by run_rounds)
+        in as few LLM calls as fit the model's context window. Each round gives a
+        tuple in seat order: (pro, against), or one evaluation per panel position.
+
+        This is opt-in, for scoring finished rounds or transcripts: run_rounds never
+        calls it. The per-rebuttal self-evaluation in DebateAgent.return_rebuttal decides
+        whether to regenerate before the opponent replies, so it cannot wait for a batch.
+        """
+        with llm_call_context(stage='batch_evaluation'):
+            results = self._batch_evaluator().evaluate(self._batch_items(rounds))
+        return self._accept_batch_evaluations(rounds, results)
+
+    def _accept_batch_evaluations(self, rounds: List[Dict[str, Any]],
+                                  results: Dict[str, EvaluationCriteria]) -> List[Tuple[EvaluationCriteria, ...]]:
+        evaluations = []
+        for index, round_result in enumerate(rounds):
+            by_seat = {seat: results[f"{index}:{seat}"] for seat in self._round_arguments(round_result)}
+            self._record_round_evaluation(round_result['round'], by_seat, 'batch')
+            evaluations.append(tuple(by_seat.values()))
+        self.evaluations.extend(evaluations)
+        return evaluations
+
+    def _record_round_evaluation(self, round_number: int, evaluations: Dict[str, EvaluationCriteria], source: str):
+        positions = {seat: position for seat, _, position in self._seats()}
+        for seat, evaluation in evaluations.items():
+            self.record_evaluation(evaluation, round_number, seat, positions.get(seat, ""), source)
+
+    @staticmethod
+    def _round_evaluation_prompt(pro_argument: str, against_argument: str) -> str:
+        return f"""
         Evaluate the following debate arguments according to these criteria:
         1. Logical Structure (coherence, evidence quality)
         2. Engagement Quality (relevance, counter-argument strength)
@@ -151,7 +675,9 @@ class DebateModeration(DebateFoundation):
         4. Rhetorical Effectiveness (persuasiveness, clarity)
         5. Debate Ethics (intellectual honesty, fallacy avoidance)
 
-        Rate each criterion from 1 (Poor) to 5 (Excellent).
+        Rate each criterion from 1 (Poor) to 5 (Excellent) for both arguments.
+        Respond with only a JSON object of this form:
+        {_ROUND_EVALUATION_FORMAT}
 
         PRO ARGUMENT:
         {pro_argument}
@@ -160,82 +686,63 @@ class DebateModeration(DebateFoundation):
         {against_argument}
         """
 
-        # Use self instead of creating a new foundation instance
-        eval_response = self.query_llm(evaluation_prompt)
-
-        pro_eval, against_eval = self._parse_evaluation(eval_response)
-        self.evaluations.append((pro_eval, against_eval))
-
-        return pro_eval, against_eval
-
-    def query_llm(self, prompt, context=None):
+    def query_llm(self, prompt, context=None, max_tokens=None, response_format=None):
         """
         Concrete implementation of LLM query method
         Args:
             prompt (str): The prompt to send to the LLM
             context (str, optional): Additional context for the prompt
+            max_tokens (int, optional): Completion limit, defaults to config.max_tokens
+            response_format (dict, optional): Structured output constraint, see structured_output.py
         Returns:
             str: The LLM response
         """
-        # This is a simple example using OpenAI - adjust based on your actual LLM integration
-        try:
-            from openai import OpenAI
-            client = OpenAI()
-
-            full_prompt = prompt
-            if context:
-                full_prompt = f"{context}\n\n{prompt}"
-
-            response = client.chat.completions.create(
-                model="gpt-4",  # or your preferred model
-                messages=[
-                    {"role": "user", "content": full_prompt}
-                ]
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            raise Exception(f"Error querying LLM: {str(e)}")
+        messages, params = self._request(prompt, context, max_tokens, response_format)
+        with self._backend_errors(prompt, context), self._llm_span(messages) as span:
+            response = self.backend.complete(messages, **params)
+            return self._accept_response(span, prompt, messages, response)
+
+    def _request(self, prompt: str, context: Optional[str], max_tokens: Optional[int],
+                 response_format: Optional[Dict[str, Any]]) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+        """Messages and backend parameters of a moderator call, after the hard budget check"""
+        messages = self._build_messages(prompt, context)
+        params = {
+            'model': self.config.model,
+            'temperature': self._sampling_temperature(),
+            'max_tokens': self._prepare_call(messages, max_tokens or self.config.max_tokens),
+            'response_format': response_format
+        }
+        return messages, params
 
-    def _parse_evaluation(self, eval_response: str) -> Tuple[EvaluationCriteria, EvaluationCriteria]:
-        """Parse LLM evaluation response into EvaluationCriteria objects"""
+    @contextmanager
+    def _backend_errors(self, prompt: str, context: Optional[str]):
+        """Log a failed call like stream_llm does and raise it as an LLMBackendError"""
         try:
-            # Expected format: ratings for each criterion (1-5) for both pro and against
-            lines = eval_response.strip().split('\n')
-            pro_ratings = []
-            against_ratings = []
-
-            for line in lines:
-                if ':' not in line:
-                    continue
-                criterion, ratings = line.split(':')
-                pro, against = map(int, ratings.strip().split())
-                pro_ratings.append(ArgumentQuality(pro))
-                against_ratings.append(ArgumentQuality(against))
-
-            # Create EvaluationCriteria objects
-            pro_eval = EvaluationCriteria(*pro_ratings[:10])  # Take first 10 ratings
-            against_eval = EvaluationCriteria(*against_ratings[:10])  # Take first 10 ratings
-
-            return pro_eval, against_eval
-
-        except Exception as error:
-            self.logger.log_error(
-                prompt="Failed to parse evaluation response",
-                error=error,
-                metadata={"response": eval_response}
-            )
-            # Return default evaluations if parsing fails
-            default_rating = ArgumentQuality.SATISFACTORY
-            default_criteria = [default_rating] * 10
-            return (
-                EvaluationCriteria(*default_criteria),
-                EvaluationCriteria(*default_criteria)
-            )
-
-
-
-
-
-
-
-
+            yield
+        except LLMBackendError as e:
+            # Retries already happened in the backend; its errors keep their type and retry_after
+            self._handle_error(prompt, context, e)
+            raise
+        except Exception as e:
+            self._handle_error(prompt, context, e)
+            raise LLMBackendError(f"Error querying LLM: {str(e)}", status_code=getattr(e, "status_code", None)) from e
+
+    def _accept_response(self, span, prompt: str, messages: List[Dict[str, str]],
+                         response: LLMResponse) -> Optional[str]:
+        self._trace_response(span, response)
+        self._record_usage(messages, response)
+        return self._handle_response(prompt, response)
+
+    def _current_round(self) -> int:
+        return self.state.round_number
+
+    def _record_usage(self, messages: List[Dict[str, str]], llm_response: LLMResponse,
+                      tags: Optional[Dict[str, Any]] = None):
+        super()._record_usage(messages, llm_response, tags)
+        self.state.prompt_tokens = self.token_ledger.prompt_tokens
+        self.state.completion_tokens = self.token_ledger.completion_tokens
+        self.state.cost = self.token_ledger.cost
+
+    def get_token_usage(self) -> Dict[str, Any]:
+        """Token and cost totals for the debate, broken down by agent, round and stage"""
+        return self.token_ledger.summary()
@@ -0,0 +1,282 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, fields, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+import argparse
+import asyncio
+import contextvars
+import functools
+import hashlib
+import json
+import threading
+import time
+from AsyncDebateOrchestration import AsyncDebateModeration
+from DebateLogger import DebateLogger, flush_log_writers
+from DebateOrchestration import DebateModeration
+from config import DebateConfig
+from llm_backend import create_backend
+from rate_limiter import RateLimiter
+from resilience import get_resilience_stats
+from evaluation_store import get_evaluation_store
+from structured_output import get_structured_output_stats
+from semantic_cache import get_semantic_cache_stats
+
+
+@dataclass
+class TournamentEntry:
+    debate_id: str
+    config: DebateConfig
+    priority: int = 0  # Higher priorities are scheduled first
+    index: int = 0  # Position in the input file, breaks priority ties
+
+
+def debate_id_for(config: DebateConfig) -> str:
+    """
+    Stable id for a debate configuration, used to resume interrupted tournaments.
+    Every field is hashed, so debates differing in any setting are never taken for one another.
+    """
+    key = json.dumps(asdict(config), sort_keys=True, default=str)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def load_entries(path: str) -> List[TournamentEntry]:
+    """
+    Load debates from a JSONL file of DebateConfig records.
+    Each record may also carry optional `id` and `priority` fields.
+    """
+    config_fields = {f.name for f in fields(DebateConfig)}
+    entries = []
+    with open(path) as f:
+        for index, line in enumerate(f):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            config = DebateConfig(**{k: v for k, v in record.items() if k in config_fields})
+            entries.append(TournamentEntry(
+                debate_id=record.get("id") or debate_id_for(config),
+                config=config,
+                priority=record.get("priority", 0),
+                index=index
+            ))
+    return entries
+
+
+def _with_debate_id(entry: TournamentEntry) -> DebateConfig:
+    # Log entries carry the tournament id so they can be found in the log store
+    return replace(entry.config, debate_id=entry.config.debate_id or entry.debate_id)
+
+
+def _debate_result(debate_id: str, rounds: List[Dict[str, Any]], conclusion: Dict[str, Any],
+                   debate: DebateModeration, started: float) -> Dict[str, Any]:
+    return {
+        "id": debate_id,
+        "status": debate.get_debate_state().status,
+        "rounds": rounds,
+        "conclusion": conclusion,
+        "usage": {key: value for key, value in debate.get_token_usage().items() if key != "by_round"},
+        "duration": time.perf_counter() - started
+    }
+
+
+def run_single_debate(entry: TournamentEntry, limiter: Optional[RateLimiter] = None) -> Dict[str, Any]:
+    """Run one debate synchronously, drawing every LLM call from `limiter`"""
+    started = time.perf_counter()
+    backend = create_backend(entry.config, limiter)
+    debate = DebateModeration(_with_debate_id(entry), backend)
+    rounds = list(debate.run_rounds())
+    return _debate_result(entry.debate_id, rounds, debate.conclusion(), debate, started)
+
+
+async def arun_single_debate(entry: TournamentEntry, limiter: Optional[RateLimiter] = None) -> Dict[str, Any]:
+    """Async counterpart of run_single_debate"""
+    started = time.perf_counter()
+    backend = create_backend(entry.config, limiter)
+    debate = await AsyncDebateModeration.create(_with_debate_id(entry), backend)
+    rounds = [round_result async for round_result in debate.arun_rounds()]
+    return _debate_result(entry.debate_id, rounds, await debate.aconclusion(), debate, started)
+
+
+async def _to_thread(fn, *args):
+    # asyncio.to_thread without its Python 3.9 requirement; the copied context carries call tags
+    call = functools.partial(contextvars.copy_context().run, fn, *args)
+    return await asyncio.get_running_loop().run_in_executor(None, call)
+
+
+# Per-process limiter for process pools; each worker gets an equal share of the global budget
+_process_limiter: Optional[RateLimiter] = None
+
+
+def _init_process_worker(requests_per_minute: Optional[float], tokens_per_minute: Optional[float]):
+    global _process_limiter
+    if requests_per_minute or tokens_per_minute:
+        _process_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+
+
+def _run_in_process(entry: TournamentEntry) -> Dict[str, Any]:
+    try:
+        return run_single_debate(entry, _process_limiter)
+    finally:
+        # Pool workers exit without running atexit hooks, so drain the log queue per debate
+        flush_log_writers()
+
+
+class DebateTournament:
+    """
+    Batch runner scheduling many debates across a bounded worker pool.
+    Debates run in priority order under a global requests/tokens-per-minute
+    budget; finished debates are appended to `results_path` so an
+    interrupted tournament resumes where it stopped.
+    """
+
+    MODES = ("thread", "process", "async")
+
+    def __init__(self, entries: List[TournamentEntry], results_path: str = "tournament_results.ndjson",
+                 workers: int = 4, mode: str = "thread",
+                 requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown worker mode: {mode}")
+        self.entries = entries
+        self.results_path = Path(results_path)
+        self.workers = workers
+        self.mode = mode
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.limiter = RateLimiter(requests_per_minute, tokens_per_minute) \
+            if requests_per_minute or tokens_per_minute else None
+        self.logger = DebateLogger()
+        self.completed = 0
+        self.failed = 0
+        self._results_lock = threading.Lock()
+
+    def completed_ids(self) -> Set[str]:
+        """Ids of debates already recorded as completed in the results file"""
+        if not self.results_path.exists():
+            return set()
+        done = set()
+        with open(self.results_path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A partially written final line from an interrupted run
+                    continue
+                if record.get("status") == "completed":
+                    done.add(record["id"])
+        return done
+
+    def pending(self) -> List[TournamentEntry]:
+        done = self.completed_ids()
+        remaining = [entry for entry in self.entries if entry.debate_id not in done]
+        return sorted(remaining, key=lambda entry: (-entry.priority, entry.index))
+
+    def _record(self, result: Dict[str, Any]):
+        with self._results_lock:
+            with open(self.results_path, "a") as f:
+                f.write(json.dumps(result, default=str) + "\n")
+            if result.get("status") == "completed":
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    def _record_failure(self, entry: TournamentEntry, error: Exception):
+        self.logger.log_error(
+            prompt="Tournament debate failed",
+            error=error,
+            metadata={"debate_id": entry.debate_id, "topic": entry.config.topic}
+        )
+        self._record({"id": entry.debate_id, "status": "error", "error": str(error)})
+
+    def _run_pool(self, pending: List[TournamentEntry]):
+        if self.mode == "process":
+            share = max(1, self.workers)
+            executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_process_worker,
+                initargs=(
+                    self.requests_per_minute / share if self.requests_per_minute else None,
+                    self.tokens_per_minute / share if self.tokens_per_minute else None
+                )
+            )
+            submit = lambda entry: executor.submit(_run_in_process, entry)
+        else:
+            executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="debate")
+            submit = lambda entry: executor.submit(run_single_debate, entry, self.limiter)
+
+        with executor:
+            # Submit in priority order; the bounded pool starts them in that order
+            futures = {submit(entry): entry for entry in pending}
+            for future in as_completed(futures):
+                entry = futures[future]
+                try:
+                    self._record(future.result())
+                except Exception as error:
+                    self._record_failure(entry, error)
+
+    async def _run_async(self, pending: List[TournamentEntry]):
+        queue: asyncio.Queue = asyncio.Queue()
+        for entry in pending:
+            queue.put_nowait(entry)
+
+        async def worker():
+            while not queue.empty():
+                entry = queue.get_nowait()
+                # Results, log and index writes block on disk, so they run off the event loop
+                try:
+                    await _to_thread(self._record, await arun_single_debate(entry, self.limiter))
+                except Exception as error:
+                    await _to_thread(self._record_failure, entry, error)
+
+        await asyncio.gather(*[worker() for _ in range(self.workers)])
+
+    def run(self) -> Dict[str, Any]:
+        """Run every pending debate and return a summary"""
+        pending = self.pending()
+        started = time.perf_counter()
+        if self.mode == "async":
+            asyncio.run(self._run_async(pending))
+        else:
+            self._run_pool(pending)
+        elapsed = time.perf_counter() - started
+        store = get_evaluation_store()
+
+        summary = {
+            "scheduled": len(pending),
+            "skipped": len(self.entries) - len(pending),
+            "completed": self.completed,
+            "failed": self.failed,
+            "elapsed": elapsed,
+            "debates_per_minute": self.completed * 60.0 / elapsed if elapsed > 0 else 0.0,
+            "rate_limiter": self.limiter.get_stats() if self.limiter else None,
+            # Process pools keep their own guards and stores, so these cover thread and async modes
+            "resilience": get_resilience_stats(),
+            "evaluations": store.summary() if store is not None else None,
+            "structured_output": get_structured_output_stats(),
+            "semantic_cache": get_semantic_cache_stats()
+        }
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a batch of debates from a JSONL file of DebateConfig records")
+    parser.add_argument("debates", help="JSONL file with one DebateConfig record per line")
+    parser.add_argument("--results", default="tournament_results.ndjson", help="Results file, also used to resume")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--mode", choices=DebateTournament.MODES, default="thread")
+    parser.add_argument("--rpm", type=float, default=None, help="Global requests-per-minute budget")
+    parser.add_argument("--tpm", type=float, default=None, help="Global tokens-per-minute budget")
+    args = parser.parse_args()
+
+    tournament = DebateTournament(
+        load_entries(args.debates),
+        results_path=args.results,
+        workers=args.workers,
+        mode=args.mode,
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm
+    )
+    print(json.dumps(tournament.run(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
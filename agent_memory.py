@@ -0,0 +1,121 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import re
+from llm_backend import estimate_tokens
+from semantic_cache import HashedNgramEmbedder, np
+
+
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|\n\s*\n')
+# Chunks this similar to one already retrieved add nothing to the prompt
+_DUPLICATE_SIMILARITY = 0.95
+
+# Document key -> (text, source, round number)
+MemoryDocuments = Dict[str, Tuple[str, str, Optional[int]]]
+
+
+@dataclass
+class MemoryChunk:
+    text: str
+    source: str  # 'context' (research), 'own' or 'opponent' (earlier arguments)
+    round_number: Optional[int]
+    tokens: int
+
+
+def _split_words(text: str, max_tokens: int) -> List[str]:
+    pieces, words, size = [], [], 0
+    for word in text.split():
+        if words and size + len(word) + 1 > max_tokens * 4:
+            pieces.append(" ".join(words))
+            words, size = [], 0
+        words.append(word)
+        size += len(word) + 1
+    if words:
+        pieces.append(" ".join(words))
+    return pieces
+
+
+def chunk_text(text: Optional[str], max_tokens: int) -> List[str]:
+    """Split text at sentence and paragraph boundaries into pieces of about max_tokens at most"""
+    pieces: List[str] = []
+    sentences: List[str] = []
+    size = 0
+    for sentence in _SENTENCE_BOUNDARY.split(text or ""):
+        sentence = " ".join(sentence.split())
+        if not sentence:
+            continue
+        tokens = estimate_tokens(sentence)
+        if sentences and size + tokens > max_tokens:
+            pieces.append(" ".join(sentences))
+            sentences, size = [], 0
+        if tokens > max_tokens:
+            pieces.extend(_split_words(sentence, max_tokens))
+            continue
+        sentences.append(sentence)
+        size += tokens
+    if sentences:
+        pieces.append(" ".join(sentences))
+    return pieces
+
+
+class AgentMemory:
+    """
+    In-process retrieval index over an agent's research context and earlier arguments.
+    Documents are chunked and embedded (hashed n-gram vectors) once; each argument
+    prompt then carries only the chunks most similar to the argument being answered,
+    up to a token budget, instead of the whole context.
+    """
+
+    def __init__(self, chunk_tokens: int = 100, dim: int = 512):
+        if np is None:
+            raise ImportError("AgentMemory requires the 'numpy' package")
+        self.chunk_tokens = chunk_tokens
+        self.embedder = HashedNgramEmbedder(dim)
+        self._documents: Dict[str, Tuple[str, List[MemoryChunk], "np.ndarray"]] = {}
+        self._chunks: List[MemoryChunk] = []
+        self._vectors: Optional["np.ndarray"] = None
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def sync(self, documents: MemoryDocuments):
+        """
+        Index exactly these documents. Unchanged documents keep their chunks, so only
+        new or edited ones (a regenerated rebuttal, a rolled back turn) are embedded.
+        """
+        changed = False
+        for key in [key for key in self._documents if key not in documents]:
+            del self._documents[key]
+            changed = True
+        for key, (text, source, round_number) in documents.items():
+            indexed = self._documents.get(key)
+            if indexed is not None and indexed[0] == text:
+                continue
+            chunks = [MemoryChunk(piece, source, round_number, estimate_tokens(piece))
+                      for piece in chunk_text(text, self.chunk_tokens)]
+            vectors = np.zeros((len(chunks), self.embedder.dim), dtype=np.float32)
+            for row, chunk in enumerate(chunks):
+                vectors[row] = self.embedder.embed(chunk.text)
+            self._documents[key] = (text, chunks, vectors)
+            changed = True
+        if changed:
+            self._chunks = [chunk for _, chunks, _ in self._documents.values() for chunk in chunks]
+            self._vectors = np.concatenate([vectors for _, _, vectors in self._documents.values()]) if self._chunks else None
+
+    def retrieve(self, query: str, top_k: int, token_budget: int) -> List[MemoryChunk]:
+        """The top_k chunks most similar to query that fit token_budget, in document order"""
+        if self._vectors is None or top_k <= 0:
+            return []
+        scores = self._vectors @ self.embedder.embed(query)
+        selected: List[int] = []
+        used = 0
+        for row in np.argsort(-scores, kind="stable"):
+            if scores[row] <= 0 or len(selected) == top_k:
+                break
+            chunk = self._chunks[row]
+            if used + chunk.tokens > token_budget:
+                continue
+            if selected and float(np.max(self._vectors[selected] @ self._vectors[row])) > _DUPLICATE_SIMILARITY:
+                continue
+            selected.append(int(row))
+            used += chunk.tokens
+        return [self._chunks[row] for row in sorted(selected)]
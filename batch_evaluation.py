@@ -0,0 +1,360 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+import argparse
+import asyncio
+import contextvars
+import json
+import threading
+from debate_evaluation import ArgumentQuality, CRITERIA, EvaluationCriteria
+from llm_backend import LLMBackend, estimate_tokens, truncate_to_tokens
+from structured_output import BATCH_EVALUATION_SCHEMA, arequest_structured, extract_json, request_structured
+
+
+# Context window sizes in tokens; unknown models fall back to DEFAULT_CONTEXT_WINDOW
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-4": 8192,
+    "gpt-4-32k": 32768,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+    "gpt-3.5-turbo": 16385,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# A prompt, the completion length to request for it and a response_format (see structured_output)
+BatchQuery = Callable[[str, int, Optional[Dict[str, Any]]], Optional[str]]
+AsyncBatchQuery = Callable[[str, int, Optional[Dict[str, Any]]], Awaitable[Optional[str]]]
+
+
+@dataclass
+class EvaluationItem:
+    item_id: str
+    argument: str
+    context: Optional[str] = None
+
+
+@dataclass
+class BatchStats:
+    requests: int = 0
+    items: int = 0
+    retried_items: int = 0  # Items missing from a response and sent again
+    defaulted_items: int = 0  # Items that still had no usable ratings and got SATISFACTORY
+
+    @property
+    def items_per_request(self) -> float:
+        return self.items / self.requests if self.requests else 0.0
+
+
+def default_evaluation() -> EvaluationCriteria:
+    return EvaluationCriteria(*[ArgumentQuality.SATISFACTORY] * len(CRITERIA))
+
+
+class BatchEvaluator:
+    """
+    Scores many arguments per LLM call. Items are packed greedily into batches
+    sized to the model's context window, each batch is one structured output
+    request (BATCH_EVALUATION_SCHEMA, in `mode`) for a rating object per argument
+    id, and the response is demultiplexed back into EvaluationCriteria. Items
+    missing from a response, or rated outside 1-5, are retried once.
+    """
+
+    def __init__(self, query: Optional[BatchQuery], model: str = "gpt-4",
+                 aquery: Optional[AsyncBatchQuery] = None,
+                 context_window: Optional[int] = None,
+                 max_output_tokens: int = 4096,
+                 output_tokens_per_item: int = 120,
+                 max_batch_size: int = 50,
+                 concurrency: int = 4,
+                 mode: str = "json_schema"):
+        BATCH_EVALUATION_SCHEMA.response_format(mode)
+        self.query = query
+        self.mode = mode
+        self.aquery = aquery
+        self.model = model
+        self.context_window = context_window or MODEL_CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+        self.max_output_tokens = max_output_tokens
+        self.output_tokens_per_item = output_tokens_per_item
+        self.max_batch_size = max_batch_size
+        self.concurrency = concurrency
+        self.stats = BatchStats()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _header() -> str:
+        criteria = "\n".join(f"- {name}" for name in CRITERIA)
+        example = ", ".join(f'"{name}": 4' for name in CRITERIA)
+        return f"""Evaluate each debate argument below and rate every criterion from 1 (POOR) to 5 (EXCELLENT):
+{criteria}
+
+Return one JSON evaluation per argument, as a single JSON object of the form:
+{{"evaluations": [{{"id": "<argument id>", {example}}}]}}
+Use the id given in each argument's header. Return only the JSON object.
+"""
+
+    @staticmethod
+    def _item_block(item: EvaluationItem) -> str:
+        context = f"Context: {item.context}\n" if item.context else ""
+        return f"\n### ARGUMENT id={item.item_id}\n{context}{item.argument}\n"
+
+    def _batch_prompt(self, items: List[EvaluationItem]) -> str:
+        return self._header() + "".join(self._item_block(item) for item in items)
+
+    def _capacity(self) -> int:
+        """Prompt tokens left for argument blocks in an otherwise empty batch"""
+        return self.context_window - estimate_tokens(self._header()) - self.output_tokens_per_item
+
+    def _fit(self, item: EvaluationItem) -> EvaluationItem:
+        # An argument too long to share a batch with anything is truncated to fit on its own
+        capacity = self._capacity()
+        if estimate_tokens(self._item_block(item)) <= capacity:
+            return item
+        overhead = estimate_tokens(self._item_block(EvaluationItem(item.item_id, "", item.context)))
+        if overhead >= capacity:
+            item = EvaluationItem(item.item_id, item.argument)
+            overhead = estimate_tokens(self._item_block(item))
+        return EvaluationItem(item.item_id, truncate_to_tokens(item.argument, max(1, capacity - overhead)), item.context)
+
+    def plan_batches(self, items: Iterable[EvaluationItem]) -> List[List[EvaluationItem]]:
+        """Greedily pack items so each batch's prompt plus expected output fits the context window"""
+        max_items = max(1, min(self.max_batch_size, self.max_output_tokens // self.output_tokens_per_item))
+        budget = self.context_window - estimate_tokens(self._header())
+        batches: List[List[EvaluationItem]] = []
+        batch: List[EvaluationItem] = []
+        used = 0
+        for item in items:
+            item = self._fit(item)
+            cost = estimate_tokens(self._item_block(item)) + self.output_tokens_per_item
+            if batch and (len(batch) >= max_items or used + cost > budget):
+                batches.append(batch)
+                batch, used = [], 0
+            batch.append(item)
+            used += cost
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _completion_tokens(self, batch: List[EvaluationItem]) -> int:
+        return min(self.max_output_tokens, self.output_tokens_per_item * len(batch))
+
+    @staticmethod
+    def parse_response(response: Optional[str]) -> Dict[str, EvaluationCriteria]:
+        """
+        Demultiplex a batch response into {item id: EvaluationCriteria}, skipping malformed
+        entries; a cut-off response keeps the entries that were complete
+        """
+        data, _ = extract_json(response)
+        return BatchEvaluator._parse_entries(data)
+
+    @staticmethod
+    def _parse_entries(data: Any) -> Dict[str, EvaluationCriteria]:
+        # An entry with a missing or invalid rating is left out, so its item counts as missing
+        entries = data.get("evaluations", []) if isinstance(data, dict) else data
+        results = {}
+        for entry in entries if isinstance(entries, list) else []:
+            try:
+                results[str(entry["id"])] = EvaluationCriteria.from_ratings(entry)
+            except (KeyError, TypeError, ValueError):
+                continue
+        return results
+
+    def _record(self, requests: int, items: int = 0, retried: int = 0, defaulted: int = 0):
+        with self._lock:
+            self.stats.requests += requests
+            self.stats.items += items
+            self.stats.retried_items += retried
+            self.stats.defaulted_items += defaulted
+
+    def _request(self, batch: List[EvaluationItem]) -> Dict[str, EvaluationCriteria]:
+        max_tokens = self._completion_tokens(batch)
+        # Missing items are retried by the caller, so the structured request itself makes no repairs
+        result = request_structured(
+            lambda prompt, response_format: self.query(prompt, max_tokens, response_format),
+            self._batch_prompt(batch), BATCH_EVALUATION_SCHEMA, self.mode, max_repairs=0
+        )
+        return self._parse_entries(result.value)
+
+    async def _arequest(self, batch: List[EvaluationItem]) -> Dict[str, EvaluationCriteria]:
+        max_tokens = self._completion_tokens(batch)
+        result = await arequest_structured(
+            lambda prompt, response_format: self.aquery(prompt, max_tokens, response_format),
+            self._batch_prompt(batch), BATCH_EVALUATION_SCHEMA, self.mode, max_repairs=0
+        )
+        return self._parse_entries(result.value)
+
+    def _run_batch(self, batch: List[EvaluationItem]) -> Dict[str, EvaluationCriteria]:
+        results = self._request(batch)
+        self._record(requests=1, items=len(batch))
+        missing = [item for item in batch if item.item_id not in results]
+        if missing:
+            results.update(self._request(missing))
+            self._record(requests=1, retried=len(missing))
+        return self._fill_defaults(batch, results)
+
+    async def _arun_batch(self, batch: List[EvaluationItem]) -> Dict[str, EvaluationCriteria]:
+        results = await self._arequest(batch)
+        self._record(requests=1, items=len(batch))
+        missing = [item for item in batch if item.item_id not in results]
+        if missing:
+            results.update(await self._arequest(missing))
+            self._record(requests=1, retried=len(missing))
+        return self._fill_defaults(batch, results)
+
+    def _fill_defaults(self, batch: List[EvaluationItem],
+                       results: Dict[str, EvaluationCriteria]) -> Dict[str, EvaluationCriteria]:
+        defaulted = 0
+        for item in batch:
+            if item.item_id not in results:
+                results[item.item_id] = default_evaluation()
+                defaulted += 1
+        if defaulted:
+            self._record(requests=0, defaulted=defaulted)
+        return {item.item_id: results[item.item_id] for item in batch}
+
+    def evaluate(self, items: Iterable[EvaluationItem]) -> Dict[str, EvaluationCriteria]:
+        """Evaluate every item, running up to `concurrency` batches at once"""
+        batches = self.plan_batches(items)
+        if not batches:
+            return {}
+        results: Dict[str, EvaluationCriteria] = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(self.concurrency, len(batches))),
+                                thread_name_prefix="debate-batch-eval") as pool:
+            futures = [pool.submit(contextvars.copy_context().run, self._run_batch, batch) for batch in batches]
+            for future in futures:
+                results.update(future.result())
+        return results
+
+    async def aevaluate(self, items: Iterable[EvaluationItem]) -> Dict[str, EvaluationCriteria]:
+        """Async counterpart of evaluate"""
+        semaphore = asyncio.Semaphore(max(1, self.concurrency))
+
+        async def run(batch: List[EvaluationItem]) -> Dict[str, EvaluationCriteria]:
+            async with semaphore:
+                return await self._arun_batch(batch)
+
+        results: Dict[str, EvaluationCriteria] = {}
+        for batch_results in await asyncio.gather(*[run(batch) for batch in self.plan_batches(items)]):
+            results.update(batch_results)
+        return results
+
+    def write_batch_file(self, items: Iterable[EvaluationItem], path: str) -> int:
+        """
+        Write an OpenAI Batch API input file (one chat completion request per batch)
+        for offline evaluation; returns the number of requests written.
+        Read the job's output file back with read_batch_output.
+        """
+        batches = self.plan_batches(items)
+        with open(path, "w") as f:
+            for index, batch in enumerate(batches):
+                f.write(json.dumps({
+                    "custom_id": f"evaluation-batch-{index}",
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {
+                        "model": self.model,
+                        "messages": [{"role": "user", "content": self._batch_prompt(batch)}],
+                        "max_tokens": self._completion_tokens(batch),
+                        "temperature": 0,
+                        **self._response_format_field()
+                    }
+                }) + "\n")
+        return len(batches)
+
+    def _response_format_field(self) -> Dict[str, Any]:
+        response_format = BATCH_EVALUATION_SCHEMA.response_format(self.mode)
+        return {"response_format": response_format} if response_format else {}
+
+    def read_batch_output(self, path: str) -> Dict[str, EvaluationCriteria]:
+        """Demultiplex a Batch API output file into {item id: EvaluationCriteria}"""
+        results: Dict[str, EvaluationCriteria] = {}
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                body = (record.get("response") or {}).get("body") or {}
+                for choice in body.get("choices", []):
+                    results.update(self.parse_response(choice.get("message", {}).get("content")))
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            data = asdict(self.stats)
+            data["items_per_request"] = self.stats.items_per_request
+        return data
+
+
+def backend_query(backend: LLMBackend, model: str) -> BatchQuery:
+    """BatchQuery calling a backend directly, for evaluating outside any one debate"""
+    def query(prompt: str, max_tokens: int, response_format: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        return backend.complete([{"role": "user", "content": prompt}], model, 0, max_tokens, response_format).content
+    return query
+
+
+def _load_tournament_items(path: str) -> List[EvaluationItem]:
+    """Every argument of every completed debate in a tournament results file"""
+    items = []
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("status") != "completed":
+                continue
+            for round_result in record.get("rounds", []):
+                # Panel debates key their arguments by agent id
+                arguments = round_result.get("arguments") or {
+                    side: round_result[f"{side}_argument"] for side in ("pro", "against")
+                }
+                for side, argument in arguments.items():
+                    items.append(EvaluationItem(
+                        item_id=f"{record['id']}:{round_result['round']}:{side}",
+                        argument=argument
+                    ))
+    return items
+
+
+def _evaluations_to_json(results: Dict[str, EvaluationCriteria]) -> Dict[str, Any]:
+    return {
+        item_id: {"score": evaluation.calculate_score(),
+                  **{name: getattr(evaluation, name).value for name in CRITERIA}}
+        for item_id, evaluation in results.items()
+    }
+
+
+def main():
+    from config import DebateConfig
+    from llm_backend import create_backend
+
+    parser = argparse.ArgumentParser(description="Batch-evaluate the arguments in a tournament results file")
+    parser.add_argument("results", help="Tournament results NDJSON file, or a Batch API output file with --collect")
+    parser.add_argument("--model", default="gpt-4")
+    parser.add_argument("--backend", default=None, help="LLM backend for online evaluation")
+    parser.add_argument("--batch-file", default=None,
+                        help="Write a Batch API input file here instead of evaluating online")
+    parser.add_argument("--collect", action="store_true", help="Read a Batch API output file and print its evaluations")
+    args = parser.parse_args()
+
+    if args.collect:
+        evaluator = BatchEvaluator(None, args.model)
+        print(json.dumps(_evaluations_to_json(evaluator.read_batch_output(args.results)), indent=2))
+        return
+
+    items = _load_tournament_items(args.results)
+    if args.batch_file:
+        evaluator = BatchEvaluator(None, args.model)
+        requests = evaluator.write_batch_file(items, args.batch_file)
+        print(f"Wrote {requests} requests for {len(items)} arguments to {args.batch_file}")
+        return
+
+    options = {"backend": args.backend} if args.backend else {}
+    config = DebateConfig(topic="", pro_position="", against_position="", agent1_id="", agent2_id="",
+                          model=args.model, **options)
+    evaluator = BatchEvaluator(backend_query(create_backend(config), args.model), args.model)
+    results = evaluator.evaluate(items)
+    print(json.dumps({"evaluations": _evaluations_to_json(results), "stats": evaluator.get_stats()}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Prompt tokens per debate versus DebateConfig.rounds for the 'full',
+'incremental' and 'retrieval' context modes, run against the simulated backend.
+
+    python benchmarks/bench_context_summary.py --max-rounds 10
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import argparse
+import json
+import logging
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from DebateOrchestration import DebateModeration  # noqa: E402
+from config import DebateConfig  # noqa: E402
+from llm_backend import LLMBackend, LLMResponse, SimulatedBackend  # noqa: E402
+
+
+class CountingBackend(LLMBackend):
+    """Records prompt tokens for every call, split by summarization vs other calls"""
+
+    def __init__(self, backend: LLMBackend):
+        self.backend = backend
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.summary_calls = 0
+        self.summary_prompt_tokens = 0
+
+    def complete(self, messages: List[Dict[str, str]], model: str,
+                 temperature: Optional[float] = None,
+                 max_tokens: Optional[int] = None,
+                 response_format: Optional[Dict[str, Any]] = None) -> LLMResponse:
+        response = self.backend.complete(messages, model, temperature, max_tokens, response_format)
+        self.calls += 1
+        self.prompt_tokens += response.prompt_tokens
+        prompt = messages[-1]["content"] or ""
+        if "Summarize the key points" in prompt or "Update the running summary" in prompt:
+            self.summary_calls += 1
+            self.summary_prompt_tokens += response.prompt_tokens
+        return response
+
+
+def run(rounds: int, mode: str, budget: Optional[int], response_tokens: int) -> Dict[str, int]:
+    config = DebateConfig(
+        topic="Should population control be part of world governments sustainability policy?",
+        pro_position="Yes, population control should be part of world governments sustainability policy.",
+        against_position="No, population control should not be part of world governments sustainability policy.",
+        agent1_id="pro",
+        agent2_id="against",
+        rounds=rounds,
+        backend="simulated",
+        context_mode=mode,
+        context_token_budget=budget
+    )
+    backend = CountingBackend(SimulatedBackend(response_tokens=response_tokens))
+    debate = DebateModeration(config, backend)
+    for _ in debate.run_rounds():
+        pass
+    debate.conclusion()
+    return {
+        "rounds": rounds,
+        "mode": mode,
+        "calls": backend.calls,
+        "prompt_tokens": backend.prompt_tokens,
+        "summary_calls": backend.summary_calls,
+        "summary_prompt_tokens": backend.summary_prompt_tokens
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--max-rounds", type=int, default=10)
+    parser.add_argument("--budget", type=int, default=800, help="context_token_budget for incremental and retrieval modes")
+    parser.add_argument("--response-tokens", type=int, default=300)
+    parser.add_argument("--json", action="store_true", help="Emit JSON lines instead of a table")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    print(f"{'rounds':>6} {'full tokens':>12} {'incr tokens':>12} {'retr tokens':>12} "
+          f"{'full summ':>10} {'incr summ':>10} {'incr saving':>12} {'retr saving':>12}")
+    for rounds in range(1, args.max_rounds + 1):
+        full = run(rounds, "full", None, args.response_tokens)
+        incremental = run(rounds, "incremental", args.budget, args.response_tokens)
+        retrieval = run(rounds, "retrieval", args.budget, args.response_tokens)
+        if args.json:
+            print(json.dumps(full))
+            print(json.dumps(incremental))
+            print(json.dumps(retrieval))
+            continue
+        incremental_saving = 1 - incremental["prompt_tokens"] / full["prompt_tokens"]
+        retrieval_saving = 1 - retrieval["prompt_tokens"] / full["prompt_tokens"]
+        print(f"{rounds:>6} {full['prompt_tokens']:>12} {incremental['prompt_tokens']:>12} {retrieval['prompt_tokens']:>12} "
+              f"{full['summary_prompt_tokens']:>10} {incremental['summary_prompt_tokens']:>10} "
+              f"{incremental_saving:>11.0%} {retrieval_saving:>11.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Log bytes written per debate with and without prompt deduplication. The
+prompts and responses of simulated debates are replayed through
+DebateLogger.log_query, as if every LLM call were logged.
+
+    python benchmarks/bench_log_dedup.py --debates 5 --rounds 3
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import json
+import logging
+import sys
+import tempfile
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from DebateLogger import DebateLogger, configure_log_writer  # noqa: E402
+from DebateOrchestration import DebateModeration  # noqa: E402
+from config import DebateConfig  # noqa: E402
+from llm_backend import LLMBackend, LLMResponse, SimulatedBackend  # noqa: E402
+from log_store import read_ndjson  # noqa: E402
+
+
+class RecordingBackend(LLMBackend):
+    """Keeps every (prompt, response) pair sent through it"""
+
+    def __init__(self, backend: LLMBackend):
+        self.backend = backend
+        self.calls: List[Tuple[str, str]] = []
+
+    def complete(self, messages: List[Dict[str, str]], model: str,
+                 temperature: Optional[float] = None,
+                 max_tokens: Optional[int] = None,
+                 response_format: Optional[Dict[str, Any]] = None) -> LLMResponse:
+        response = self.backend.complete(messages, model, temperature, max_tokens, response_format)
+        self.calls.append((messages[-1]["content"], response.content))
+        return response
+
+
+def record_debates(debates: int, rounds: int) -> List[Tuple[str, List[Tuple[str, str]]]]:
+    recorded = []
+    for index in range(debates):
+        config = DebateConfig(
+            topic="Should population control be part of world governments sustainability policy?",
+            pro_position="Yes, population control should be part of world governments sustainability policy.",
+            against_position="No, population control should not be part of world governments sustainability policy.",
+            agent1_id="pro",
+            agent2_id="against",
+            rounds=rounds,
+            backend="simulated"
+        )
+        backend = RecordingBackend(SimulatedBackend(seed=index))
+        debate = DebateModeration(config, backend)
+        for _ in debate.run_rounds():
+            pass
+        debate.conclusion()
+        recorded.append((debate.debate_id, backend.calls))
+    return recorded
+
+
+def replay(directory: Path, name: str, dedup: bool,
+           recorded: List[Tuple[str, List[Tuple[str, str]]]]) -> Dict[str, int]:
+    path = directory / f"{name}.ndjson"
+    writer = configure_log_writer(str(path), dedup_prompts=dedup, durability="immediate")
+    for debate_id, calls in recorded:
+        logger = DebateLogger(str(path), debate_id=debate_id)
+        for prompt, response in calls:
+            logger.log_query(prompt, response, {"model": "gpt-4"})
+    stats = writer.get_stats()
+    writer.close()
+
+    # Every prompt must come back intact
+    restored = [entry["prompt"] for entry in read_ndjson(str(path))]
+    expected = [prompt for _, calls in recorded for prompt, _ in calls]
+    assert restored == expected, "prompt reconstruction mismatch"
+
+    blob_file = directory / f"{name}.blobs.sqlite"
+    return {
+        "log_bytes": path.stat().st_size,
+        "blob_bytes": stats.get("blob_bytes_stored", 0),
+        "blob_file_bytes": blob_file.stat().st_size if dedup and blob_file.exists() else 0,
+        "entries": stats["written"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--debates", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="Emit JSON instead of a table")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    recorded = record_debates(args.debates, args.rounds)
+    with tempfile.TemporaryDirectory() as tmp:
+        before = replay(Path(tmp), "plain", False, recorded)
+        after = replay(Path(tmp), "dedup", True, recorded)
+
+    per_debate_before = before["log_bytes"] / args.debates
+    per_debate_after = (after["log_bytes"] + after["blob_bytes"]) / args.debates
+    result = {
+        "debates": args.debates,
+        "rounds": args.rounds,
+        "entries": before["entries"],
+        "bytes_per_debate_before": per_debate_before,
+        "bytes_per_debate_after": per_debate_after,
+        "log_bytes_after": after["log_bytes"],
+        "blob_bytes_after": after["blob_bytes"],
+        "blob_file_bytes_after": after["blob_file_bytes"],
+        "reduction": 1 - per_debate_after / per_debate_before
+    }
+    if args.json:
+        print(json.dumps(result))
+        return
+    print(f"{'':>24} {'bytes/debate':>14}")
+    print(f"{'plain NDJSON':>24} {per_debate_before:>14,.0f}")
+    print(f"{'deduplicated (+blobs)':>24} {per_debate_after:>14,.0f}")
+    print(f"{'reduction':>24} {result['reduction']:>14.0%}")
+    print(f"blob payload {after['blob_bytes']:,} bytes, SQLite file {after['blob_file_bytes']:,} bytes")
+
+
+if __name__ == "__main__":
+    main()
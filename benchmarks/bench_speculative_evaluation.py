@@ -0,0 +1,95 @@
+"""
+End-to-end rebuttal round latency with inline self-evaluation versus background
+evaluation under each speculation policy, run against the simulated backend.
+
+    python benchmarks/bench_speculative_evaluation.py --rounds 4 --latency 0.3
+"""
+from pathlib import Path
+from statistics import mean
+from typing import Any, Dict, Optional
+import argparse
+import json
+import logging
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from DebateOrchestration import DebateModeration  # noqa: E402
+from config import DebateConfig  # noqa: E402
+from llm_backend import SimulatedBackend  # noqa: E402
+
+
+VARIANTS = [
+    ("inline", None),
+    ("background", "accept"),
+    ("background", "restart"),
+    ("background", "log"),
+]
+
+
+def run(mode: str, policy: Optional[str], rounds: int, latency: float, min_rating: int,
+        seed: int) -> Dict[str, Any]:
+    config = DebateConfig(
+        topic="Should population control be part of world governments sustainability policy?",
+        pro_position="Yes, population control should be part of world governments sustainability policy.",
+        against_position="No, population control should not be part of world governments sustainability policy.",
+        agent1_id="pro",
+        agent2_id="against",
+        rounds=rounds,
+        backend="simulated",
+        evaluation_mode=mode,
+        speculation_policy=policy or "accept"
+    )
+    backend = SimulatedBackend(latency_mean=latency, min_rating=min_rating, seed=seed)
+    debate = DebateModeration(config, backend)
+    started = time.perf_counter()
+    for _ in debate.run_rounds():
+        pass
+    elapsed = time.perf_counter() - started
+
+    stats = debate.get_speculation_stats()
+    rebuttal_latencies = stats.pop("round_latencies")[1:]
+    # Counted from the ledger so inline regenerations show up too
+    stats["regenerations"] = debate.get_token_usage()["by_stage"].get("regeneration", {}).get("calls", 0)
+    return {
+        "mode": mode,
+        "policy": policy,
+        "rounds": rounds,
+        "calls": backend.calls,
+        "mean_round_latency": mean(rebuttal_latencies) if rebuttal_latencies else 0.0,
+        "max_round_latency": max(rebuttal_latencies, default=0.0),
+        "elapsed": elapsed,
+        **stats
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.3, help="Simulated seconds per LLM call")
+    parser.add_argument("--min-rating", type=int, default=2,
+                        help="Lowest simulated rating; lower values trigger more regenerations")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Emit JSON lines instead of a table")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    if not args.json:
+        print(f"{'variant':>18} {'mean round s':>13} {'max round s':>12} {'calls':>6} "
+              f"{'regens':>7} {'restarts':>9} {'vs inline':>10}")
+    baseline = None
+    for mode, policy in VARIANTS:
+        result = run(mode, policy, args.rounds, args.latency, args.min_rating, args.seed)
+        if args.json:
+            print(json.dumps(result))
+            continue
+        baseline = baseline or result["mean_round_latency"]
+        label = mode if policy is None else f"{mode}/{policy}"
+        change = result["mean_round_latency"] / baseline - 1 if baseline else 0.0
+        print(f"{label:>18} {result['mean_round_latency']:>13.2f} {result['max_round_latency']:>12.2f} "
+              f"{result['calls']:>6} {result['regenerations']:>7} {result['restarts']:>9} {change:>+9.0%}")
+
+
+if __name__ == "__main__":
+    main()
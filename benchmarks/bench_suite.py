@@ -0,0 +1,275 @@
+"""
+End-to-end benchmark suite for the debate orchestration layer, run against the
+simulated backend. Measures LLM calls and prompt bytes per debate versus
+DebateConfig.rounds, debates/second versus concurrency, memory per active
+debate and logger throughput, and writes everything to a JSON file. With
+--baseline, the deterministic metrics (calls, prompt bytes) are compared to an
+earlier results file and the run fails if any grew beyond --tolerance.
+
+    python benchmarks/bench_suite.py --output bench_results.json
+    python benchmarks/bench_suite.py --baseline bench_results.json --quick
+"""
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from statistics import mean
+from typing import Any, Dict, List, Optional
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from DebateLogger import DebateLogger, configure_log_writer  # noqa: E402
+from DebateOrchestration import DebateModeration  # noqa: E402
+from config import DebateConfig  # noqa: E402
+from llm_backend import LLMBackend, LLMResponse, SimulatedBackend  # noqa: E402
+
+
+# Metrics compared against a baseline; all are deterministic for a given seed
+REGRESSION_METRICS = ("calls_per_debate", "prompt_bytes_per_debate", "prompt_bytes_per_call", "max_prompt_bytes")
+
+
+class MeasuringBackend(LLMBackend):
+    """Counts calls and prompt bytes sent through it"""
+
+    def __init__(self, backend: LLMBackend):
+        self.backend = backend
+        self.calls = 0
+        self.prompt_bytes = 0
+        self.max_prompt_bytes = 0
+        self._lock = threading.Lock()
+
+    def complete(self, messages: List[Dict[str, str]], model: str,
+                 temperature: Optional[float] = None,
+                 max_tokens: Optional[int] = None,
+                 response_format: Optional[Dict[str, Any]] = None) -> LLMResponse:
+        size = sum(len((m.get("content") or "").encode("utf-8")) for m in messages)
+        with self._lock:
+            self.calls += 1
+            self.prompt_bytes += size
+            self.max_prompt_bytes = max(self.max_prompt_bytes, size)
+        return self.backend.complete(messages, model, temperature, max_tokens, response_format)
+
+
+def debate_config(rounds: int) -> DebateConfig:
+    return DebateConfig(
+        topic="Should population control be part of world governments sustainability policy?",
+        pro_position="Yes, population control should be part of world governments sustainability policy.",
+        against_position="No, population control should not be part of world governments sustainability policy.",
+        agent1_id="pro",
+        agent2_id="against",
+        rounds=rounds,
+        backend="simulated"
+    )
+
+
+def run_debate(rounds: int, backend: LLMBackend) -> DebateModeration:
+    debate = DebateModeration(debate_config(rounds), backend)
+    for _ in debate.run_rounds():
+        pass
+    debate.conclusion()
+    return debate
+
+
+def profile_rounds(rounds_values: List[int], response_tokens: int, seed: int) -> Dict[str, Dict[str, Any]]:
+    """Calls and prompt sizes of one debate per rounds value, with zero latency"""
+    results = {}
+    for rounds in rounds_values:
+        backend = MeasuringBackend(SimulatedBackend(response_tokens=response_tokens, seed=seed))
+        debate = run_debate(rounds, backend)
+        usage = debate.get_token_usage()
+        results[str(rounds)] = {
+            "calls_per_debate": backend.calls,
+            "prompt_bytes_per_debate": backend.prompt_bytes,
+            "prompt_bytes_per_call": round(backend.prompt_bytes / backend.calls, 1),
+            "max_prompt_bytes": backend.max_prompt_bytes,
+            "prompt_tokens_per_debate": usage["prompt_tokens"],
+            "completion_tokens_per_debate": usage["completion_tokens"],
+            "calls_by_stage": {stage: group["calls"] for stage, group in usage["by_stage"].items()}
+        }
+    return results
+
+
+def throughput(concurrency_values: List[int], debates: int, rounds: int, latency: float,
+               response_tokens: int, seed: int) -> Dict[str, Dict[str, float]]:
+    """Debates/second with `debates` debates spread over each number of worker threads"""
+    results = {}
+    for concurrency in concurrency_values:
+        durations: List[float] = []
+
+        def one(index: int):
+            started = time.perf_counter()
+            run_debate(rounds, SimulatedBackend(latency_mean=latency, response_tokens=response_tokens,
+                                                seed=seed + index))
+            durations.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(one, range(debates)))
+        elapsed = time.perf_counter() - started
+        results[str(concurrency)] = {
+            "debates_per_second": debates / elapsed,
+            "mean_debate_seconds": mean(durations),
+            "elapsed": elapsed
+        }
+    return results
+
+
+def memory_per_debate(concurrency: int, rounds: int, latency: float, response_tokens: int,
+                      seed: int) -> Dict[str, float]:
+    """Peak traced memory while `concurrency` debates run at once, divided among them"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        debates = list(pool.map(
+            lambda index: run_debate(rounds, SimulatedBackend(latency_mean=latency, response_tokens=response_tokens,
+                                                              seed=seed + index)),
+            range(concurrency)
+        ))
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "concurrency": concurrency,
+        "peak_bytes_per_active_debate": (peak - before) / concurrency,
+        "retained_bytes_per_finished_debate": (current - before) / len(debates)
+    }
+
+
+def logger_throughput(entries: int, threads: int, prompt_bytes: int, directory: Path) -> Dict[str, Dict[str, float]]:
+    """Entries/second through DebateLogger.log_query from several threads, with and without prompt dedup"""
+    prompt = ("Shared framework text for every prompt. " * (prompt_bytes // 80 + 1))[:prompt_bytes // 2]
+    results = {}
+    for dedup in (False, True):
+        path = directory / f"bench-{'dedup' if dedup else 'plain'}.ndjson"
+        writer = configure_log_writer(str(path), dedup_prompts=dedup, max_file_size=1 << 40)
+        per_thread = entries // threads
+
+        def write(thread: int):
+            logger = DebateLogger(str(path), debate_id=f"bench-{thread}")
+            for index in range(per_thread):
+                logger.log_query(f"{prompt}\nTurn {thread}-{index}: " + "x" * (prompt_bytes // 2), "response",
+                                 {"model": "gpt-4", "round": index})
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(write, range(threads)))
+        writer.flush()
+        elapsed = time.perf_counter() - started
+        stats = writer.get_stats()
+        writer.close()
+        results["dedup" if dedup else "plain"] = {
+            "entries_per_second": per_thread * threads / elapsed,
+            "written": stats["written"],
+            "dropped": stats["dropped"],
+            "bytes_on_disk": path.stat().st_size + stats.get("blob_bytes_stored", 0)
+        }
+    return results
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=Path(__file__).resolve().parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Deterministic metrics that grew more than `tolerance` over the baseline"""
+    regressions = []
+    for rounds, metrics in results["rounds"].items():
+        previous = baseline.get("rounds", {}).get(rounds)
+        if previous is None:
+            continue
+        for name in REGRESSION_METRICS:
+            old, new = previous.get(name), metrics[name]
+            if old and new > old * (1 + tolerance):
+                regressions.append(f"rounds={rounds} {name}: {old} -> {new} (+{new / old - 1:.1%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", default="1,3,5,8", help="Comma-separated rounds values to profile")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated worker counts")
+    parser.add_argument("--debates", type=int, default=16, help="Debates per concurrency level")
+    parser.add_argument("--throughput-rounds", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.01, help="Simulated seconds per LLM call")
+    parser.add_argument("--response-tokens", type=int, default=200)
+    parser.add_argument("--log-entries", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--quick", action="store_true", help="Smaller run for CI")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="Earlier results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.05, help="Allowed relative growth over the baseline")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    if args.quick:
+        args.concurrency, args.debates, args.log_entries = "1,8", 8, 4000
+    rounds_values = [int(value) for value in args.rounds.split(",")]
+    concurrency_values = [int(value) for value in args.concurrency.split(",")]
+    output = Path(args.output).resolve()
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Debate loggers write relative to the working directory; keep that out of the repo
+        previous_cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            results = {
+                "environment": environment(),
+                "parameters": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+                "rounds": profile_rounds(rounds_values, args.response_tokens, args.seed),
+                "concurrency": throughput(concurrency_values, args.debates, args.throughput_rounds, args.latency,
+                                          args.response_tokens, args.seed),
+                "memory": memory_per_debate(max(concurrency_values), args.throughput_rounds, args.latency,
+                                            args.response_tokens, args.seed),
+                "logger": logger_throughput(args.log_entries, 4, 2048, Path(tmp))
+            }
+        finally:
+            os.chdir(previous_cwd)
+
+    output.write_text(json.dumps(results, indent=2))
+
+    print(f"{'rounds':>6} {'calls':>6} {'prompt KB':>10} {'bytes/call':>11} {'max bytes':>10}")
+    for rounds, metrics in results["rounds"].items():
+        print(f"{rounds:>6} {metrics['calls_per_debate']:>6} {metrics['prompt_bytes_per_debate'] / 1024:>10.1f} "
+              f"{metrics['prompt_bytes_per_call']:>11.0f} {metrics['max_prompt_bytes']:>10}")
+    print(f"\n{'workers':>7} {'debates/s':>10} {'mean debate s':>14}")
+    for concurrency, metrics in results["concurrency"].items():
+        print(f"{concurrency:>7} {metrics['debates_per_second']:>10.2f} {metrics['mean_debate_seconds']:>14.2f}")
+    memory = results["memory"]
+    print(f"\nmemory: {memory['peak_bytes_per_active_debate'] / 1024:.0f} KB peak per active debate "
+          f"({memory['concurrency']} at once), {memory['retained_bytes_per_finished_debate'] / 1024:.0f} KB retained")
+    for mode, metrics in results["logger"].items():
+        print(f"logger ({mode}): {metrics['entries_per_second']:,.0f} entries/s, {metrics['bytes_on_disk']:,} bytes")
+    print(f"\nresults written to {output}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\nREGRESSIONS over baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("no regressions over baseline")
+
+
+if __name__ == "__main__":
+    main()
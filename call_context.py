@@ -0,0 +1,21 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict
+
+
+# Tags describing the LLM call in progress (agent_id, stage, ...); copied into asyncio tasks automatically
+_call_context: ContextVar[Dict[str, Any]] = ContextVar("llm_call_context", default={})
+
+
+@contextmanager
+def llm_call_context(**tags):
+    """Tag every LLM call made inside the block, nesting over any outer tags"""
+    token = _call_context.set({**_call_context.get(), **tags})
+    try:
+        yield
+    finally:
+        _call_context.reset(token)
+
+
+def current_call_context() -> Dict[str, Any]:
+    return _call_context.get()
@@ -1,21 +1,52 @@
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
 import os
 
 
 @dataclass
 class DebateConfig:
     topic: str
-    pro_position: str
-    against_position: str
-    agent1_id: str
-    agent2_id: str
+    pro_position: str = ""
+    against_position: str = ""
+    agent1_id: str = "pro"
+    agent2_id: str = "against"
+    positions: List[str] = field(default_factory=list)  # Panel debate with one agent per position, replacing pro/against
+    agent_ids: List[str] = field(default_factory=list)  # Panel agent ids, defaults to agent1, agent2, ...
+    turn_order: str = "parallel"  # Panel turns: 'parallel' answers the previous round at once, 'sequential' in turn
     rounds: int = 3
     model: str = "gpt-4"
     temperature: float = 0.7
-    max_retries: int = 3
-    retry_delay: int = 1
+    max_retries: int = 3  # Retries of a failed LLM call, with jittered exponential backoff
+    retry_delay: float = 1  # Seconds before the first retry; doubles per attempt
+    retry_max_delay: float = 30.0
+    circuit_breaker_threshold: int = 5  # Consecutive failures, across all debates, that pause calls to the provider
+    circuit_breaker_reset: float = 30.0  # Seconds the circuit stays open before a probe call
+    hedge_percentile: Optional[float] = None  # e.g. 0.95 sends a duplicate request for calls slower than p95
+    requests_per_minute: Optional[float] = None  # Process-wide rate limit shared by every debate
+    tokens_per_minute: Optional[float] = None
     max_tokens: int = 4000
+    backend: str = field(default_factory=lambda: os.getenv("DEBATE_LLM_BACKEND", "openai"))  # 'openai' or 'simulated'
+    backend_options: Dict[str, Any] = field(default_factory=dict)
+    context_mode: str = "full"  # 'full' re-summarizes all history, 'incremental' folds in only new arguments, 'retrieval' picks relevant chunks
+    context_token_budget: Optional[int] = None  # Cap on the CONTEXT block of argument prompts
+    retrieval_top_k: int = 8  # Chunks of context and earlier arguments per argument prompt in 'retrieval' mode
+    token_budget: Optional[int] = None  # Hard per-debate token budget; the debate aborts when reached
+    soft_token_budget: Optional[int] = None  # Past this, context is truncated and optional evaluation skipped
+    cost_budget: Optional[float] = None  # Hard per-debate budget in USD
+    cache_mode: str = "off"  # 'off', 'deterministic' (temperature 0 only) or 'always'
+    cache_path: Optional[str] = None  # SQLite file for the on-disk cache tier
+    cache_ttl: Optional[float] = None  # Seconds before a cached response expires
+    semantic_cache: bool = False  # Reuse context gathering and fact checks for near-duplicate positions and claims
+    semantic_cache_path: Optional[str] = None  # JSON lines file the semantic cache persists to
+    semantic_cache_threshold: float = 0.85  # Cosine similarity of hashed n-gram vectors that counts as a hit
+    evaluation_mode: str = "inline"  # 'inline' blocks each rebuttal on its evaluation, 'background' overlaps it with the next turn
+    speculation_policy: str = "accept"  # Late regenerate decisions in background mode: 'accept', 'restart' or 'log'
+    structured_output: str = "json_schema"  # Evaluations and fact checks: 'json_schema', 'json_object' or 'off' (prompt only)
+    structured_output_repairs: int = 1  # Follow-up calls allowed to fix an invalid structured response
+    debate_id: Optional[str] = None  # Stamped on log entries; a random id is used when unset
+    fact_check_concurrency: int = 4  # Claims verified at once by fact_check
+    max_fact_check_claims: int = 8  # Claims beyond this are not checked
+    checkpoint_path: Optional[str] = None  # Rewritten after every round; continue with DebateModeration.resume
 
     @staticmethod
     def get_default_persona() -> str:
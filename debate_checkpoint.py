@@ -0,0 +1,100 @@
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+import gzip
+import json
+import os
+from DebateAgent import Argument, DebateAgent
+from debate_evaluation import EvaluationCriteria
+from token_accounting import UsageRecord
+
+
+CHECKPOINT_VERSION = 1
+
+
+@dataclass
+class DebateCheckpoint:
+    """Everything needed to continue a debate after its last completed round"""
+    debate_id: str
+    config: Dict[str, Any]  # DebateConfig fields
+    state: Dict[str, Any]  # DebateState fields
+    next_round: int  # First round still to run; 0 means the openings
+    previous_argument: Optional[Union[str, Dict[str, str]]]  # Against's last argument, or a panel's last round by agent id
+    agents: Dict[str, Dict[str, Any]]  # 'pro' / 'against' (or panel agent id) -> serialized agent snapshot
+    usage: List[Dict[str, Any]] = field(default_factory=list)  # Token ledger records so budgets carry over
+    evaluations: List[Tuple[Dict[str, int], ...]] = field(default_factory=list)  # Per round, in seat order
+    speculation: Dict[str, int] = field(default_factory=dict)
+    version: int = CHECKPOINT_VERSION
+
+    def rounds(self) -> List[Dict[str, Any]]:
+        """The completed round results, rebuilt from the agents' argument histories"""
+        histories = {seat: agent['argument_history'] for seat, agent in self.agents.items()}
+        completed = min(self.next_round, *(len(history) for history in histories.values()))
+        rounds = []
+        for index in range(completed):
+            arguments = {seat: history[index]['content'] for seat, history in histories.items()}
+            result = {'round': index, 'type': 'opening' if index == 0 else 'rebuttal'}
+            if self.config.get('positions'):
+                result['arguments'] = arguments
+            else:
+                result.update(pro_argument=arguments['pro'], against_argument=arguments['against'])
+            rounds.append(result)
+        return rounds
+
+    def to_bytes(self) -> bytes:
+        return gzip.compress(json.dumps(asdict(self), separators=(",", ":")).encode("utf-8"))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "DebateCheckpoint":
+        payload = json.loads(gzip.decompress(data).decode("utf-8"))
+        if payload.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version: {payload.get('version')}")
+        return cls(**payload)
+
+
+def dump_agent(agent: DebateAgent, snapshot: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Serialize an agent's snapshot (or the given one, taken earlier) to plain JSON types"""
+    snapshot = snapshot or agent.snapshot()
+    return {
+        **snapshot,
+        'argument_history': [asdict(arg) for arg in snapshot['argument_history']],
+        'opponent_arguments': [asdict(arg) for arg in snapshot['opponent_arguments']]
+    }
+
+
+def load_agent(agent: DebateAgent, data: Dict[str, Any]):
+    """Restore a freshly built agent from dump_agent output"""
+    agent.restore({
+        **data,
+        'argument_history': [Argument(**arg) for arg in data['argument_history']],
+        'opponent_arguments': [Argument(**arg) for arg in data['opponent_arguments']]
+    })
+
+
+def dump_usage(records: List[UsageRecord]) -> List[Dict[str, Any]]:
+    return [asdict(record) for record in records]
+
+
+def load_usage(data: List[Dict[str, Any]]) -> List[UsageRecord]:
+    return [UsageRecord(**record) for record in data]
+
+
+def dump_evaluation(evaluation: EvaluationCriteria) -> Dict[str, int]:
+    return evaluation.to_ratings()
+
+
+def save_checkpoint(checkpoint: DebateCheckpoint, path: str):
+    """Write atomically, so a crash mid-write leaves the previous checkpoint intact"""
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temporary = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    with open(temporary, "wb") as f:
+        f.write(checkpoint.to_bytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, target)
+
+
+def load_checkpoint(path: str) -> DebateCheckpoint:
+    with open(path, "rb") as f:
+        return DebateCheckpoint.from_bytes(f.read())
@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from typing import List, Dict
+from dataclasses import dataclass, fields
+from typing import Any, List, Dict
 from enum import Enum
 
 
@@ -11,6 +11,13 @@ class ArgumentQuality(Enum):
     POOR = 1
 
 
+def _whole_rating(rating: Any) -> int:
+    number = float(rating)
+    if not number.is_integer():
+        raise ValueError(f"Rating is not a whole number: {rating!r}")
+    return int(number)
+
+
 @dataclass
 class EvaluationCriteria:
     # Logical Structure
@@ -46,4 +53,19 @@ class EvaluationCriteria:
             self.intellectual_honesty,
             self.fallacy_avoidance
         ])
-        return total / 10  # Average score out of 5
\ No newline at end of file
+        return total / 10  # Average score out of 5
+
+    @classmethod
+    def from_ratings(cls, ratings: Dict[str, Any]) -> "EvaluationCriteria":
+        """
+        Build from a {criterion: 1-5} mapping; raises KeyError, TypeError or ValueError on
+        missing, non-numeric, fractional or out of range ratings rather than guessing at them
+        """
+        return cls(**{name: ArgumentQuality(_whole_rating(ratings[name])) for name in CRITERIA})
+
+    def to_ratings(self) -> Dict[str, int]:
+        """{criterion: 1-5} mapping, the inverse of from_ratings"""
+        return {name: getattr(self, name).value for name in CRITERIA}
+
+
+CRITERIA = tuple(f.name for f in fields(EvaluationCriteria))
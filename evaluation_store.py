@@ -0,0 +1,325 @@
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import csv
+import json
+import threading
+from debate_evaluation import CRITERIA, EvaluationCriteria
+
+try:
+    import numpy as np
+except ImportError:  # Evaluations are then not collected; see get_evaluation_store
+    np = None
+
+
+SOURCES = ('round', 'batch', 'self')  # evaluate_round, evaluate_rounds, an agent's self-evaluation
+GROUP_KEYS = ('debate', 'round', 'side', 'position', 'source')
+
+
+class _Codes:
+    """Interns labels such as debate ids and positions as small integer codes"""
+
+    def __init__(self):
+        self.labels: List[str] = []
+        self._index: Dict[str, int] = {}
+
+    def code(self, label: str) -> int:
+        index = self._index.get(label)
+        if index is None:
+            index = self._index[label] = len(self.labels)
+            self.labels.append(label)
+        return index
+
+    def get(self, label: str) -> int:
+        return self._index.get(label, -1)
+
+
+class EvaluationStore:
+    """
+    Columnar store of evaluations: a ratings matrix with one contiguous column
+    per criterion, plus debate, round, side, position and source index columns.
+    Scores, aggregates and rankings are computed over whole columns at once.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        if np is None:
+            raise ImportError("EvaluationStore requires the 'numpy' package")
+        self._size = 0
+        self._ratings = np.zeros((capacity, len(CRITERIA)), dtype=np.uint8, order="F")
+        self._columns = {key: np.zeros(capacity, dtype=np.int32) for key in GROUP_KEYS}
+        self._codes = {key: _Codes() for key in GROUP_KEYS if key != 'round'}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _reserve(self, rows: int):
+        capacity = len(self._ratings)
+        if self._size + rows <= capacity:
+            return
+        capacity = max(capacity * 2, self._size + rows)
+        ratings = np.zeros((capacity, len(CRITERIA)), dtype=np.uint8, order="F")
+        ratings[:self._size] = self._ratings[:self._size]
+        self._ratings = ratings
+        for key, column in self._columns.items():
+            grown = np.zeros(capacity, dtype=np.int32)
+            grown[:self._size] = column[:self._size]
+            self._columns[key] = grown
+
+    def add(self, evaluation: EvaluationCriteria, debate_id: str, round_number: int, side: str,
+            position: str = "", source: str = 'round') -> int:
+        """Append one evaluation; returns its row"""
+        return self.add_ratings([evaluation.to_ratings()], [debate_id], [round_number], [side], [position], source)
+
+    def add_ratings(self, ratings: Sequence[Any], debate_ids: Sequence[str], rounds: Sequence[int],
+                    sides: Sequence[str], positions: Optional[Sequence[str]] = None, source: str = 'round') -> int:
+        """
+        Bulk append; returns the first new row
+        Args:
+            ratings: {criterion: 1-5} mappings, or an (n, criteria) array in CRITERIA order
+        """
+        if source not in SOURCES:
+            raise ValueError(f"Unknown evaluation source: {source}")
+        if len(ratings) and isinstance(ratings[0], dict):
+            ratings = [[row[name] for name in CRITERIA] for row in ratings]
+        matrix = np.clip(np.asarray(ratings, dtype=np.int64).reshape(-1, len(CRITERIA)), 1, 5)
+        rows = len(matrix)
+        positions = positions if positions is not None else [""] * rows
+        with self._lock:
+            self._reserve(rows)
+            start, end = self._size, self._size + rows
+            self._ratings[start:end] = matrix
+            self._columns['round'][start:end] = rounds
+            for key, labels in (('debate', debate_ids), ('side', sides), ('position', positions),
+                                ('source', [source] * rows)):
+                codes = self._codes[key]
+                self._columns[key][start:end] = [codes.code(label) for label in labels]
+            self._size = end
+        return start
+
+    @property
+    def ratings(self) -> "np.ndarray":
+        """(rows, criteria) view of the ratings, columns in CRITERIA order"""
+        return self._ratings[:self._size]
+
+    def column(self, name: str) -> "np.ndarray":
+        """One criterion's ratings, or an index column ('debate', 'round', ...) as codes"""
+        if name in self._columns:
+            return self._columns[name][:self._size]
+        return self._ratings[:self._size, CRITERIA.index(name)]
+
+    def labels(self, key: str) -> "np.ndarray":
+        """An index column decoded to its labels"""
+        if key == 'round':
+            return self.column('round')
+        return np.asarray(self._codes[key].labels, dtype=object)[self.column(key)]
+
+    def mask(self, debate_id: Optional[str] = None, round_number: Optional[int] = None,
+             side: Optional[str] = None, position: Optional[str] = None,
+             source: Optional[str] = None) -> "np.ndarray":
+        """Boolean row filter; unknown labels match nothing"""
+        selected = np.ones(self._size, dtype=bool)
+        for key, label in (('debate', debate_id), ('side', side), ('position', position), ('source', source)):
+            if label is not None:
+                selected &= self.column(key) == self._codes[key].get(label)
+        if round_number is not None:
+            selected &= self.column('round') == round_number
+        return selected
+
+    @staticmethod
+    def _weights(weights: Optional[Dict[str, float]]) -> "np.ndarray":
+        if weights is None:
+            return np.full(len(CRITERIA), 1.0 / len(CRITERIA))
+        unknown = set(weights) - set(CRITERIA)
+        if unknown:
+            raise ValueError(f"Unknown criteria: {sorted(unknown)}")
+        vector = np.array([weights.get(name, 0.0) for name in CRITERIA], dtype=np.float64)
+        if vector.sum() <= 0:
+            raise ValueError("Criterion weights must sum to a positive number")
+        return vector / vector.sum()
+
+    def scores(self, weights: Optional[Dict[str, float]] = None,
+               mask: Optional["np.ndarray"] = None) -> "np.ndarray":
+        """Weighted mean rating per row, out of 5; equal weights match EvaluationCriteria.calculate_score"""
+        ratings = self.ratings if mask is None else self.ratings[mask]
+        return ratings @ self._weights(weights)
+
+    def aggregates(self, by: Optional[str] = 'side', weights: Optional[Dict[str, float]] = None,
+                   mask: Optional["np.ndarray"] = None) -> Dict[Any, Dict[str, Any]]:
+        """
+        Count, mean score and per-criterion mean / std / min / max for each group
+        Args:
+            by (str, optional): Index column to group on, or None for one overall group
+        """
+        selected = np.ones(self._size, dtype=bool) if mask is None else mask
+        if by is None:
+            codes, names = np.zeros(int(selected.sum()), dtype=np.int64), ["all"]
+        else:
+            codes, names = self.column(by)[selected], self._codes[by].labels if by != 'round' else None
+        groups, inverse = np.unique(codes, return_inverse=True)
+        if not len(groups):
+            return {}
+
+        # Sort rows by group once, then reduce each contiguous run of a group
+        order = np.argsort(inverse, kind="stable")
+        ratings = self.ratings[selected][order].astype(np.float64)
+        count = np.bincount(inverse, minlength=len(groups))
+        starts = np.concatenate(([0], np.cumsum(count)[:-1]))
+        means = np.add.reduceat(ratings, starts) / count[:, None]
+        stds = np.sqrt(np.maximum(np.add.reduceat(ratings ** 2, starts) / count[:, None] - means ** 2, 0.0))
+        minimums = np.minimum.reduceat(ratings, starts)
+        maximums = np.maximum.reduceat(ratings, starts)
+        mean_scores = means @ self._weights(weights)
+
+        return {
+            (names[group] if names is not None else int(group)): {
+                "count": int(count[index]),
+                "score": float(mean_scores[index]),
+                "criteria": {
+                    name: {"mean": float(means[index, j]), "std": float(stds[index, j]),
+                           "min": int(minimums[index, j]), "max": int(maximums[index, j])}
+                    for j, name in enumerate(CRITERIA)
+                }
+            }
+            for index, group in enumerate(groups.tolist())
+        }
+
+    def matches(self, by: str = 'position', source: Optional[str] = None,
+                weights: Optional[Dict[str, float]] = None) -> Tuple[List[str], "np.ndarray", "np.ndarray", "np.ndarray"]:
+        """
+        Pairwise results between arguments evaluated in the same debate, round and source:
+        the higher-scoring side wins. Returns (players, first, second, outcome) where
+        outcome is 1, 0.5 or 0 from the first player's point of view, in insertion order.
+        """
+        selected = self.mask(source=source)
+        rows = np.flatnonzero(selected)
+        scores = self.scores(weights, selected)
+        players = self.column(by)[rows]
+        keys = np.stack([self.column(key)[rows] for key in ('debate', 'round', 'source')], axis=1)
+        _, group = np.unique(keys, axis=0, return_inverse=True)
+        group = group.reshape(-1)
+
+        order = np.lexsort((np.arange(len(rows)), group))
+        first, second = [], []
+        for offset in range(1, len(order)):
+            left, right = order[:-offset], order[offset:]
+            same = group[left] == group[right]
+            if not same.any():
+                break
+            first.append(left[same])
+            second.append(right[same])
+        if not first:
+            empty = np.zeros(0, dtype=np.int64)
+            return [], empty, empty, np.zeros(0)
+        first, second = np.concatenate(first), np.concatenate(second)
+        distinct = players[first] != players[second]
+        first, second = first[distinct], second[distinct]
+        chronological = np.argsort(np.maximum(first, second), kind="stable")
+        first, second = first[chronological], second[chronological]
+        outcome = np.where(scores[first] > scores[second], 1.0, np.where(scores[first] < scores[second], 0.0, 0.5))
+
+        labels = self._codes[by].labels if by != 'round' else None
+        codes, compact = np.unique(np.concatenate([players[first], players[second]]), return_inverse=True)
+        names = [labels[code] if labels is not None else str(code) for code in codes]
+        return names, compact[:len(first)], compact[len(first):], outcome
+
+    def elo(self, by: str = 'position', source: Optional[str] = None, k: float = 16.0,
+            initial: float = 1500.0, weights: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+        """Elo ratings from the pairwise matches, applied in the order evaluations were added"""
+        names, first, second, outcome = self.matches(by, source, weights)
+        ratings = np.full(len(names), initial)
+        for a, b, result in zip(first.tolist(), second.tolist(), outcome.tolist()):
+            expected = 1.0 / (1.0 + 10 ** ((ratings[b] - ratings[a]) / 400.0))
+            delta = k * (result - expected)
+            ratings[a] += delta
+            ratings[b] -= delta
+        return dict(sorted(zip(names, ratings.tolist()), key=lambda item: -item[1]))
+
+    def bradley_terry(self, by: str = 'position', source: Optional[str] = None, iterations: int = 200,
+                      tolerance: float = 1e-9, weights: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+        """
+        Bradley-Terry strengths (summing to 1) fitted to the pairwise matches with the
+        MM algorithm; ties count half a win each way and every player gets half a
+        pseudo-win against each opponent so unbeaten players stay finite
+        """
+        names, first, second, outcome = self.matches(by, source, weights)
+        players = len(names)
+        if players == 0:
+            return {}
+        wins = np.zeros((players, players))
+        np.add.at(wins, (first, second), outcome)
+        np.add.at(wins, (second, first), 1.0 - outcome)
+        games = wins + wins.T
+        wins += 0.5 * (games > 0)
+        games = wins + wins.T
+        total_wins = wins.sum(axis=1)
+        strength = np.full(players, 1.0 / players)
+        for _ in range(iterations):
+            pair = strength[:, None] + strength[None, :]
+            updated = total_wins / np.maximum((games / pair).sum(axis=1), 1e-12)
+            updated /= updated.sum()
+            converged = np.abs(updated - strength).max() < tolerance
+            strength = updated
+            if converged:
+                break
+        return dict(sorted(zip(names, strength.tolist()), key=lambda item: -item[1]))
+
+    def to_columns(self, weights: Optional[Dict[str, float]] = None) -> Dict[str, "np.ndarray"]:
+        """Decoded index columns, one column per criterion and the score, e.g. for pandas.DataFrame"""
+        columns: Dict[str, "np.ndarray"] = {key: self.labels(key) for key in GROUP_KEYS}
+        for j, name in enumerate(CRITERIA):
+            columns[name] = self.ratings[:, j]
+        columns['score'] = self.scores(weights)
+        return columns
+
+    def export(self, path: str, weights: Optional[Dict[str, float]] = None) -> int:
+        """Write every row as .csv, .ndjson or .npz (chosen by suffix); returns the row count"""
+        target = Path(path)
+        columns = self.to_columns(weights)
+        if target.suffix == ".npz":
+            np.savez_compressed(target, **{key: (column.astype(str) if column.dtype == object else column)
+                                           for key, column in columns.items()})
+            return self._size
+        names = list(columns)
+        rows = zip(*(column.tolist() for column in columns.values()))
+        with open(target, "w", newline="", encoding="utf-8") as f:
+            if target.suffix == ".csv":
+                writer = csv.writer(f)
+                writer.writerow(names)
+                writer.writerows(rows)
+            elif target.suffix in (".ndjson", ".jsonl"):
+                for row in rows:
+                    f.write(json.dumps(dict(zip(names, row))) + "\n")
+            else:
+                raise ValueError(f"Unsupported export format: {target.suffix}")
+        return self._size
+
+    def summary(self) -> Dict[str, Any]:
+        """Row count, mean score per source and position rankings; used in tournament summaries"""
+        if not self._size:
+            return {"evaluations": 0}
+        return {
+            "evaluations": self._size,
+            "score_by_source": {source: group["score"] for source, group in self.aggregates(by='source').items()},
+            "elo_by_position": self.elo(),
+            "bradley_terry_by_position": self.bradley_terry()
+        }
+
+    def reset(self):
+        with self._lock:
+            self._size = 0
+            self._codes = {key: _Codes() for key in GROUP_KEYS if key != 'round'}
+
+
+_store: Optional[EvaluationStore] = None
+_store_lock = threading.Lock()
+
+
+def get_evaluation_store() -> Optional[EvaluationStore]:
+    """Process-wide store every debate records its evaluations into; None when numpy is not installed"""
+    global _store
+    if np is None:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = EvaluationStore()
+        return _store
@@ -0,0 +1,443 @@
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple, Union
+import asyncio
+import contextvars
+import functools
+import json
+import random
+import re
+import threading
+import time
+
+
+@dataclass
+class LLMResponse:
+    content: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency: float = 0.0
+    cached: bool = False
+    cached_prompt_tokens: int = 0  # Prompt tokens the provider served from its prefix cache
+
+
+class LLMBackendError(Exception):
+    """Raised by a backend when a completion request fails"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after  # Seconds the provider asked callers to wait, if it said
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Rough token estimate (~4 characters per token) for offline accounting"""
+    if not text:
+        return 0
+    return max(1, len(text) // 4)
+
+
+def truncate_to_tokens(text: Optional[str], max_tokens: int) -> Optional[str]:
+    """Trim text to roughly max_tokens using the same ~4 characters per token estimate"""
+    if not text or estimate_tokens(text) <= max_tokens:
+        return text
+    return text[:max_tokens * 4].rsplit(" ", 1)[0] + " ..."
+
+
+def _cached_prompt_tokens(usage) -> int:
+    details = getattr(usage, "prompt_tokens_details", None) if usage else None
+    return getattr(details, "cached_tokens", 0) or 0
+
+
+class LLMBackend:
+    """Interface every LLM call in the debate pipeline goes through"""
+
+    name = "base"
+
+    def complete(self, messages: List[Dict[str, str]], model: str,
+                 temperature: Optional[float] = None,
+                 max_tokens: Optional[int] = None,
+                 response_format: Optional[Dict[str, Any]] = None) -> LLMResponse:
+        raise NotImplementedError
+
+    async def acomplete(self, messages: List[Dict[str, str]], model: str,
+                        temperature: Optional[float] = None,
+                        max_tokens: Optional[int] = None,
+                        response_format: Optional[Dict[str, Any]] = None) -> LLMResponse:
+        """Async completion; backends without a native async client run complete() in a worker thread"""
+        # asyncio.to_thread without its Python 3.9 requirement; the copied context carries call tags
+        call = functools.partial(
+            contextvars.copy_context().run, self.complete, messages, model, temperature, max_tokens, response_format
+        )
+        return await asyncio.get_running_loop().run_in_executor(None, call)
+
+    def stream(self, messages: List[Dict[str, str]], model: str,
+               temperature: Optional[float] = None,
+               max_tokens: Optional[int] = None,
+               response_format: Optional[Dict[str, Any]] = None) -> Generator[str, None, LLMResponse]:
+        """
+        Yield the completion as text chunks and return the assembled LLMResponse,
+        so callers can write `response = yield from backend.stream(...)`.
+        Backends without native streaming yield the whole completion as one chunk.
+        """
+        response = self.complete(messages, model, temperature, max_tokens, response_format)
+        if response.content:
+            yield response.content
+        return response
+
+
+class OpenAIBackend(LLMBackend):
+    name = "openai"
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+        from config import APIConfig
+        from llm_client_pool import get_client_registry
+
+        self.registry = get_client_registry()
+        self.api_key = api_key or APIConfig().api_key
+        self.base_url = base_url
+        self.client = self.registry.get_client(self.api_key, base_url)
+
+    @staticmethod
+    def _request_params(messages: List[Dict[str, str]], model: str,
+                        temperature: Optional[float], max_tokens: Optional[int],
+                        response_format: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        params: Dict[str, Any] = {"model": model, "messages": messages, "stream": False}
+        if temperature is not None:
+            params["temperature"] = temperature
+        if max_tokens is not None:
+            params["max_tokens"] = max_tokens
+        if response_format is not None:
+            params["response_format"] = response_format
+        return params
+
+    @staticmethod
+    def _to_response(llm_response, model: str, start: float) -> LLMResponse:
+        usage = getattr(llm_response, "usage", None)
+        return LLMResponse(
+            content=llm_response.choices[0].message.content,
+            model=getattr(llm_response, "model", model),
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) if usage else 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) if usage else 0,
+            latency=time.perf_counter() - start,
+            cached_prompt_tokens=_cached_prompt_tokens(usage)
+        )
+
+    def complete(self, messages: List[Dict[str, str]], model: str,
+                 temperature: Optional[float] = None,
+                 max_tokens: Optional[int] = None,
+                 response_format: Optional[Dict[str, Any]] = None) -> LLMResponse:
+        start = time.perf_counter()
+        with self.registry.track_request():
+            llm_response = self.client.chat.completions.create(
+                **self._request_params(messages, model, temperature, max_tokens, response_format)
+            )
+        return self._to_response(llm_response, model, start)
+
+    def stream(self, messages: List[Dict[str, str]], model: str,
+               temperature: Optional[float] = None,
+               max_tokens: Optional[int] = None,
+               response_format: Optional[Dict[str, Any]] = None) -> Generator[str, None, LLMResponse]:
+        params = self._request_params(messages, model, temperature, max_tokens, response_format)
+        params.update(stream=True, stream_options={"include_usage": True})
+        start = time.perf_counter()
+        parts: List[str] = []
+        usage = None
+        with self.registry.track_request():
+            for chunk in self.client.chat.completions.create(**params):
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        return LLMResponse(
+            content="".join(parts),
+            model=model,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) if usage else 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) if usage else 0,
+            latency=time.perf_counter() - start,
+            cached_prompt_tokens=_cached_prompt_tokens(usage)
+        )
+
+    async def acomplete(self, messages: List[Dict[str, str]], model: str,
+                        temperature: Optional[float] = None,
+                        max_tokens: Optional[int] = None,
+                        response_format: Optional[Dict[str, Any]] = None) -> LLMResponse:
+        client = self.registry.get_async_client(self.api_key, self.base_url)
+        start = time.perf_counter()
+        with self.registry.track_request():
+            llm_response = await client.chat.completions.create(
+                **self._request_params(messages, model, temperature, max_tokens, response_format)
+            )
+        return self._to_response(llm_response, model, start)
+
+
+_FILLER_WORDS = (
+    "evidence policy research suggests however therefore population resources "
+    "economic growth sustainability data analysis framework argument claim study "
+    "outcomes tradeoffs governments incentives long-term impact consider moreover"
+).split()
+
+_EVALUATION_TEMPLATE = """{{
+    "argument_coherence": {r0},
+    "evidence_quality": {r1},
+    "rebuttal_relevance": {r2},
+    "counter_argument_strength": {r3},
+    "factual_accuracy": {r4},
+    "source_credibility": {r5},
+    "persuasiveness": {r6},
+    "clarity": {r7},
+    "intellectual_honesty": {r8},
+    "fallacy_avoidance": {r9}
+}}"""
+
+_FACT_CHECK_TEMPLATE = """{{
+    "claims": ["{words}"],
+    "confidence_scores": [{r0}],
+    "evidence": ["Simulated evidence for call {n}"],
+    "context_notes": ["Simulated context note"]
+}}"""
+
+_CRITERIA_NAMES = re.findall(r'"(\w+)":', _EVALUATION_TEMPLATE)
+
+_ROUND_EVALUATION_TEMPLATE = (
+    '{{"pro": {{' + ", ".join(f'"{name}": {{r{i}}}' for i, name in enumerate(_CRITERIA_NAMES)) + '}}, '
+    '"against": {{' + ", ".join(f'"{name}": {{r{9 - i}}}' for i, name in enumerate(_CRITERIA_NAMES)) + '}}}}'
+)
+
+_BATCH_ITEM_ID = re.compile(r"^\s*### ARGUMENT id=(\S+)", re.MULTILINE)
+
+
+def _batch_evaluation_response(prompt: str, rng: random.Random, min_rating: int) -> str:
+    """One rating object per argument id found in a batch evaluation prompt"""
+    evaluations = [
+        {"id": item_id, **{name: rng.randint(min_rating, 5) for name in _CRITERIA_NAMES}}
+        for item_id in _BATCH_ITEM_ID.findall(prompt)
+    ]
+    return json.dumps({"evaluations": evaluations})
+
+
+# (prompt substring, response template) pairs matched in order; the first hit wins.
+# A template may also be a callable taking (prompt, rng, min_rating).
+DEFAULT_SIMULATED_RULES: List[Tuple[str, Union[str, Callable[[str, random.Random, int], str]]]] = [
+    ("Return one JSON evaluation per argument", _batch_evaluation_response),
+    ("Provide ratings in JSON format", _EVALUATION_TEMPLATE),
+    ("Format response as JSON", _FACT_CHECK_TEMPLATE),
+    ("PRO ARGUMENT:", _ROUND_EVALUATION_TEMPLATE),
+]
+
+
+@dataclass
+class SimulatedBackendConfig:
+    latency_distribution: str = "fixed"  # 'fixed', 'uniform', 'normal', 'lognormal', 'exponential'
+    latency_mean: float = 0.0  # Seconds until the first token
+    latency_stddev: float = 0.0
+    tokens_per_second: float = 0.0  # Generation throughput, 0 for instantaneous
+    response_tokens: int = 200
+    error_rate: float = 0.0
+    error_status: int = 500
+    error_retry_after: Optional[float] = None  # Retry-After seconds attached to simulated failures
+    malformed_rate: float = 0.0  # Share of JSON responses returned fenced, cut off or missing a field
+    min_rating: int = 3
+    seed: Optional[int] = 0
+    responses: Optional[List[str]] = None  # Canned responses, cycled in order
+    template: Optional[str] = None  # Fallback template when no rule matches
+    rules: List[Tuple[str, Union[str, Callable[[str, random.Random, int], str]]]] = field(
+        default_factory=lambda: list(DEFAULT_SIMULATED_RULES)
+    )
+
+
+class SimulatedBackend(LLMBackend):
+    """
+    Deterministic in-process stand-in for a chat completion API.
+    Latency, throughput, error rate and response content are all configurable
+    so the orchestration can be load-tested without network access.
+    """
+
+    name = "simulated"
+
+    def __init__(self, config: Optional[SimulatedBackendConfig] = None, **options):
+        self.config = config or SimulatedBackendConfig(**options)
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+
+    def _sample_latency(self) -> float:
+        cfg = self.config
+        dist = cfg.latency_distribution
+        if dist == "fixed":
+            return max(0.0, cfg.latency_mean)
+        if dist == "uniform":
+            return self._rng.uniform(max(0.0, cfg.latency_mean - cfg.latency_stddev),
+                                     cfg.latency_mean + cfg.latency_stddev)
+        if dist == "normal":
+            return max(0.0, self._rng.gauss(cfg.latency_mean, cfg.latency_stddev))
+        if dist == "lognormal":
+            if cfg.latency_mean <= 0:
+                return 0.0
+            return self._rng.lognormvariate(0.0, cfg.latency_stddev or 0.5) * cfg.latency_mean
+        if dist == "exponential":
+            return self._rng.expovariate(1.0 / cfg.latency_mean) if cfg.latency_mean > 0 else 0.0
+        raise ValueError(f"Unknown latency distribution: {dist}")
+
+    def _render(self, prompt: str, model: str, n: int) -> str:
+        cfg = self.config
+        if cfg.responses:
+            return cfg.responses[(n - 1) % len(cfg.responses)]
+
+        template = cfg.template
+        for pattern, rule_template in cfg.rules:
+            if pattern in prompt:
+                template = rule_template
+                break
+
+        if callable(template):
+            return template(prompt, self._rng, cfg.min_rating)
+        words = " ".join(self._rng.choice(_FILLER_WORDS) for _ in range(max(1, cfg.response_tokens)))
+        ratings = {f"r{i}": self._rng.randint(cfg.min_rating, 5) for i in range(10)}
+        if template is None:
+            return f"Simulated response {n} from {model}: {words}"
+        return template.format(n=n, model=model, prompt=prompt[:200], words=words, **ratings)
+
+    def _malform(self, content: str) -> str:
+        """Degrade a JSON response the way real models sometimes do"""
+        kind = self._rng.choice(("fenced", "truncated", "missing_field"))
+        if kind == "fenced":
+            return f"Here is my assessment:\n```json\n{content}\n```"
+        if kind == "truncated":
+            return content[:self._rng.randint(len(content) // 2, len(content) - 2)]
+        data = json.loads(content)
+        data.pop(self._rng.choice(sorted(data)))
+        return json.dumps(data)
+
+    def _prepare(self, messages: List[Dict[str, str]], model: str,
+                 max_tokens: Optional[int] = None) -> Tuple[str, float, bool, int]:
+        prompt = messages[-1]["content"] if messages else ""
+        with self._lock:
+            self.calls += 1
+            n = self.calls
+            failed = self._rng.random() < self.config.error_rate
+            if failed:
+                self.errors += 1
+                return "", self._sample_latency(), True, n
+            content = self._render(prompt or "", model, n)
+            if self.config.malformed_rate and content.startswith("{") and self._rng.random() < self.config.malformed_rate:
+                content = self._malform(content)
+            if max_tokens:
+                # Like a real API, stop generating at max_tokens
+                content = truncate_to_tokens(content, max_tokens)
+            delay = self._sample_latency()
+        return content, delay + self._generation_time(content), False, n
+
+    def _generation_time(self, content: str) -> float:
+        if self.config.tokens_per_second > 0:
+            return estimate_tokens(content) / self.config.tokens_per_second
+        return 0.0
+
+    def complete(self, messages: List[Dict[str, str]], model: str,
+                 temperature: Optional[float] = None,
+                 max_tokens: Optional[int] = None,
+                 response_format: Optional[Dict[str, Any]] = None) -> LLMResponse:
+        content, delay, failed, n = self._prepare(messages, model, max_tokens)
+        if delay > 0:
+            time.sleep(delay)
+        return self._finish(messages, model, content, delay, failed, n)
+
+    async def acomplete(self, messages: List[Dict[str, str]], model: str,
+                        temperature: Optional[float] = None,
+                        max_tokens: Optional[int] = None,
+                        response_format: Optional[Dict[str, Any]] = None) -> LLMResponse:
+        content, delay, failed, n = self._prepare(messages, model, max_tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self._finish(messages, model, content, delay, failed, n)
+
+    def stream(self, messages: List[Dict[str, str]], model: str,
+               temperature: Optional[float] = None,
+               max_tokens: Optional[int] = None,
+               response_format: Optional[Dict[str, Any]] = None) -> Generator[str, None, LLMResponse]:
+        content, delay, failed, n = self._prepare(messages, model, max_tokens)
+        generation_time = self._generation_time(content)
+        # Time to first token, then words paced at the configured throughput
+        if delay - generation_time > 0:
+            time.sleep(delay - generation_time)
+        if failed:
+            return self._finish(messages, model, content, delay, failed, n)
+        words = content.split(" ")
+        per_word = generation_time / len(words)
+        for i, word in enumerate(words):
+            if per_word > 0:
+                time.sleep(per_word)
+            yield word if i == 0 else " " + word
+        return self._finish(messages, model, content, delay, failed, n)
+
+    def _finish(self, messages: List[Dict[str, str]], model: str, content: str,
+                delay: float, failed: bool, n: int) -> LLMResponse:
+        if failed:
+            raise LLMBackendError(f"Simulated failure on call {n}", status_code=self.config.error_status,
+                                  retry_after=self.config.error_retry_after)
+        return LLMResponse(
+            content=content,
+            model=model,
+            prompt_tokens=sum(estimate_tokens(m.get("content")) for m in messages),
+            completion_tokens=estimate_tokens(content),
+            latency=delay
+        )
+
+
+BACKENDS = {
+    OpenAIBackend.name: OpenAIBackend,
+    SimulatedBackend.name: SimulatedBackend,
+}
+
+
+def create_backend(config, limiter=None) -> LLMBackend:
+    """
+    Build the backend selected by a DebateConfig
+    Args:
+        config (DebateConfig): Debate configuration
+        limiter (RateLimiter, optional): Shared rate limiter every uncached call is drawn from,
+            defaults to the process-wide limiter when the config sets per-minute limits
+    Returns:
+        LLMBackend: The configured backend with rate limiting, retries and caching applied
+    """
+    name = getattr(config, "backend", OpenAIBackend.name)
+    options = getattr(config, "backend_options", None) or {}
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend: {name}")
+    backend = BACKENDS[name](**options)
+
+    requests_per_minute = getattr(config, "requests_per_minute", None)
+    tokens_per_minute = getattr(config, "tokens_per_minute", None)
+    if limiter is None and (requests_per_minute or tokens_per_minute):
+        from rate_limiter import get_rate_limiter
+        limiter = get_rate_limiter(requests_per_minute, tokens_per_minute)
+    if limiter is not None:
+        from rate_limiter import RateLimitedBackend
+        backend = RateLimitedBackend(backend, limiter)
+
+    # Retries wrap the limiter so every attempt and hedge is drawn from it too
+    from resilience import ResilientBackend, RetryPolicy, get_provider_guard
+    guard = get_provider_guard(
+        name,
+        getattr(config, "circuit_breaker_threshold", 5),
+        getattr(config, "circuit_breaker_reset", 30.0)
+    )
+    backend = ResilientBackend(backend, guard, RetryPolicy(
+        max_retries=getattr(config, "max_retries", 3),
+        base_delay=getattr(config, "retry_delay", 1.0),
+        max_delay=getattr(config, "retry_max_delay", 30.0),
+        hedge_percentile=getattr(config, "hedge_percentile", None)
+    ))
+
+    # Cache outermost so hits never consume rate limit budget
+    cache_mode = getattr(config, "cache_mode", "off")
+    if cache_mode != "off":
+        from response_cache import CachingBackend, get_response_cache
+        cache = get_response_cache(getattr(config, "cache_path", None), getattr(config, "cache_ttl", None))
+        backend = CachingBackend(backend, cache, cache_mode)
+    return backend
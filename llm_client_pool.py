@@ -0,0 +1,179 @@
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional, Tuple
+import threading
+import time
+
+
+@dataclass
+class PoolMetrics:
+    clients_created: int = 0
+    client_reuses: int = 0  # Registry lookups served by an existing client
+    requests: int = 0
+    failed_requests: int = 0
+    new_connections: int = 0  # TCP connections opened by the pool
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    total_request_time: float = 0.0
+
+    @property
+    def reused_connections(self) -> int:
+        return max(0, self.requests - self.new_connections)
+
+    @property
+    def connection_reuse_rate(self) -> float:
+        return self.reused_connections / self.requests if self.requests else 0.0
+
+    @property
+    def mean_request_time(self) -> float:
+        return self.total_request_time / self.requests if self.requests else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.update(
+            reused_connections=self.reused_connections,
+            connection_reuse_rate=self.connection_reuse_rate,
+            mean_request_time=self.mean_request_time
+        )
+        return data
+
+
+class LLMClientRegistry:
+    """
+    Process-wide, thread-safe registry of OpenAI clients.
+    One client (and therefore one bounded HTTP connection pool) is kept per
+    API key / base URL so every foundation, moderator and agent shares
+    keep-alive connections and TLS sessions.
+    """
+
+    def __init__(self, max_connections: int = 20, max_keepalive_connections: int = 10,
+                 keepalive_expiry: float = 30.0):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.metrics = PoolMetrics()
+        self._clients: Dict[Tuple[Optional[str], Optional[str], bool], Any] = {}
+        self._lock = threading.Lock()
+
+    def _trace(self, event_name: str, info: Dict[str, Any]):
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self.metrics.new_connections += 1
+
+    def _on_request(self, request):
+        request.extensions["trace"] = self._trace
+
+    async def _aon_request(self, request):
+        request.extensions["trace"] = self._atrace
+
+    async def _atrace(self, event_name: str, info: Dict[str, Any]):
+        self._trace(event_name, info)
+
+    def _http_options(self, httpx) -> Dict[str, Any]:
+        return {
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry
+            ),
+            "timeout": httpx.Timeout(600.0, connect=5.0),
+        }
+
+    def _build_client(self, api_key: Optional[str], base_url: Optional[str], is_async: bool = False):
+        import httpx
+        from openai import AsyncOpenAI, OpenAI
+
+        if is_async:
+            http_client = httpx.AsyncClient(
+                event_hooks={"request": [self._aon_request]},
+                **self._http_options(httpx)
+            )
+            return AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http_client, max_retries=0)
+
+        http_client = httpx.Client(
+            event_hooks={"request": [self._on_request]},
+            **self._http_options(httpx)
+        )
+        # Retries are owned by resilience.ResilientBackend, not the SDK
+        return OpenAI(api_key=api_key, base_url=base_url, http_client=http_client, max_retries=0)
+
+    def _get(self, api_key: Optional[str], base_url: Optional[str], is_async: bool):
+        key = (api_key, base_url, is_async)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self.metrics.client_reuses += 1
+                return client
+            client = self._build_client(api_key, base_url, is_async)
+            self._clients[key] = client
+            self.metrics.clients_created += 1
+            return client
+
+    def get_client(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+        """Return the shared client for these credentials, creating it on first use"""
+        return self._get(api_key, base_url, is_async=False)
+
+    def get_async_client(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+        """Return the shared async client for these credentials; it must be used from a single event loop"""
+        return self._get(api_key, base_url, is_async=True)
+
+    @contextmanager
+    def track_request(self):
+        """Record in-flight count and wall time for one request through the pool"""
+        with self._lock:
+            self.metrics.in_flight += 1
+            self.metrics.peak_in_flight = max(self.metrics.peak_in_flight, self.metrics.in_flight)
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.metrics.in_flight -= 1
+                self.metrics.requests += 1
+                self.metrics.total_request_time += elapsed
+                if failed:
+                    self.metrics.failed_requests += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            data = self.metrics.to_dict()
+            data["clients"] = len(self._clients)
+            data["max_connections"] = self.max_connections
+        return data
+
+    def close_all(self):
+        with self._lock:
+            clients = list(self._clients.items())
+            self._clients.clear()
+        for (_, _, is_async), client in clients:
+            # Async clients are released with their event loop
+            if not is_async:
+                client.close()
+
+
+_registry: Optional[LLMClientRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_client_registry() -> LLMClientRegistry:
+    """Return the process-wide client registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = LLMClientRegistry()
+        return _registry
+
+
+def configure_client_registry(**limits) -> LLMClientRegistry:
+    """Replace the process-wide registry with one using the given pool limits"""
+    global _registry
+    with _registry_lock:
+        if _registry is not None:
+            _registry.close_all()
+        _registry = LLMClientRegistry(**limits)
+        return _registry
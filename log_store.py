@@ -0,0 +1,475 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+
+COMPRESSIONS = ("gzip", "zstd")
+SEGMENT_SUFFIXES = {"gzip": ".ndjson.gz", "zstd": ".ndjson.zst"}
+
+# Fields of an entry that are indexed: debate id, round, type, timestamp
+IndexKeys = Tuple[Optional[str], Optional[int], Optional[str], Optional[str]]
+
+
+def index_keys(entry: Dict[str, Any]) -> IndexKeys:
+    metadata = entry.get("metadata") if isinstance(entry.get("metadata"), dict) else {}
+    round_number = entry.get("round", metadata.get("round"))
+    return (
+        entry.get("debate_id", metadata.get("debate_id")),
+        round_number if isinstance(round_number, int) else None,
+        entry.get("type"),
+        entry.get("timestamp") or entry.get("time")
+    )
+
+
+def _codec(compression: str) -> Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]:
+    """(compress, decompress) for one independently decodable block"""
+    if compression == "gzip":
+        return (lambda data: gzip.compress(data, compresslevel=6)), gzip.decompress
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError("zstd compression requires the 'zstandard' package") from e
+        return zstandard.ZstdCompressor(level=3).compress, zstandard.ZstdDecompressor().decompress
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+# Prompts are split at line ends and after short leading labels such as "Round 2: ",
+# so a quoted argument lines up wherever it appears; pieces of at least min_bytes
+# are stored once in a BlobStore and referenced as {"blob": hash}
+_LEADING_LABEL = re.compile(r"[^\n:]{1,40}: ")
+PromptParts = List[Union[str, Dict[str, str]]]
+
+
+class BlobStore:
+    """
+    Content-addressed store for repeated prompt segments, shared by every entry of a log.
+    The hashes known to be stored and the contents read back are kept for the
+    max_cached most recently used blobs.
+    """
+
+    def __init__(self, path: str, max_cached: int = 4096):
+        self.path = Path(path)
+        self.max_cached = max_cached
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS blobs (hash TEXT PRIMARY KEY, content TEXT NOT NULL)")
+        self._known: "OrderedDict[str, None]" = OrderedDict()
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.RLock()  # Reentrant: puts run inside batch()
+        self.stored_bytes = 0  # Bytes of new blobs written by this process
+        self.referenced_bytes = 0  # Bytes replaced by references
+
+    def _remember(self, entries: "OrderedDict[str, Any]", key: str, value: Any):
+        entries[key] = value
+        entries.move_to_end(key)
+        if len(entries) > self.max_cached:
+            entries.popitem(last=False)
+
+    @contextmanager
+    def batch(self):
+        """
+        Commit every put inside the block in one transaction. The connection is shared,
+        so other threads' puts and batches wait until the block ends.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                yield self
+            finally:
+                self._conn.execute("COMMIT")
+
+    def put(self, content: str) -> str:
+        key = hashlib.sha256(content.encode("utf-8")).hexdigest()[:32]
+        with self._lock:
+            self.referenced_bytes += len(content)
+            if key not in self._known:
+                # Written before the entry referencing it, so readers never see a dangling hash
+                inserted = self._conn.execute(
+                    "INSERT OR IGNORE INTO blobs (hash, content) VALUES (?, ?)", (key, content)
+                ).rowcount
+                if inserted:
+                    self.stored_bytes += len(content)
+            self._remember(self._known, key, None)
+        return key
+
+    def get(self, key: str) -> str:
+        with self._lock:
+            content = self._cache.get(key)
+            if content is None:
+                row = self._conn.execute("SELECT content FROM blobs WHERE hash = ?", (key,)).fetchone()
+                if row is None:
+                    raise KeyError(f"Unknown prompt blob: {key}")
+                content = row[0]
+            self._remember(self._cache, key, content)
+        return content
+
+    def close(self):
+        self._conn.close()
+
+
+def _segments(text: str) -> Iterator[str]:
+    # Line by line rather than one regex scan over the text, which dominated logging time
+    lines = text.split("\n")
+    last = len(lines) - 1
+    for index, line in enumerate(lines):
+        if index < last:
+            line += "\n"
+        label = _LEADING_LABEL.match(line)
+        if label:
+            yield line[:label.end()]
+            line = line[label.end():]
+        if line:
+            yield line
+
+
+def intern_text(text: str, blobs: BlobStore, min_bytes: int = 256) -> PromptParts:
+    """Split text into literal pieces and blob references; "".join of the restored parts is the original"""
+    parts: PromptParts = []
+    for piece in _segments(text):
+        if len(piece) >= min_bytes:
+            parts.append({"blob": blobs.put(piece)})
+        elif parts and isinstance(parts[-1], str):
+            parts[-1] += piece
+        else:
+            parts.append(piece)
+    return parts
+
+
+def restore_text(parts: PromptParts, blobs: BlobStore) -> str:
+    return "".join(part if isinstance(part, str) else blobs.get(part["blob"]) for part in parts)
+
+
+def restore_entry(entry: Dict[str, Any], blobs: Optional[BlobStore]) -> Dict[str, Any]:
+    """Return the entry with an interned prompt expanded back to its full text"""
+    if blobs is None or "prompt_parts" not in entry:
+        return entry
+    entry = dict(entry)
+    entry["prompt"] = restore_text(entry.pop("prompt_parts"), blobs)
+    return entry
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(path / "index.sqlite", check_same_thread=False, isolation_level=None, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(
+        "CREATE TABLE IF NOT EXISTS segments ("
+        "id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL, compression TEXT NOT NULL, created REAL NOT NULL);"
+        "CREATE TABLE IF NOT EXISTS blocks ("
+        "id INTEGER PRIMARY KEY, segment_id INTEGER NOT NULL, offset INTEGER NOT NULL, "
+        "length INTEGER NOT NULL, entries INTEGER NOT NULL, raw_bytes INTEGER NOT NULL);"
+        "CREATE TABLE IF NOT EXISTS entries ("
+        "block_id INTEGER NOT NULL, line INTEGER NOT NULL, debate_id TEXT, round INTEGER, "
+        "type TEXT, timestamp TEXT);"
+        "CREATE INDEX IF NOT EXISTS entries_debate ON entries(debate_id, round);"
+        "CREATE INDEX IF NOT EXISTS entries_timestamp ON entries(timestamp);"
+        "CREATE INDEX IF NOT EXISTS entries_type ON entries(type);"
+    )
+    return conn
+
+
+class LogStore:
+    """
+    Debate log storage: a directory of compressed NDJSON segments plus a SQLite
+    index. Every append becomes one independently compressed block (a gzip member
+    or zstd frame), so a segment is still a valid .gz/.zst file and a reader can
+    decompress just the blocks holding the entries it wants. Each process writes
+    its own segments; the index is shared.
+    """
+
+    def __init__(self, path: str, compression: str = "gzip", max_segment_bytes: int = 64 * 1024 * 1024):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression}")
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.compression = compression
+        self.max_segment_bytes = max_segment_bytes
+        self._compress, _ = _codec(compression)
+        self._conn = _connect(self.path)
+        self._lock = threading.Lock()
+        self._segment = None
+        self._segment_id: Optional[int] = None
+        self._segment_size = 0
+
+    def _open_segment(self):
+        if self._segment is not None:
+            self._segment.close()
+        name = f"segment-{time.time_ns()}-{os.getpid()}{SEGMENT_SUFFIXES[self.compression]}"
+        self._segment = open(self.path / name, "ab")
+        self._segment_size = 0
+        self._segment_id = self._conn.execute(
+            "INSERT INTO segments (name, compression, created) VALUES (?, ?, ?)",
+            (name, self.compression, time.time())
+        ).lastrowid
+
+    def append(self, lines: List[str], keys: List[IndexKeys], fsync: bool = False) -> int:
+        """Compress `lines` into one block, append it and index every entry; returns the block size"""
+        data = ("\n".join(lines) + "\n").encode("utf-8")
+        block = self._compress(data)
+        with self._lock:
+            if self._segment is None or self._segment_size >= self.max_segment_bytes:
+                self._open_segment()
+            offset = self._segment_size
+            self._segment.write(block)
+            self._segment.flush()
+            if fsync:
+                os.fsync(self._segment.fileno())
+            self._segment_size += len(block)
+
+            # The block is on disk before it is indexed, so the index never points past the data
+            self._conn.execute("BEGIN")
+            block_id = self._conn.execute(
+                "INSERT INTO blocks (segment_id, offset, length, entries, raw_bytes) VALUES (?, ?, ?, ?, ?)",
+                (self._segment_id, offset, len(block), len(lines), len(data))
+            ).lastrowid
+            self._conn.executemany(
+                "INSERT INTO entries (block_id, line, debate_id, round, type, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
+                [(block_id, line, *entry_keys) for line, entry_keys in enumerate(keys)]
+            )
+            self._conn.execute("COMMIT")
+        return len(block)
+
+    def close(self):
+        with self._lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+            self._conn.close()
+
+
+class LogStoreReader:
+    """Query a LogStore by debate id, round, entry type and time range"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        if not (self.path / "index.sqlite").exists():
+            raise FileNotFoundError(f"No log store index in {self.path}")
+        self._conn = _connect(self.path)
+        self.blocks_read = 0
+        blobs_path = self.path / "blobs.sqlite"
+        self.blobs = BlobStore(str(blobs_path)) if blobs_path.exists() else None
+
+    def query(self, debate_id: Optional[str] = None, round_number: Optional[int] = None,
+              entry_type: Optional[str] = None, start: Optional[str] = None,
+              end: Optional[str] = None, restore_prompts: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Yield matching entries in write order, decompressing only the blocks that hold them.
+        `start` and `end` are ISO timestamps (inclusive). Interned prompts are expanded
+        back to their full text unless restore_prompts is False.
+        """
+        conditions, params = [], []
+        for column, value in (("debate_id", debate_id), ("round", round_number), ("type", entry_type)):
+            if value is not None:
+                conditions.append(f"e.{column} = ?")
+                params.append(value)
+        if start is not None:
+            conditions.append("e.timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            conditions.append("e.timestamp <= ?")
+            params.append(end)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self._conn.execute(
+            "SELECT b.id, s.name, s.compression, b.offset, b.length, e.line "
+            "FROM entries e JOIN blocks b ON b.id = e.block_id JOIN segments s ON s.id = b.segment_id "
+            f"{where} ORDER BY b.id, e.line",
+            params
+        ).fetchall()
+
+        current_block, lines = None, []
+        for block_id, name, compression, offset, length, line in rows:
+            if block_id != current_block:
+                lines = self._read_block(name, compression, offset, length)
+                current_block = block_id
+            entry = json.loads(lines[line])
+            yield restore_entry(entry, self.blobs) if restore_prompts else entry
+
+    def _read_block(self, name: str, compression: str, offset: int, length: int) -> List[str]:
+        _, decompress = _codec(compression)
+        with open(self.path / name, "rb") as f:
+            f.seek(offset)
+            data = decompress(f.read(length))
+        self.blocks_read += 1
+        return data.decode("utf-8").splitlines()
+
+    def debates(self) -> List[str]:
+        return [row[0] for row in self._conn.execute(
+            "SELECT DISTINCT debate_id FROM entries WHERE debate_id IS NOT NULL ORDER BY debate_id"
+        )]
+
+    def stats(self) -> Dict[str, Any]:
+        segments, = self._conn.execute("SELECT COUNT(*) FROM segments").fetchone()
+        blocks, entries, compressed, raw = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(entries), 0), COALESCE(SUM(length), 0), COALESCE(SUM(raw_bytes), 0) "
+            "FROM blocks"
+        ).fetchone()
+        return {
+            "segments": segments,
+            "blocks": blocks,
+            "entries": entries,
+            "compressed_bytes": compressed,
+            "raw_bytes": raw,
+            "compression_ratio": raw / compressed if compressed else 0.0
+        }
+
+    def close(self):
+        self._conn.close()
+        if self.blobs is not None:
+            self.blobs.close()
+
+
+# Suffix DebateLogger adds to a rotated file: debate_logs.ndjson -> debate_logs_20240101_120000[_1].ndjson
+_ROTATED_SUFFIX = re.compile(r"_\d{8}_\d{6}(?:_\d+)?$")
+
+
+def ndjson_blob_path(path: str) -> Path:
+    """
+    Blob store kept next to a flat NDJSON log (debate_logs.ndjson -> debate_logs.blobs.sqlite).
+    Rotated files share the store of the log they were rotated from.
+    """
+    path = Path(path)
+    blobs_path = path.with_suffix(".blobs.sqlite")
+    if not blobs_path.exists() and _ROTATED_SUFFIX.search(path.stem):
+        original = path.with_name(_ROTATED_SUFFIX.sub("", path.stem) + ".blobs.sqlite")
+        if original.exists():
+            return original
+    return blobs_path
+
+
+def read_ndjson(path: str, blobs_path: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Yield the entries of a flat NDJSON log with interned prompts restored"""
+    blobs_file = Path(blobs_path) if blobs_path else ndjson_blob_path(path)
+    blobs = BlobStore(str(blobs_file)) if blobs_file.exists() else None
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield restore_entry(json.loads(line), blobs)
+    finally:
+        if blobs is not None:
+            blobs.close()
+
+
+def _copy_blobs(entry: Dict[str, Any], source: Optional[BlobStore], target: BlobStore) -> int:
+    """Copy the blobs an entry's interned prompt references into target; returns how many were missing"""
+    parts = entry.get("prompt_parts")
+    if not isinstance(parts, list):
+        return 0
+    missing = 0
+    for part in parts:
+        if not isinstance(part, dict):
+            continue
+        try:
+            if source is None:
+                raise KeyError(part["blob"])
+            target.put(source.get(part["blob"]))
+        except KeyError:
+            missing += 1
+    return missing
+
+
+def migrate_ndjson(paths: Iterable[str], store_path: str, compression: str = "gzip",
+                   block_entries: int = 1000, blobs_path: Optional[str] = None) -> Dict[str, int]:
+    """
+    Copy existing NDJSON log files into a LogStore; unparseable lines are skipped and counted.
+    Blobs referenced by interned prompts are copied from each file's blob store (see
+    ndjson_blob_path, or blobs_path for all files) into the store's own.
+    """
+    store = LogStore(store_path, compression)
+    target = BlobStore(str(store.path / "blobs.sqlite"))
+    migrated = skipped = missing_blobs = 0
+    try:
+        for path in paths:
+            source_path = Path(blobs_path) if blobs_path else ndjson_blob_path(path)
+            source = BlobStore(str(source_path)) if source_path.exists() else None
+            lines: List[str] = []
+            keys: List[IndexKeys] = []
+            try:
+                with open(path, encoding="utf-8") as f:
+                    for raw in f:
+                        raw = raw.strip()
+                        if not raw:
+                            continue
+                        try:
+                            entry = json.loads(raw)
+                        except json.JSONDecodeError:
+                            skipped += 1
+                            continue
+                        if isinstance(entry, dict):
+                            # Blobs go in before the entries referencing them, as when logging
+                            missing_blobs += _copy_blobs(entry, source, target)
+                        lines.append(raw)
+                        keys.append(index_keys(entry) if isinstance(entry, dict) else (None, None, None, None))
+                        if len(lines) >= block_entries:
+                            store.append(lines, keys)
+                            migrated += len(lines)
+                            lines, keys = [], []
+                if lines:
+                    store.append(lines, keys)
+                    migrated += len(lines)
+            finally:
+                if source is not None:
+                    source.close()
+    finally:
+        target.close()
+        store.close()
+    return {"migrated": migrated, "skipped": skipped, "missing_blobs": missing_blobs}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compressed, indexed debate log store")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate = commands.add_parser("migrate", help="Import NDJSON log files into a store")
+    migrate.add_argument("files", nargs="+", help="NDJSON files, e.g. debate_logs*.ndjson")
+    migrate.add_argument("--store", default="debate_logs")
+    migrate.add_argument("--compression", choices=COMPRESSIONS, default="gzip")
+    migrate.add_argument("--blobs", default=None, help="Blob store of every file, defaults to each file's own")
+
+    query = commands.add_parser("query", help="Print matching entries as NDJSON")
+    query.add_argument("--store", default="debate_logs")
+    query.add_argument("--debate", default=None)
+    query.add_argument("--round", type=int, default=None)
+    query.add_argument("--type", default=None)
+    query.add_argument("--start", default=None, help="ISO timestamp, inclusive")
+    query.add_argument("--end", default=None, help="ISO timestamp, inclusive")
+
+    stats = commands.add_parser("stats", help="Print store size and compression ratio")
+    stats.add_argument("--store", default="debate_logs")
+
+    cat = commands.add_parser("cat", help="Print a flat NDJSON log with interned prompts restored")
+    cat.add_argument("file")
+    cat.add_argument("--blobs", default=None, help="Blob store, defaults to <file>.blobs.sqlite, or that of the log a rotated file came from")
+    args = parser.parse_args()
+
+    if args.command == "cat":
+        for entry in read_ndjson(args.file, args.blobs):
+            print(json.dumps(entry))
+        return
+
+    if args.command == "migrate":
+        print(json.dumps(migrate_ndjson(args.files, args.store, args.compression, blobs_path=args.blobs)))
+        return
+
+    reader = LogStoreReader(args.store)
+    if args.command == "stats":
+        print(json.dumps(reader.stats(), indent=2))
+        return
+    for entry in reader.query(args.debate, args.round, args.type, args.start, args.end):
+        print(json.dumps(entry))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,28 @@ from DebateLogger import DebateLogger
 from config import DebateConfig
 
 
+def print_stream_event(event, current_turn: dict) -> bool:
+    """Print a streaming event from the debate; returns False for round and conclusion results"""
+    event_type = event['type']
+    if event_type not in ('chunk', 'restart', 'argument'):
+        return False
+
+    turn = (event['round'], event['side'])
+    if turn != current_turn.get('turn'):
+        current_turn['turn'] = turn
+        if event['side'] == 'pro' and event.get('argument_type') != 'conclusion':
+            print(f"\n=== Round {event['round']} ({event['argument_type']}) ===")
+        print(f"\n{'Pro' if event['side'] == 'pro' else 'Against'}:")
+
+    if event_type == 'chunk':
+        print(event['text'], end='', flush=True)
+    elif event_type == 'restart':
+        print("\n[Below quality threshold, regenerating]")
+    else:
+        print()
+    return True
+
+
 def main():
     # Initialize configuration
     config = DebateConfig(
@@ -17,7 +39,7 @@ def main():
 
     # Initialize debate
     debate = DebateModeration(config)
-    logger = DebateLogger()
+    logger = DebateLogger(debate_id=debate.debate_id)
 
     try:
         print("\n=== Debate Initialization ===")
@@ -27,17 +49,15 @@ def main():
 
         print("\n=== Debate Begins ===")
 
-        # Run debate rounds
-        for round_result in debate.run_rounds():
+        # Run debate rounds, printing arguments as they stream in
+        current_turn = {}
+        for round_result in debate.run_rounds(stream=True):
+            if print_stream_event(round_result, current_turn):
+                continue
+
             round_num = round_result['round']
             round_type = round_result['type']
 
-            print(f"\n=== Round {round_num} ({round_type}) ===")
-            print("\nPro Argument:")
-            print(round_result['pro_argument'])
-            print("\nAgainst Argument:")
-            print(round_result['against_argument'])
-
             # Log round results
             logger.write_entry({
                 'round': round_num,
@@ -48,11 +68,10 @@ def main():
 
         # Generate and display conclusions
         print("\n=== Concluding Arguments ===")
-        conclusions = debate.conclusion()
-        print("\nPro Conclusion:")
-        print(conclusions['pro_argument'])
-        print("\nAgainst Conclusion:")
-        print(conclusions['against_argument'])
+        conclusions = None
+        for event in debate.stream_conclusion():
+            if not print_stream_event(event, current_turn):
+                conclusions = event
 
         # Log conclusions
         logger.write_entry({
@@ -0,0 +1,52 @@
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple
+from llm_backend import estimate_tokens
+
+
+# Providers only cache prompt prefixes at least this long (OpenAI: 1024 tokens)
+PROMPT_CACHE_MIN_TOKENS = 1024
+
+
+@dataclass(frozen=True)
+class CompiledPrompt:
+    """A rendered prompt; `system` goes out as the system message ahead of `user`"""
+    system: str
+    user: str
+    prefix_tokens: int  # Leading tokens identical on every call from the same template
+
+    @property
+    def cache_eligible(self) -> bool:
+        return self.prefix_tokens >= PROMPT_CACHE_MIN_TOKENS
+
+
+class PromptTemplate:
+    """
+    A prompt split into a stable prefix, assembled once, and volatile sections
+    filled on each render. The prefix is the system message plus fixed leading
+    text of the user message, so it is byte-identical across calls and a
+    provider's prefix cache can serve it.
+    """
+
+    def __init__(self, system: str, head: str = "", sections: Sequence[Tuple[str, str]] = ()):
+        """
+        Args:
+            system (str): Static system message
+            head (str): Static text that opens the user message
+            sections (list): (name, header) pairs of the volatile sections, in order
+        """
+        self.system = system
+        self.head = head
+        self.sections = tuple(sections)
+        self.prefix_tokens = estimate_tokens(system) + estimate_tokens(head)
+
+    def render(self, **values: Optional[str]) -> CompiledPrompt:
+        """Fill the volatile sections by name; empty ones are left out"""
+        unknown = set(values) - {name for name, _ in self.sections}
+        if unknown:
+            raise KeyError(f"Unknown prompt sections: {', '.join(sorted(unknown))}")
+        parts = [self.head] if self.head else []
+        for name, header in self.sections:
+            value = values.get(name)
+            if value:
+                parts.append(f"=== {header} ===\n{value}")
+        return CompiledPrompt(self.system, "\n\n".join(parts), self.prefix_tokens)
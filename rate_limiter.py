@@ -0,0 +1,177 @@
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Generator, List, Optional, Tuple
+import asyncio
+import threading
+import time
+from llm_backend import LLMBackend, LLMResponse, estimate_tokens
+
+
+@dataclass
+class RateLimiterStats:
+    acquisitions: int = 0
+    waits: int = 0
+    total_wait_time: float = 0.0
+    tokens_reserved: int = 0
+    tokens_refunded: int = 0
+
+
+class RateLimiter:
+    """
+    Token-bucket limiter enforcing requests-per-minute and tokens-per-minute budgets.
+    Token cost is reserved up front from an estimate and reconciled with actual usage.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._request_allowance = float(requests_per_minute or 0)
+        self._token_allowance = float(tokens_per_minute or 0)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+        self.stats = RateLimiterStats()
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        if self.requests_per_minute:
+            self._request_allowance = min(
+                float(self.requests_per_minute),
+                self._request_allowance + elapsed * self.requests_per_minute / 60.0
+            )
+        if self.tokens_per_minute:
+            self._token_allowance = min(
+                float(self.tokens_per_minute),
+                self._token_allowance + elapsed * self.tokens_per_minute / 60.0
+            )
+
+    def _try_acquire(self, tokens: int) -> Tuple[float, int]:
+        """
+        Reserve one request and `tokens` tokens; return (0, tokens reserved) on success
+        or (seconds to wait, 0)
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            wait = 0.0
+            if self.requests_per_minute and self._request_allowance < 1:
+                wait = max(wait, (1 - self._request_allowance) * 60.0 / self.requests_per_minute)
+            if self.tokens_per_minute:
+                # A single request larger than the whole budget only has to wait for a full bucket
+                tokens = min(tokens, int(self.tokens_per_minute))
+                if self._token_allowance < tokens:
+                    wait = max(wait, (tokens - self._token_allowance) * 60.0 / self.tokens_per_minute)
+            if wait > 0:
+                return wait, 0
+            if self.requests_per_minute:
+                self._request_allowance -= 1
+            if self.tokens_per_minute:
+                self._token_allowance -= tokens
+            self.stats.acquisitions += 1
+            self.stats.tokens_reserved += tokens
+            return 0.0, tokens
+
+    def _record_wait(self, waited: float, slept: bool):
+        if slept:
+            with self._lock:
+                self.stats.waits += 1
+                self.stats.total_wait_time += waited
+
+    def acquire(self, tokens: int = 0) -> int:
+        """
+        Block until the request fits within both budgets; returns the tokens reserved,
+        which is less than `tokens` for a request larger than the whole budget
+        """
+        start = time.monotonic()
+        slept = False
+        while True:
+            wait, reserved = self._try_acquire(tokens)
+            if wait <= 0:
+                break
+            slept = True
+            time.sleep(wait)
+        self._record_wait(time.monotonic() - start, slept)
+        return reserved
+
+    async def aacquire(self, tokens: int = 0) -> int:
+        """Async counterpart of acquire"""
+        start = time.monotonic()
+        slept = False
+        while True:
+            wait, reserved = self._try_acquire(tokens)
+            if wait <= 0:
+                break
+            slept = True
+            await asyncio.sleep(wait)
+        self._record_wait(time.monotonic() - start, slept)
+        return reserved
+
+    def reconcile(self, reserved: int, actual: int):
+        """Refund (or charge) the difference between a reservation (as returned by acquire) and actual usage"""
+        if not self.tokens_per_minute:
+            return
+        with self._lock:
+            self._token_allowance = min(float(self.tokens_per_minute), self._token_allowance + reserved - actual)
+            self.stats.tokens_refunded += reserved - actual
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return asdict(self.stats)
+
+
+_limiters: Dict[Tuple[Optional[float], Optional[float]], RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(requests_per_minute: Optional[float] = None,
+                     tokens_per_minute: Optional[float] = None) -> RateLimiter:
+    """Process-wide limiter for a budget, so every debate in the process draws from one bucket"""
+    key = (requests_per_minute, tokens_per_minute)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = _limiters[key] = RateLimiter(requests_per_minute, tokens_per_minute)
+        return limiter
+
+
+class RateLimitedBackend(LLMBackend):
+    """Backend wrapper that draws every call from a shared RateLimiter"""
+
+    def __init__(self, backend: LLMBackend, limiter: RateLimiter, default_completion_tokens: int = 500):
+        self.backend = backend
+        self.limiter = limiter
+        self.default_completion_tokens = default_completion_tokens
+        self.name = backend.name
+
+    def _reservation(self, messages: List[Dict[str, str]], max_tokens: Optional[int]) -> int:
+        prompt_tokens = sum(estimate_tokens(m.get("content")) for m in messages)
+        return prompt_tokens + (max_tokens or self.default_completion_tokens)
+
+    def _settle(self, reserved: int, response: LLMResponse):
+        self.limiter.reconcile(reserved, response.prompt_tokens + response.completion_tokens)
+
+    def complete(self, messages: List[Dict[str, str]], model: str,
+                 temperature: Optional[float] = None,
+                 max_tokens: Optional[int] = None,
+                 response_format: Optional[Dict[str, Any]] = None) -> LLMResponse:
+        reserved = self.limiter.acquire(self._reservation(messages, max_tokens))
+        response = self.backend.complete(messages, model, temperature, max_tokens, response_format)
+        self._settle(reserved, response)
+        return response
+
+    async def acomplete(self, messages: List[Dict[str, str]], model: str,
+                        temperature: Optional[float] = None,
+                        max_tokens: Optional[int] = None,
+                        response_format: Optional[Dict[str, Any]] = None) -> LLMResponse:
+        reserved = await self.limiter.aacquire(self._reservation(messages, max_tokens))
+        response = await self.backend.acomplete(messages, model, temperature, max_tokens, response_format)
+        self._settle(reserved, response)
+        return response
+
+    def stream(self, messages: List[Dict[str, str]], model: str,
+               temperature: Optional[float] = None,
+               max_tokens: Optional[int] = None,
+               response_format: Optional[Dict[str, Any]] = None) -> Generator[str, None, LLMResponse]:
+        reserved = self.limiter.acquire(self._reservation(messages, max_tokens))
+        response = yield from self.backend.stream(messages, model, temperature, max_tokens, response_format)
+        self._settle(reserved, response)
+        return response
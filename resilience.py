@@ -0,0 +1,443 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, asdict
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple
+import asyncio
+import contextvars
+import random
+import threading
+import time
+from llm_backend import LLMBackend, LLMBackendError, LLMResponse
+
+
+# HTTP statuses worth retrying; other errors (bad request, auth, ...) fail immediately
+RETRY_STATUSES = (408, 409, 429, 500, 502, 503, 504)
+BREAKER_STATES = ("closed", "open", "half_open")
+
+
+class CircuitOpenError(LLMBackendError):
+    """Raised when the provider's circuit stays open longer than a call is willing to pause"""
+
+
+@dataclass
+class RetryPolicy:
+    max_retries: int = 3
+    base_delay: float = 1.0  # Backoff before the first retry; doubles per attempt, with full jitter
+    max_delay: float = 30.0
+    max_pause: float = 300.0  # Longest a call waits on an open circuit before raising CircuitOpenError
+    hedge_percentile: Optional[float] = None  # Send a duplicate request once a call outlasts this latency percentile
+
+
+@dataclass
+class ResilienceStats:
+    calls: int = 0
+    attempts: int = 0
+    retries: int = 0
+    failures: int = 0  # Failed attempts, transient or not
+    give_ups: int = 0  # Calls that failed after exhausting their retries
+    retry_after_waits: int = 0  # Backoffs set by a Retry-After header
+    backoff_time: float = 0.0
+    breaker_opens: int = 0
+    paused_calls: int = 0  # Calls held back by an open circuit or a Retry-After cooldown
+    pause_time: float = 0.0
+    hedges: int = 0
+    hedge_wins: int = 0
+
+
+@lru_cache(maxsize=1)
+def _transient_error_types() -> Tuple[type, ...]:
+    types: List[type] = [ConnectionError, TimeoutError]
+    try:
+        import openai
+        types.append(openai.APIConnectionError)  # Also covers APITimeoutError
+    except ImportError:
+        pass
+    return tuple(types)
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Seconds the provider asked us to wait, from the error or its response's Retry-After headers"""
+    value = getattr(error, "retry_after", None)
+    if value is not None:
+        return float(value)
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        header = headers.get("retry-after")
+        if header is None:
+            return None
+        try:
+            return float(header)
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(header).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_transient(error: BaseException) -> bool:
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in RETRY_STATUSES
+    return isinstance(error, _transient_error_types())
+
+
+def is_outage(error: BaseException) -> bool:
+    """Transient failures that count toward the circuit breaker; rate limiting does not"""
+    return is_transient(error) and getattr(error, "status_code", None) != 429
+
+
+class ProviderGuard:
+    """
+    Process-wide failure state for one provider, shared by every debate using it:
+    a circuit breaker that pauses all calls while the provider is failing, a
+    cooldown set by Retry-After, and a window of recent latencies for hedging.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, latency_window: int = 200):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.stats = ResilienceStats()
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._cooldown_until = 0.0
+        self._latencies = deque(maxlen=latency_window)
+        self._lock = threading.Lock()
+
+    def _try_admit(self) -> Tuple[float, bool]:
+        """Return (seconds to wait, 0 when admitted; whether the admitted call is the half-open probe)"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._cooldown_until:
+                return self._cooldown_until - now, False
+            if self.state == "open":
+                if now < self._opened_at + self.reset_timeout:
+                    return self._opened_at + self.reset_timeout - now, False
+                self.state = "half_open"
+            if self.state == "half_open":
+                # One probe at a time decides whether the circuit closes again
+                if self._probe_in_flight:
+                    return min(1.0, self.reset_timeout), False
+                self._probe_in_flight = True
+                return 0.0, True
+            return 0.0, False
+
+    def admit(self, max_pause: float) -> bool:
+        """Block until a call may go out; returns whether it is the half-open probe"""
+        started = time.monotonic()
+        paused = False
+        while True:
+            delay, probe = self._try_admit()
+            if delay <= 0:
+                break
+            paused = True
+            self._check_pause(started, max_pause)
+            time.sleep(min(delay, 1.0))
+        self._record_pause(started, paused)
+        return probe
+
+    async def aadmit(self, max_pause: float) -> bool:
+        """Async counterpart of admit"""
+        started = time.monotonic()
+        paused = False
+        while True:
+            delay, probe = self._try_admit()
+            if delay <= 0:
+                break
+            paused = True
+            self._check_pause(started, max_pause)
+            await asyncio.sleep(min(delay, 1.0))
+        self._record_pause(started, paused)
+        return probe
+
+    def _check_pause(self, started: float, max_pause: float):
+        if time.monotonic() - started > max_pause:
+            raise CircuitOpenError(f"Provider circuit open for more than {max_pause:.0f}s", status_code=503)
+
+    def _record_pause(self, started: float, paused: bool):
+        if paused:
+            with self._lock:
+                self.stats.paused_calls += 1
+                self.stats.pause_time += time.monotonic() - started
+
+    def record_success(self, latency: float, probe: bool):
+        with self._lock:
+            self._latencies.append(latency)
+            self._consecutive_failures = 0
+            if probe:
+                self._probe_in_flight = False
+            self.state = "closed"
+
+    def record_failure(self, outage: bool, probe: bool, retry_after: Optional[float] = None):
+        """
+        Args:
+            outage (bool): The provider itself failed (5xx, connection error, timeout),
+                as opposed to rejecting the request or rate limiting it
+            probe (bool): The attempt was the half-open probe
+            retry_after (float, optional): Cooldown the provider asked for
+        """
+        with self._lock:
+            self.stats.failures += 1
+            if probe:
+                self._probe_in_flight = False
+            if retry_after:
+                # Everyone backs off, not only the caller that was told to
+                self._cooldown_until = max(self._cooldown_until, time.monotonic() + retry_after)
+            if not outage:
+                # The provider answered, so it is up; close a half-open circuit
+                if probe:
+                    self.state = "closed"
+                return
+            self._consecutive_failures += 1
+            if probe or (self.state == "closed" and self._consecutive_failures >= self.failure_threshold):
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                self.stats.breaker_opens += 1
+
+    def release(self, probe: bool):
+        """Give back an admitted probe whose outcome is unknown, e.g. a cancelled call"""
+        if probe:
+            with self._lock:
+                self._probe_in_flight = False
+
+    def hedge_delay(self, percentile: float, min_samples: int = 20) -> Optional[float]:
+        """Latency at `percentile` of recent successful calls, or None until there are enough of them"""
+        with self._lock:
+            if len(self._latencies) < min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(percentile * len(ordered)))]
+
+    def count(self, **increments: float):
+        with self._lock:
+            for name, value in increments.items():
+                setattr(self.stats, name, getattr(self.stats, name) + value)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**asdict(self.stats), "state": self.state, "consecutive_failures": self._consecutive_failures}
+
+
+_guards: Dict[str, ProviderGuard] = {}
+_guards_lock = threading.Lock()
+
+
+def get_provider_guard(provider: str, failure_threshold: int = 5, reset_timeout: float = 30.0) -> ProviderGuard:
+    """Process-wide guard for a provider; the first caller's breaker settings win"""
+    with _guards_lock:
+        guard = _guards.get(provider)
+        if guard is None:
+            guard = _guards[provider] = ProviderGuard(failure_threshold, reset_timeout)
+        return guard
+
+
+def get_resilience_stats() -> Dict[str, Dict[str, Any]]:
+    with _guards_lock:
+        guards = dict(_guards)
+    return {provider: guard.get_stats() for provider, guard in guards.items()}
+
+
+_hedge_executor: Optional[ThreadPoolExecutor] = None
+_hedge_lock = threading.Lock()
+
+
+def _get_hedge_executor() -> ThreadPoolExecutor:
+    global _hedge_executor
+    with _hedge_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+        return _hedge_executor
+
+
+class ResilientBackend(LLMBackend):
+    """
+    Backend wrapper owning every retry of an LLM call: jittered exponential
+    backoff that honours Retry-After, a shared circuit breaker, and optional
+    hedged requests. Wrap it around a RateLimitedBackend so retries and hedges
+    draw from the same limiter as first attempts.
+    """
+
+    def __init__(self, backend: LLMBackend, guard: ProviderGuard, policy: Optional[RetryPolicy] = None):
+        self.backend = backend
+        self.guard = guard
+        self.policy = policy or RetryPolicy()
+        self.name = backend.name
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            # Spread the callers released by the same Retry-After
+            return retry_after + random.uniform(0, self.policy.base_delay)
+        return random.uniform(0, min(self.policy.max_delay, self.policy.base_delay * 2 ** attempt))
+
+    def _failed(self, error: Exception, attempt: int, probe: bool) -> Optional[float]:
+        """Record a failed attempt; returns the backoff before retrying, or None to give up"""
+        transient = is_transient(error)
+        retry_after = retry_after_seconds(error) if transient else None
+        self.guard.record_failure(is_outage(error), probe, retry_after)
+        if not transient:
+            return None
+        if attempt >= self.policy.max_retries:
+            self.guard.count(give_ups=1)
+            return None
+        delay = self._backoff(attempt, retry_after)
+        self.guard.count(retries=1, backoff_time=delay, retry_after_waits=int(retry_after is not None))
+        return delay
+
+    def _hedge_after(self) -> Optional[float]:
+        if self.policy.hedge_percentile is None:
+            return None
+        return self.guard.hedge_delay(self.policy.hedge_percentile)
+
+    def _complete_hedged(self, call: Callable[[], LLMResponse]) -> LLMResponse:
+        """Run `call`, starting a duplicate if it outlasts the hedge delay; the first success wins"""
+        delay = self._hedge_after()
+        if delay is None:
+            return call()
+        executor = _get_hedge_executor()
+        primary = executor.submit(contextvars.copy_context().run, call)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        hedge = executor.submit(contextvars.copy_context().run, call)
+        self.guard.count(hedges=1)
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # The loser keeps running; a blocking HTTP call cannot be cancelled
+                    if future is hedge:
+                        self.guard.count(hedge_wins=1)
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    async def _acomplete_hedged(self, call: Callable[[], Any]) -> LLMResponse:
+        delay = self._hedge_after()
+        if delay is None:
+            return await call()
+        primary = asyncio.ensure_future(call())
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+        hedge = asyncio.ensure_future(call())
+        self.guard.count(hedges=1)
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.guard.count(hedge_wins=1)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def complete(self, messages: List[Dict[str, str]], model: str,
+                 temperature: Optional[float] = None,
+                 max_tokens: Optional[int] = None,
+                 response_format: Optional[Dict[str, Any]] = None) -> LLMResponse:
+        self.guard.count(calls=1)
+        attempt = 0
+        while True:
+            probe = self.guard.admit(self.policy.max_pause)
+            self.guard.count(attempts=1)
+            started = time.perf_counter()
+            try:
+                response = self._complete_hedged(
+                    lambda: self.backend.complete(messages, model, temperature, max_tokens, response_format)
+                )
+            except Exception as error:
+                delay = self._failed(error, attempt, probe)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                self.guard.release(probe)
+                raise
+            self.guard.record_success(time.perf_counter() - started, probe)
+            return response
+
+    async def acomplete(self, messages: List[Dict[str, str]], model: str,
+                        temperature: Optional[float] = None,
+                        max_tokens: Optional[int] = None,
+                        response_format: Optional[Dict[str, Any]] = None) -> LLMResponse:
+        self.guard.count(calls=1)
+        attempt = 0
+        while True:
+            probe = await self.guard.aadmit(self.policy.max_pause)
+            self.guard.count(attempts=1)
+            started = time.perf_counter()
+            try:
+                response = await self._acomplete_hedged(
+                    lambda: self.backend.acomplete(messages, model, temperature, max_tokens, response_format)
+                )
+            except Exception as error:
+                delay = self._failed(error, attempt, probe)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                self.guard.release(probe)
+                raise
+            self.guard.record_success(time.perf_counter() - started, probe)
+            return response
+
+    def stream(self, messages: List[Dict[str, str]], model: str,
+               temperature: Optional[float] = None,
+               max_tokens: Optional[int] = None,
+               response_format: Optional[Dict[str, Any]] = None) -> Generator[str, None, LLMResponse]:
+        """Retried only until the first chunk is out; streams are never hedged"""
+        self.guard.count(calls=1)
+        attempt = 0
+        while True:
+            probe = self.guard.admit(self.policy.max_pause)
+            self.guard.count(attempts=1)
+            started = time.perf_counter()
+            streamed = False
+            try:
+                chunks = self.backend.stream(messages, model, temperature, max_tokens, response_format)
+                while True:
+                    try:
+                        chunk = next(chunks)
+                    except StopIteration as done:
+                        response = done.value
+                        break
+                    streamed = True
+                    yield chunk
+            except Exception as error:
+                if streamed:
+                    # Chunks already reached the caller, so the call cannot be replayed
+                    self.guard.record_failure(is_outage(error), probe)
+                    raise
+                delay = self._failed(error, attempt, probe)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                self.guard.release(probe)
+                raise
+            self.guard.record_success(time.perf_counter() - started, probe)
+            return response
+
+    def get_stats(self) -> Dict[str, Any]:
+        return self.guard.get_stats()
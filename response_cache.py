@@ -0,0 +1,281 @@
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Generator, List, Optional, Tuple
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from llm_backend import LLMBackend, LLMResponse
+
+
+CACHE_MODES = ("off", "deterministic", "always")
+
+
+def cache_key(model: str, temperature: Optional[float], max_tokens: Optional[int],
+              messages: List[Dict[str, str]], response_format: Optional[Dict[str, Any]] = None) -> str:
+    """Content address of a request: model, sampling settings, output format, system context and prompt"""
+    request: List[Any] = [model, temperature, max_tokens, messages]
+    if response_format is not None:
+        # Appended only when set, so keys of plain-text requests are unchanged
+        request.append(response_format)
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    bypassed: int = 0  # Requests not eligible for caching under the current mode
+    stores: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class MemoryCacheTier:
+    """LRU tier bounded by entry count and total payload bytes"""
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024,
+                 ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+
+    def get(self, key: str, stats: CacheStats) -> Optional[str]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        value, created = item
+        if self.ttl is not None and time.time() - created > self.ttl:
+            self._remove(key)
+            stats.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: str, stats: CacheStats, created: Optional[float] = None):
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, created or time.time())
+        self.size += len(value)
+        while self._entries and (len(self._entries) > self.max_entries or self.size > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            stats.evictions += 1
+
+    def _remove(self, key: str):
+        value, _ = self._entries.pop(key)
+        self.size -= len(value)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCacheTier:
+    """On-disk tier; least recently used rows are evicted once the payload exceeds max_bytes"""
+
+    def __init__(self, path: str, max_bytes: int = 512 * 1024 * 1024, ttl: Optional[float] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, "
+            "last_access REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses(last_access)")
+        self.size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, key: str, stats: CacheStats) -> Optional[Tuple[str, float]]:
+        row = self._conn.execute("SELECT value, created, size FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, created, size = row
+        now = time.time()
+        if self.ttl is not None and now - created > self.ttl:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.size -= size
+            stats.expirations += 1
+            return None
+        self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        return value, created
+
+    def put(self, key: str, value: str, stats: CacheStats):
+        now = time.time()
+        previous = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        if previous:
+            self.size -= previous[0]
+        self._conn.execute(
+            "INSERT OR REPLACE INTO responses (key, value, created, last_access, size) VALUES (?, ?, ?, ?, ?)",
+            (key, value, now, now, len(value))
+        )
+        self.size += len(value)
+        if self.size > self.max_bytes:
+            self._evict(stats)
+
+    def _evict(self, stats: CacheStats):
+        # Drop least recently used rows until back under 90% of the budget
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall()
+        doomed = []
+        for key, size in rows:
+            if self.size <= target:
+                break
+            doomed.append((key,))
+            self.size -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+        stats.evictions += len(doomed)
+
+    def close(self):
+        self._conn.close()
+
+
+class ResponseCache:
+    """Two-tier (memory LRU, optional SQLite) content-addressed cache of LLM responses"""
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[float] = None,
+                 max_entries: int = 10000, max_memory_bytes: int = 64 * 1024 * 1024,
+                 max_disk_bytes: int = 512 * 1024 * 1024):
+        self.memory = MemoryCacheTier(max_entries, max_memory_bytes, ttl)
+        self.disk = SQLiteCacheTier(path, max_disk_bytes, ttl) if path else None
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[LLMResponse]:
+        with self._lock:
+            value = self.memory.get(key, self.stats)
+            if value is not None:
+                self.stats.hits += 1
+                self.stats.memory_hits += 1
+            elif self.disk is not None:
+                found = self.disk.get(key, self.stats)
+                if found is not None:
+                    value, created = found
+                    self.memory.put(key, value, self.stats, created)
+                    self.stats.hits += 1
+                    self.stats.disk_hits += 1
+            if value is None:
+                self.stats.misses += 1
+                return None
+        return LLMResponse(**json.loads(value), cached=True)
+
+    def put(self, key: str, response: LLMResponse):
+        value = json.dumps({
+            "content": response.content,
+            "model": response.model,
+            "prompt_tokens": response.prompt_tokens,
+            "completion_tokens": response.completion_tokens
+        })
+        with self._lock:
+            self.memory.put(key, value, self.stats)
+            if self.disk is not None:
+                self.disk.put(key, value, self.stats)
+            self.stats.stores += 1
+
+    def record_bypass(self):
+        with self._lock:
+            self.stats.bypassed += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            data = asdict(self.stats)
+            data["hit_rate"] = self.stats.hit_rate
+            data["memory_entries"] = len(self.memory)
+            data["memory_bytes"] = self.memory.size
+            data["disk_bytes"] = self.disk.size if self.disk is not None else 0
+        return data
+
+
+class CachingBackend(LLMBackend):
+    """
+    Backend wrapper serving repeated requests from a ResponseCache.
+    In 'deterministic' mode only temperature-0 requests are cached;
+    'always' caches regardless of sampling temperature.
+    """
+
+    def __init__(self, backend: LLMBackend, cache: ResponseCache, mode: str = "deterministic"):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode: {mode}")
+        self.backend = backend
+        self.cache = cache
+        self.mode = mode
+        self.name = backend.name
+
+    def _key(self, messages: List[Dict[str, str]], model: str,
+             temperature: Optional[float], max_tokens: Optional[int],
+             response_format: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        if self.mode == "off" or (self.mode == "deterministic" and temperature != 0):
+            self.cache.record_bypass()
+            return None
+        return cache_key(model, temperature, max_tokens, messages, response_format)
+
+    def complete(self, messages: List[Dict[str, str]], model: str,
+                 temperature: Optional[float] = None,
+                 max_tokens: Optional[int] = None,
+                 response_format: Optional[Dict[str, Any]] = None) -> LLMResponse:
+        key = self._key(messages, model, temperature, max_tokens, response_format)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        response = self.backend.complete(messages, model, temperature, max_tokens, response_format)
+        if key is not None:
+            self.cache.put(key, response)
+        return response
+
+    async def acomplete(self, messages: List[Dict[str, str]], model: str,
+                        temperature: Optional[float] = None,
+                        max_tokens: Optional[int] = None,
+                        response_format: Optional[Dict[str, Any]] = None) -> LLMResponse:
+        key = self._key(messages, model, temperature, max_tokens, response_format)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        response = await self.backend.acomplete(messages, model, temperature, max_tokens, response_format)
+        if key is not None:
+            self.cache.put(key, response)
+        return response
+
+    def stream(self, messages: List[Dict[str, str]], model: str,
+               temperature: Optional[float] = None,
+               max_tokens: Optional[int] = None,
+               response_format: Optional[Dict[str, Any]] = None) -> Generator[str, None, LLMResponse]:
+        key = self._key(messages, model, temperature, max_tokens, response_format)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                if cached.content:
+                    yield cached.content
+                return cached
+        response = yield from self.backend.stream(messages, model, temperature, max_tokens, response_format)
+        if key is not None:
+            self.cache.put(key, response)
+        return response
+
+
+_caches: Dict[Tuple[Optional[str], Optional[float]], ResponseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_response_cache(path: Optional[str] = None, ttl: Optional[float] = None) -> ResponseCache:
+    """Return the process-wide cache for this storage path, so all debates share hits"""
+    with _caches_lock:
+        cache = _caches.get((path, ttl))
+        if cache is None:
+            cache = ResponseCache(path=path, ttl=ttl)
+            _caches[(path, ttl)] = cache
+        return cache
@@ -0,0 +1,312 @@
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import os
+import re
+import threading
+import zlib
+
+try:
+    import numpy as np
+except ImportError:  # The cache is then disabled; see get_semantic_cache
+    np = None
+
+
+CACHE_KINDS = ('context', 'fact_check')  # Context gathering by position, fact checks by claim
+
+_WORD = re.compile(r"\w+")
+# Normalized text keeps what the guard looks at, so "45%" / "45" and "didn't" / "did" stay distinct texts
+_NORMALIZED_TOKEN = re.compile(r"\d+(?:[.,]\d+)*%?|\w+(?:'\w+)?")
+# Numbers and negations must agree for a hit; otherwise "45%" matches "54%" and "ban" matches "do not ban"
+_GUARD = re.compile(
+    r"\d+(?:[.,]\d+)*%?|\b(?:not|no|never|none|nor|without|against|anti|oppose[sd]?)\b|n't\b",
+    re.IGNORECASE
+)
+_STOPWORDS = frozenset(
+    "a an the of to in on for by with and or is are be been being was were should would will shall "
+    "can could must may might that this these those it its we our they their there as at from which who".split()
+)
+_WORD_WEIGHT = 1.0
+_BIGRAM_WEIGHT = 1.5  # Word order: "more harm than good" is not "more good than harm"
+_TRIGRAM_WEIGHT = 0.5  # Character trigrams match inflections: "expand" / "expanded"
+
+
+class HashedNgramEmbedder:
+    """
+    Embeds text as a signed feature-hashing vector of its content words, word bigrams
+    and character trigrams, L2-normalized so a dot product is the cosine similarity.
+    Deterministic across processes (crc32, not hash()), so persisted entries stay valid.
+    """
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+
+    @staticmethod
+    def features(text: str) -> List[Tuple[str, float]]:
+        words = [word for word in _WORD.findall(text.lower()) if word not in _STOPWORDS]
+        features = [(word, _WORD_WEIGHT) for word in words]
+        features += [(f"{first} {second}", _BIGRAM_WEIGHT) for first, second in zip(words, words[1:])]
+        for word in words:
+            padded = f"<{word}>"
+            features += [(padded[i:i + 3], _TRIGRAM_WEIGHT) for i in range(len(padded) - 2)]
+        return features
+
+    def embed(self, text: str) -> "np.ndarray":
+        features = self.features(text)
+        vector = np.zeros(self.dim, dtype=np.float32)
+        if not features:
+            return vector
+        hashes = np.fromiter((zlib.crc32(feature.encode("utf-8")) for feature, _ in features),
+                             dtype=np.uint32, count=len(features))
+        weights = np.fromiter((weight for _, weight in features), dtype=np.float64, count=len(features))
+        signs = np.where(hashes >> 31, 1.0, -1.0)
+        vector[:] = np.bincount(hashes % self.dim, weights=signs * weights, minlength=self.dim)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+def guard_signature(text: str) -> str:
+    """The numbers and negations of a text, which a near-duplicate must share exactly"""
+    return " ".join(sorted({token.lower() for token in _GUARD.findall(text)}))
+
+
+@dataclass
+class SemanticCacheStats:
+    lookups: int = 0
+    hits: int = 0
+    exact_hits: int = 0  # Hits on the same normalized text
+    guarded_misses: int = 0  # Similar enough, but numbers or negations differed
+    stores: int = 0
+    evictions: int = 0
+    hit_similarity: float = 0.0  # Sum over hits, for the mean
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+
+class _Index:
+    """The vectors and values of one (kind, model), least recently used evicted past its bounds"""
+
+    def __init__(self, dim: int, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0  # Payload bytes
+        self._vectors = np.zeros((min(64, max_entries), dim), dtype=np.float32)
+        self._last_used = np.zeros(len(self._vectors), dtype=np.int64)
+        self._texts: List[str] = []
+        self._guards: List[str] = []
+        self._values: List[str] = []
+        self._rows: Dict[str, int] = {}  # Normalized text -> row
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def search(self, text: str, vector: "np.ndarray", guard: str, threshold: float,
+               tick: int, stats: SemanticCacheStats) -> Optional[str]:
+        row = self._rows.get(text)
+        similarity = 1.0
+        if row is not None:
+            stats.exact_hits += 1
+        elif self._texts:
+            similarities = self._vectors[:len(self._texts)] @ vector
+            candidates = np.flatnonzero(similarities >= threshold)
+            # Most similar first; the first whose numbers and negations agree wins
+            for candidate in candidates[np.argsort(-similarities[candidates])]:
+                if self._guards[candidate] == guard:
+                    row, similarity = int(candidate), float(similarities[candidate])
+                    break
+            if row is None and len(candidates):
+                stats.guarded_misses += 1
+        if row is None:
+            return None
+        self._last_used[row] = tick
+        stats.hits += 1
+        stats.hit_similarity += similarity
+        return self._values[row]
+
+    def add(self, text: str, vector: "np.ndarray", guard: str, value: str, tick: int, stats: SemanticCacheStats):
+        row = self._rows.get(text)
+        if row is not None:
+            self.size += len(value) - len(self._values[row])
+            self._values[row] = value
+        else:
+            row = len(self._texts)
+            if row == len(self._vectors):
+                self._grow()
+            self._texts.append(text)
+            self._guards.append(guard)
+            self._values.append(value)
+            self._rows[text] = row
+            self._vectors[row] = vector
+            self.size += len(value)
+        self._last_used[row] = tick
+        while len(self._texts) > 1 and (len(self._texts) > self.max_entries or self.size > self.max_bytes):
+            self._evict(int(np.argmin(self._last_used[:len(self._texts)])))
+            stats.evictions += 1
+
+    def _grow(self):
+        capacity = min(self.max_entries + 1, len(self._vectors) * 2)
+        vectors = np.zeros((capacity, self._vectors.shape[1]), dtype=np.float32)
+        vectors[:len(self._vectors)] = self._vectors
+        last_used = np.zeros(capacity, dtype=np.int64)
+        last_used[:len(self._last_used)] = self._last_used
+        self._vectors, self._last_used = vectors, last_used
+
+    def _evict(self, row: int):
+        """Remove a row by moving the last row into its place"""
+        last = len(self._texts) - 1
+        del self._rows[self._texts[row]]
+        self.size -= len(self._values[row])
+        if row != last:
+            self._vectors[row] = self._vectors[last]
+            self._last_used[row] = self._last_used[last]
+            self._texts[row], self._guards[row], self._values[row] = self._texts[last], self._guards[last], self._values[last]
+            self._rows[self._texts[row]] = row
+        self._texts.pop()
+        self._guards.pop()
+        self._values.pop()
+
+    def entries(self) -> List[Tuple[int, str, str]]:
+        """(last used, text, value) of every entry"""
+        return [(int(self._last_used[row]), text, self._values[row]) for row, text in enumerate(self._texts)]
+
+
+class SemanticCache:
+    """
+    Near-duplicate cache of LLM results keyed by the varying part of a prompt (a position,
+    a claim), for reuse when the same question comes back in different words. Lookups
+    compare hashed n-gram vectors by cosine similarity, so they catch rewordings, changed
+    inflections and punctuation, not paraphrases in different vocabulary. Each (kind, model)
+    index holds at most max_entries entries and max_bytes of values. With a path, every
+    store is appended to a JSON lines file, which is replayed and compacted on load.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 2048,
+                 max_bytes: int = 16 * 1024 * 1024, dim: int = 1024):
+        if np is None:
+            raise ImportError("SemanticCache requires the 'numpy' package")
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.embedder = HashedNgramEmbedder(dim)
+        self._indexes: Dict[Tuple[str, str], _Index] = {}
+        self._stats: Dict[str, SemanticCacheStats] = {kind: SemanticCacheStats() for kind in CACHE_KINDS}
+        self._tick = 0
+        self._lines = 0  # Lines in the file, replaced entries included
+        self._lock = threading.Lock()
+        if path:
+            self._load(path)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(_NORMALIZED_TOKEN.findall(text.lower()))
+
+    def _index(self, kind: str, model: str) -> _Index:
+        if kind not in CACHE_KINDS:
+            raise ValueError(f"Unknown semantic cache kind: {kind}")
+        index = self._indexes.get((kind, model))
+        if index is None:
+            index = self._indexes[(kind, model)] = _Index(self.embedder.dim, self.max_entries, self.max_bytes)
+        return index
+
+    def get(self, kind: str, model: str, text: str, threshold: float = 0.85) -> Optional[str]:
+        """The value stored for the most similar text at or above threshold, if any"""
+        vector = self.embedder.embed(text)
+        guard = guard_signature(text)
+        with self._lock:
+            self._tick += 1
+            stats = self._stats[kind]
+            stats.lookups += 1
+            return self._index(kind, model).search(self.normalize(text), vector, guard, threshold, self._tick, stats)
+
+    def put(self, kind: str, model: str, text: str, value: str):
+        vector = self.embedder.embed(text)
+        with self._lock:
+            self._add(kind, model, text, vector, value)
+            if self.path:
+                self._append({"kind": kind, "model": model, "text": text, "value": value})
+
+    def _add(self, kind: str, model: str, text: str, vector: "np.ndarray", value: str):
+        self._tick += 1
+        stats = self._stats[kind]
+        stats.stores += 1
+        self._index(kind, model).add(self.normalize(text), vector, guard_signature(text), value, self._tick, stats)
+
+    def _append(self, record: Dict[str, str]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._lines += 1
+        if self._lines > 2 * self._entry_count() + 64:
+            self._compact()
+
+    def _entry_count(self) -> int:
+        return sum(len(index) for index in self._indexes.values())
+
+    def _load(self, path: str):
+        if not os.path.exists(path):
+            return
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    self._add(record["kind"], record["model"], record["text"],
+                              self.embedder.embed(record["text"]), record["value"])
+                except (json.JSONDecodeError, KeyError, ValueError):
+                    continue  # A torn last line from a crash mid-write
+                self._lines += 1
+        # Entries replayed from disk are not this process's stores
+        for stats in self._stats.values():
+            stats.stores = stats.evictions = 0
+        if self._lines > self._entry_count():
+            self._compact()
+
+    def _compact(self):
+        """Rewrite the file with only the live entries, least recently used first, atomically"""
+        records = []
+        for (kind, model), index in self._indexes.items():
+            records += [(last_used, kind, model, text, value) for last_used, text, value in index.entries()]
+        records.sort()
+        target = Path(self.path)
+        temporary = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        with open(temporary, "w", encoding="utf-8") as f:
+            for _, kind, model, text, value in records:
+                f.write(json.dumps({"kind": kind, "model": model, "text": text, "value": value}, ensure_ascii=False) + "\n")
+        os.replace(temporary, target)
+        self._lines = len(records)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {}
+            for kind, entry in self._stats.items():
+                stats[kind] = {
+                    **asdict(entry),
+                    "hit_rate": entry.hit_rate,
+                    "mean_hit_similarity": entry.hit_similarity / entry.hits if entry.hits else 0.0,
+                    "entries": sum(len(index) for (k, _), index in self._indexes.items() if k == kind)
+                }
+            stats["bytes"] = sum(index.size for index in self._indexes.values())
+        return stats
+
+
+_caches: Dict[Optional[str], SemanticCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_semantic_cache(path: Optional[str] = None) -> Optional[SemanticCache]:
+    """Process-wide cache for this storage path, so all debates share hits; None when numpy is not installed"""
+    if np is None:
+        return None
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = _caches[path] = SemanticCache(path)
+        return cache
+
+
+def get_semantic_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats of every semantic cache in use, by storage path ('memory' for in-memory only)"""
+    with _caches_lock:
+        caches = dict(_caches)
+    return {path or "memory": cache.get_stats() for path, cache in caches.items()}
@@ -0,0 +1,492 @@
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable, Dict, Generator, List, Optional, Tuple
+import json
+import re
+import threading
+from debate_evaluation import CRITERIA
+
+
+STRUCTURED_OUTPUT_MODES = ("json_schema", "json_object", "off")
+
+# Sends a prompt with an optional response_format and returns the completion text
+StructuredQuery = Callable[[str, Optional[Dict[str, Any]]], Optional[str]]
+AsyncStructuredQuery = Callable[[str, Optional[Dict[str, Any]]], Awaitable[Optional[str]]]
+
+_STRUCTURAL = re.compile(r'["\\{}\[\],]')
+_TRAILING_COMMA = re.compile(r',\s*([}\]])')
+_CLOSERS = {"{": "}", "[": "]"}
+_TOP_LEVEL_KEY = re.compile(r"^\$\.(\w+)")
+_INVALID = object()
+
+
+class OutputSchema:
+    """A named JSON schema that a structured LLM response is conformed to"""
+
+    def __init__(self, name: str, schema: Dict[str, Any]):
+        self.name = name
+        self.schema = schema
+
+    def response_format(self, mode: str) -> Optional[Dict[str, Any]]:
+        """The response_format request parameter for a structured output mode"""
+        if mode == "json_schema":
+            return {"type": "json_schema", "json_schema": {"name": self.name, "schema": self.schema, "strict": True}}
+        if mode == "json_object":
+            return {"type": "json_object"}
+        if mode == "off":
+            return None
+        raise ValueError(f"Unknown structured output mode: {mode}")
+
+    def subset(self, keys: List[str]) -> "OutputSchema":
+        """The schema of an object restricted to some of its properties"""
+        properties = self.schema["properties"]
+        return OutputSchema(self.name, {
+            **self.schema,
+            "properties": {key: properties[key] for key in keys},
+            "required": [key for key in self.schema.get("required", []) if key in keys]
+        })
+
+    def skeleton(self) -> str:
+        """A template of the expected JSON for prompts, e.g. {"clarity": <integer 1-5>}"""
+        return _skeleton(self.schema, "")
+
+    def conform(self, value: Any) -> Tuple[Any, List[str]]:
+        """
+        Coerce a parsed value towards the schema, returning it with the violations left.
+        Numeric strings become numbers and unknown object keys are dropped; missing
+        required keys, wrong types and out of range values are reported by JSON path.
+        """
+        errors: List[str] = []
+        return _conform(value, self.schema, "$", errors), errors
+
+
+def _skeleton(schema: Dict[str, Any], indent: str) -> str:
+    kind = schema.get("type")
+    if kind == "object":
+        inner = indent + "    "
+        members = ",\n".join(f'{inner}"{key}": {_skeleton(sub, inner)}' for key, sub in schema["properties"].items())
+        return "{\n" + members + "\n" + indent + "}"
+    if kind == "array":
+        return f"[{_skeleton(schema.get('items', {}), indent)}, ...]"
+    if "minimum" in schema and "maximum" in schema:
+        return f"<{kind} {schema['minimum']}-{schema['maximum']}>"
+    return f"<{kind or 'value'}>"
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        try:
+            number = float(value.strip())
+        except ValueError:
+            return None
+        return int(number) if number.is_integer() else number
+    return None
+
+
+def _conform(value: Any, schema: Dict[str, Any], path: str, errors: List[str]) -> Any:
+    kind = schema.get("type")
+    if kind == "object":
+        if not isinstance(value, dict):
+            errors.append(f"{path}: expected an object")
+            return value
+        result = {}
+        required = schema.get("required", ())
+        for key, sub in schema.get("properties", {}).items():
+            if key in value:
+                result[key] = _conform(value[key], sub, f"{path}.{key}", errors)
+            elif key in required:
+                errors.append(f"{path}.{key}: missing")
+        return result
+    if kind == "array":
+        # A lone value where a list was asked for is taken as a one-item list
+        items = value if isinstance(value, list) else [value]
+        return [_conform(item, schema.get("items", {}), f"{path}[{i}]", errors) for i, item in enumerate(items)]
+    if kind in ("integer", "number"):
+        number = _number(value)
+        if number is None or (kind == "integer" and number != int(number)):
+            errors.append(f"{path}: expected {'an integer' if kind == 'integer' else 'a number'}")
+            return value
+        if kind == "integer":
+            number = int(number)
+        if number < schema.get("minimum", number) or number > schema.get("maximum", number):
+            errors.append(f"{path}: {number} is outside {schema['minimum']}-{schema['maximum']}")
+        return number
+    if kind == "string":
+        if isinstance(value, (dict, list)) or value is None:
+            errors.append(f"{path}: expected a string")
+            return value
+        return value if isinstance(value, str) else str(value)
+    return value
+
+
+def _loads(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    try:
+        return json.loads(_TRAILING_COMMA.sub(r"\1", text))
+    except json.JSONDecodeError:
+        return _INVALID
+
+
+class JSONExtractor:
+    """
+    Incremental scanner for the first JSON value in LLM output that may be wrapped in
+    code fences or prose, or cut off mid-value. Only structural characters are visited,
+    through one regex, and chunks are joined once, when the value is read. Feed stream
+    chunks as they arrive; feed returns True once the value is complete, so the rest of
+    the stream need not be waited for.
+    """
+
+    def __init__(self, openers: str = "{["):
+        self.openers = openers
+        self._chunks: List[str] = []
+        self._length = 0
+        self._start = -1
+        self._end = -1
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escaped = -1  # Position of the character after a backslash inside a string
+        self._cut = -1  # End of the last complete member, where a truncated value can be closed
+        self._cut_stack: Tuple[str, ...] = ()
+
+    @property
+    def complete(self) -> bool:
+        return self._end != -1
+
+    def feed(self, chunk: str) -> bool:
+        if chunk and self._end == -1:
+            self._scan(chunk, self._length)
+        self._chunks.append(chunk)
+        self._length += len(chunk)
+        return self._end != -1
+
+    def _scan(self, chunk: str, base: int):
+        position = 0
+        if self._start == -1:
+            found = [index for index in (chunk.find(opener) for opener in self.openers) if index != -1]
+            if not found:
+                return
+            position = min(found)
+            self._start = base + position
+            self._stack.append(chunk[position])
+            position += 1
+        for match in _STRUCTURAL.finditer(chunk, position):
+            index = base + match.start()
+            char = match.group()
+            if self._in_string:
+                if index == self._escaped:
+                    continue
+                if char == "\\":
+                    self._escaped = index + 1
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{" or char == "[":
+                self._stack.append(char)
+            elif char == "}" or char == "]":
+                self._stack.pop()
+                if not self._stack:
+                    self._end = index + 1
+                    return
+                self._cut, self._cut_stack = index + 1, tuple(self._stack)
+            else:
+                self._cut, self._cut_stack = index, tuple(self._stack)
+
+    def _parse(self, text: str) -> Tuple[Any, str]:
+        if self._end != -1:
+            parsed = _loads(text[self._start:self._end])
+            if parsed is _INVALID:
+                return None, "invalid"
+            clean = not text[:self._start].strip() and not text[self._end:].strip()
+            return parsed, "json" if clean else "extracted"
+
+        # Cut off: close what is open, else drop the unfinished member and close the rest
+        closing = "".join(_CLOSERS[opener] for opener in reversed(self._stack))
+        parsed = _loads(text[self._start:] + ('"' if self._in_string else "") + closing)
+        if parsed is _INVALID and self._cut != -1:
+            closing = "".join(_CLOSERS[opener] for opener in reversed(self._cut_stack))
+            parsed = _loads(text[self._start:self._cut] + closing)
+        if parsed is _INVALID:
+            return None, "invalid"
+        return parsed, "truncated"
+
+    def value(self) -> Tuple[Any, str]:
+        """
+        The first value that parses, and how it was found: 'json' when the text was
+        nothing else, 'extracted' from fences or prose, 'truncated' when closed after
+        a cut-off, or 'none' (with None) when there is no JSON to be had
+        """
+        text = "".join(self._chunks)
+        scanner, skipped = self, False
+        while scanner._start != -1:
+            parsed, how = scanner._parse(text)
+            if how != "invalid":
+                return parsed, "extracted" if skipped and how == "json" else how
+            # A bracket in prose rather than JSON; try the next candidate
+            text, skipped = text[scanner._start + 1:], True
+            scanner = JSONExtractor(self.openers)
+            scanner.feed(text)
+        return None, "none"
+
+
+def extract_json(text: Optional[str], openers: str = "{[") -> Tuple[Any, str]:
+    """The first JSON value (starting with one of `openers`) in text; see JSONExtractor.value"""
+    extractor = JSONExtractor(openers)
+    extractor.feed(text or "")
+    return extractor.value()
+
+
+@dataclass
+class StructuredOutputStats:
+    requests: int = 0
+    parsed: int = 0  # Valid as returned
+    extracted: int = 0  # Valid once code fences or surrounding prose were stripped
+    truncated: int = 0  # Valid once a cut-off response was closed
+    repaired: int = 0  # Valid after repair re-asks
+    failed: int = 0
+    repair_calls: int = 0
+    targeted_repairs: int = 0  # Repair calls asking only for the missing or invalid fields
+    format_fallbacks: int = 0  # response_format rejected by the provider and retried in a weaker mode
+
+
+_stats: Dict[str, StructuredOutputStats] = {}
+_stats_lock = threading.Lock()
+
+
+def _record(schema_name: str, **counts: int):
+    with _stats_lock:
+        stats = _stats.setdefault(schema_name, StructuredOutputStats())
+        for name, count in counts.items():
+            setattr(stats, name, getattr(stats, name) + count)
+
+
+def get_structured_output_stats() -> Dict[str, Dict[str, Any]]:
+    """Per-schema parse counts with the share of requests that ended valid, and valid without a repair"""
+    with _stats_lock:
+        stats = {name: asdict(entry) for name, entry in _stats.items()}
+    for entry in stats.values():
+        requests = entry["requests"] or 1
+        entry["success_rate"] = (entry["requests"] - entry["failed"]) / requests
+        entry["first_pass_rate"] = (entry["parsed"] + entry["extracted"] + entry["truncated"]) / requests
+    return stats
+
+
+def reset_structured_output_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+@dataclass
+class StructuredResult:
+    value: Any  # Conformed to the schema; may be partial or None when errors remain
+    errors: List[str]
+    how: str  # 'json', 'extracted', 'truncated', 'repaired' or 'failed'
+    raw: Optional[str]  # The last response text
+    repairs: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+def _read(text: Optional[str], schema: OutputSchema) -> Tuple[Any, List[str], str]:
+    parsed, how = extract_json(text, "{" if schema.schema.get("type") == "object" else "[")
+    if how == "none":
+        return None, ["$: no JSON found in the response"], how
+    value, errors = schema.conform(parsed)
+    return value, errors, how
+
+
+def _repairable_keys(value: Any, errors: List[str]) -> List[str]:
+    """Top-level keys to re-ask for, or none when the errors are not confined to fields"""
+    if not isinstance(value, dict):
+        return []
+    keys = []
+    for error in errors:
+        match = _TOP_LEVEL_KEY.match(error)
+        if match is None:
+            return []
+        if match.group(1) not in keys:
+            keys.append(match.group(1))
+    return keys
+
+
+def _field_repair_prompt(prompt: str, subset: OutputSchema, errors: List[str]) -> str:
+    return f"""{prompt}
+
+        Your previous answer had missing or invalid fields ({'; '.join(errors)}).
+        Respond with only a JSON object with these fields:
+        {subset.skeleton()}
+        """
+
+
+def _full_repair_prompt(prompt: str, schema: OutputSchema, errors: List[str]) -> str:
+    return f"""{prompt}
+
+        Your previous answer could not be used ({'; '.join(errors)}).
+        Respond with only a JSON object of this form:
+        {schema.skeleton()}
+        """
+
+
+def _exchange(prompt: str, schema: OutputSchema,
+              max_repairs: int) -> Generator[Tuple[str, OutputSchema], Optional[str], StructuredResult]:
+    """
+    The request/response protocol shared by the sync and async drivers: yields
+    (prompt, schema) requests, receives the response texts and returns the result.
+    A response with only some fields missing or invalid is repaired by asking for
+    just those fields and merging them in, rather than regenerating the whole answer.
+    """
+    response = yield prompt, schema
+    value, errors, how = _read(response, schema)
+    repairs = targeted = 0
+    while errors and repairs < max_repairs:
+        repairs += 1
+        keys = _repairable_keys(value, errors)
+        if keys:
+            targeted += 1
+            subset = schema.subset(keys)
+            response = yield _field_repair_prompt(prompt, subset, errors), subset
+            patch, _, _ = _read(response, subset)
+            value, errors = schema.conform({**value, **(patch if isinstance(patch, dict) else {})})
+        else:
+            response = yield _full_repair_prompt(prompt, schema, errors), schema
+            value, errors, _ = _read(response, schema)
+
+    if errors:
+        how = "failed"
+    elif repairs:
+        how = "repaired"
+    _record(
+        schema.name, requests=1, repair_calls=repairs, targeted_repairs=targeted,
+        parsed=int(how == "json"), extracted=int(how == "extracted"), truncated=int(how == "truncated"),
+        repaired=int(how == "repaired"), failed=int(how == "failed")
+    )
+    return StructuredResult(value, errors, how, response, repairs)
+
+
+# How providers phrase a rejected response_format, e.g. "'response_format' of type 'json_schema' is not supported"
+_RESPONSE_FORMAT_ERROR = re.compile(r"response_format|json_schema|json_object|structured output|\bschema\b", re.IGNORECASE)
+
+
+def _weaker_mode(mode: str, error: Exception) -> Optional[str]:
+    """
+    The mode to retry in when the provider rejected the response_format, if any. Other
+    400s (context length, bad parameters) would fail the same way, so they are not retried.
+    """
+    if mode == "off" or getattr(error, "status_code", None) != 400:
+        return None
+    messages = [str(error), str(error.__cause__ or "")]
+    if not any(_RESPONSE_FORMAT_ERROR.search(message) for message in messages):
+        return None
+    return STRUCTURED_OUTPUT_MODES[STRUCTURED_OUTPUT_MODES.index(mode) + 1]
+
+
+def request_structured(query: StructuredQuery, prompt: str, schema: OutputSchema,
+                       mode: str = "json_schema", max_repairs: int = 1) -> StructuredResult:
+    """
+    Ask for a JSON response conforming to a schema
+    Args:
+        query (callable): Sends (prompt, response_format) to the LLM and returns the text
+        prompt (str): The prompt, which should describe the expected JSON (see OutputSchema.skeleton)
+        schema (OutputSchema): The expected response
+        mode (str): 'json_schema' constrains decoding to the schema, 'json_object' to any JSON,
+            'off' relies on the prompt alone; providers rejecting a mode get the next weaker one
+        max_repairs (int): Follow-up calls allowed to fix an invalid response
+    Returns:
+        StructuredResult: Check .ok before using .value
+    """
+    schema.response_format(mode)
+    exchange = _exchange(prompt, schema, max_repairs)
+    request = next(exchange)
+    while True:
+        request_prompt, request_schema = request
+        try:
+            response = query(request_prompt, request_schema.response_format(mode))
+        except Exception as error:
+            fallback = _weaker_mode(mode, error)
+            if fallback is None:
+                raise
+            _record(schema.name, format_fallbacks=1)
+            mode = fallback
+            continue
+        try:
+            request = exchange.send(response)
+        except StopIteration as done:
+            return done.value
+
+
+async def arequest_structured(query: AsyncStructuredQuery, prompt: str, schema: OutputSchema,
+                              mode: str = "json_schema", max_repairs: int = 1) -> StructuredResult:
+    """Async counterpart of request_structured"""
+    schema.response_format(mode)
+    exchange = _exchange(prompt, schema, max_repairs)
+    request = next(exchange)
+    while True:
+        request_prompt, request_schema = request
+        try:
+            response = await query(request_prompt, request_schema.response_format(mode))
+        except Exception as error:
+            fallback = _weaker_mode(mode, error)
+            if fallback is None:
+                raise
+            _record(schema.name, format_fallbacks=1)
+            mode = fallback
+            continue
+        try:
+            request = exchange.send(response)
+        except StopIteration as done:
+            return done.value
+
+
+def _ratings_schema() -> Dict[str, Any]:
+    return {
+        "type": "object",
+        "properties": {name: {"type": "integer", "minimum": 1, "maximum": 5} for name in CRITERIA},
+        "required": list(CRITERIA),
+        "additionalProperties": False
+    }
+
+
+def _list_of(item_schema: Dict[str, Any]) -> Dict[str, Any]:
+    return {"type": "array", "items": item_schema}
+
+
+EVALUATION_SCHEMA = OutputSchema("argument_evaluation", _ratings_schema())
+
+# Many arguments rated in one call; see batch_evaluation.BatchEvaluator
+BATCH_EVALUATION_SCHEMA = OutputSchema("batch_evaluation", {
+    "type": "object",
+    "properties": {"evaluations": _list_of({
+        **_ratings_schema(),
+        "properties": {"id": {"type": "string"}, **_ratings_schema()["properties"]},
+        "required": ["id", *CRITERIA]
+    })},
+    "required": ["evaluations"],
+    "additionalProperties": False
+})
+
+ROUND_EVALUATION_SCHEMA = OutputSchema("round_evaluation", {
+    "type": "object",
+    "properties": {"pro": _ratings_schema(), "against": _ratings_schema()},
+    "required": ["pro", "against"],
+    "additionalProperties": False
+})
+
+FACT_CHECK_SCHEMA = OutputSchema("fact_check", {
+    "type": "object",
+    "properties": {
+        "claims": _list_of({"type": "string"}),
+        "confidence_scores": _list_of({"type": "number", "minimum": 1, "maximum": 5}),
+        "evidence": _list_of({"type": "string"}),
+        "context_notes": _list_of({"type": "string"})
+    },
+    "required": ["claims", "confidence_scores", "evidence", "context_notes"],
+    "additionalProperties": False
+})
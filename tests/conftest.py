@@ -0,0 +1,19 @@
+import logging
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DebateLogger import close_log_writers  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_cwd(tmp_path, monkeypatch):
+    """Run every test in its own directory, so default log files stay out of the repo"""
+    monkeypatch.chdir(tmp_path)
+    logging.disable(logging.CRITICAL)
+    yield tmp_path
+    close_log_writers()
+    logging.disable(logging.NOTSET)
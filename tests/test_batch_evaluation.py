@@ -0,0 +1,59 @@
+import json
+import re
+
+from batch_evaluation import BatchEvaluator, EvaluationItem
+from debate_evaluation import CRITERIA, ArgumentQuality
+
+
+def _ratings(value):
+    return {name: value for name in CRITERIA}
+
+
+def _ids(prompt):
+    return re.findall(r"### ARGUMENT id=(\S+)", prompt)
+
+
+def test_batch_request_sends_the_batch_schema():
+    formats = []
+
+    def query(prompt, max_tokens, response_format):
+        formats.append(response_format)
+        return json.dumps({"evaluations": [{"id": item_id, **_ratings(4)} for item_id in _ids(prompt)]})
+
+    evaluator = BatchEvaluator(query, "gpt-4")
+    results = evaluator.evaluate([EvaluationItem("a", "First"), EvaluationItem("b", "Second")])
+
+    assert set(results) == {"a", "b"}
+    assert formats[0]["type"] == "json_schema"
+    assert formats[0]["json_schema"]["name"] == "batch_evaluation"
+    assert evaluator.get_stats()["requests"] == 1
+
+
+def test_out_of_range_ratings_are_asked_again():
+    prompts = []
+
+    def query(prompt, max_tokens, response_format):
+        prompts.append(_ids(prompt))
+        # The first answer rates "b" out of range; the retry gets it right
+        value = {"a": 4, "b": 9} if len(prompts) == 1 else {"b": 2}
+        return json.dumps({"evaluations": [{"id": item_id, **_ratings(value[item_id])} for item_id in _ids(prompt)]})
+
+    evaluator = BatchEvaluator(query, "gpt-4", mode="off")
+    results = evaluator.evaluate([EvaluationItem("a", "First"), EvaluationItem("b", "Second")])
+
+    assert prompts == [["a", "b"], ["b"]]
+    assert results["b"].clarity is ArgumentQuality.NEEDS_IMPROVEMENT
+    assert evaluator.get_stats()["retried_items"] == 1
+    assert evaluator.get_stats()["defaulted_items"] == 0
+
+
+def test_missing_ratings_default_after_one_retry():
+    def query(prompt, max_tokens, response_format):
+        return json.dumps({"evaluations": [{"id": item_id, "clarity": 5} for item_id in _ids(prompt)]})
+
+    evaluator = BatchEvaluator(query, "gpt-4", mode="json_object")
+    results = evaluator.evaluate([EvaluationItem("a", "First")])
+
+    assert results["a"].clarity is ArgumentQuality.SATISFACTORY
+    assert evaluator.get_stats()["requests"] == 2
+    assert evaluator.get_stats()["defaulted_items"] == 1
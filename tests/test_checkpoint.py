@@ -0,0 +1,69 @@
+import asyncio
+from dataclasses import replace
+
+import pytest
+
+from AsyncDebateOrchestration import AsyncDebateModeration
+from config import DebateConfig
+from debate_checkpoint import CHECKPOINT_VERSION, load_checkpoint, save_checkpoint
+from DebateOrchestration import DebateModeration
+from llm_backend import SimulatedBackend
+
+CONFIG = DebateConfig(topic="Congestion pricing", pro_position="Price it", against_position="Keep roads free",
+                      backend="simulated", rounds=3, checkpoint_path="debate.ckpt")
+
+
+def _interrupted(config, completed_rounds):
+    debate = DebateModeration(config)
+    rounds = debate.run_rounds()
+    played = [next(rounds) for _ in range(completed_rounds)]
+    rounds.close()  # The process dies before the next round is checkpointed
+    return debate, played
+
+
+def test_checkpoint_round_trips_through_disk():
+    debate, played = _interrupted(CONFIG, 2)
+    checkpoint = load_checkpoint("debate.ckpt")
+
+    assert checkpoint.next_round == 2
+    assert checkpoint.rounds() == played
+    assert checkpoint.debate_id == debate.debate_id
+    assert len(checkpoint.usage) == debate.get_token_usage()["calls"]
+
+    save_checkpoint(checkpoint, "copy.ckpt")
+    assert load_checkpoint("copy.ckpt") == checkpoint
+
+
+def test_resume_continues_without_repeating_calls():
+    debate, played = _interrupted(CONFIG, 2)
+    calls_before = debate.get_token_usage()["calls"]
+    backend = SimulatedBackend()
+
+    resumed = DebateModeration.resume("debate.ckpt", backend)
+    assert backend.calls == 0  # Context gathering is not repeated
+    assert resumed.pro_agent.context == debate.pro_agent.context
+    rest = list(resumed.run_rounds())
+
+    assert [result["round"] for result in rest] == [2, 3]
+    # Only the two resumed rounds hit the backend; the ledger carries the earlier calls over
+    assert resumed.get_token_usage()["calls"] == calls_before + backend.calls
+    assert load_checkpoint("debate.ckpt").rounds() == played + rest
+
+
+def test_resume_overrides_config_and_runs_async():
+    _interrupted(replace(CONFIG, rounds=1), 2)
+
+    async def run():
+        resumed = AsyncDebateModeration.resume("debate.ckpt", rounds=2)
+        return [result async for result in resumed.arun_rounds()]
+
+    assert [result["round"] for result in asyncio.run(run())] == [2]
+
+
+def test_unknown_checkpoint_versions_are_rejected():
+    _interrupted(CONFIG, 1)
+    checkpoint = replace(load_checkpoint("debate.ckpt"), version=CHECKPOINT_VERSION + 1)
+    save_checkpoint(checkpoint, "future.ckpt")
+
+    with pytest.raises(ValueError, match="version"):
+        load_checkpoint("future.ckpt")
@@ -0,0 +1,73 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from debate_evaluation import CRITERIA, EvaluationCriteria  # noqa: E402
+from evaluation_store import EvaluationStore  # noqa: E402
+
+
+def _ratings(value):
+    return {name: value for name in CRITERIA}
+
+
+def _store():
+    """Two debates: 'Ban cars' beats 'Keep cars' twice, then they tie once"""
+    store = EvaluationStore(capacity=2)
+    for debate_id, round_number, pro, against in (("d1", 1, 5, 2), ("d1", 2, 4, 3), ("d2", 1, 3, 3)):
+        store.add_ratings([_ratings(pro), _ratings(against)], [debate_id] * 2, [round_number] * 2,
+                          ["pro", "against"], ["Ban cars", "Keep cars"])
+    return store
+
+
+def test_aggregates_group_rows_by_column():
+    store = _store()
+    by_side = store.aggregates(by='side')
+
+    assert len(store) == 6
+    assert by_side["pro"]["count"] == 3
+    assert by_side["pro"]["score"] == pytest.approx(4.0)
+    assert by_side["against"]["criteria"]["clarity"] == {
+        "mean": pytest.approx(8 / 3), "std": pytest.approx(np.std([2, 3, 3])), "min": 2, "max": 3
+    }
+    assert store.aggregates(by='round')[2]["score"] == pytest.approx(3.5)
+    assert store.aggregates(by=None, mask=store.mask(debate_id="d2"))["all"]["count"] == 2
+
+
+def test_scores_match_calculate_score_and_honour_weights():
+    store = EvaluationStore()
+    evaluation = EvaluationCriteria.from_ratings({**_ratings(3), "clarity": 5})
+    store.add(evaluation, "d1", 1, "pro", source='self')
+
+    assert store.scores()[0] == pytest.approx(evaluation.calculate_score())
+    assert store.scores({"clarity": 1.0})[0] == pytest.approx(5.0)
+    assert store.mask(source='batch').sum() == 0
+
+
+def test_elo_applies_matches_in_order():
+    store = _store()
+    names, first, second, outcome = store.matches()
+
+    assert names == ["Ban cars", "Keep cars"]
+    assert outcome.tolist() == [1.0, 1.0, 0.5]
+    # Two wins from 1500 each, with k=16: +8 then +7.63; the tie moves the leader back down
+    elo = store.elo()
+    expected_second = 1.0 / (1.0 + 10 ** (-16 / 400.0))
+    leader = 1508 + 16 * (1 - expected_second)
+    gap = 2 * leader - 3000
+    leader += 16 * (0.5 - 1.0 / (1.0 + 10 ** (-gap / 400.0)))
+    assert elo["Ban cars"] == pytest.approx(leader)
+    assert elo["Ban cars"] + elo["Keep cars"] == pytest.approx(3000)
+    assert list(elo) == ["Ban cars", "Keep cars"]
+
+
+def test_bradley_terry_favours_the_winner_and_sums_to_one():
+    strengths = _store().bradley_terry()
+
+    assert sum(strengths.values()) == pytest.approx(1.0)
+    assert strengths["Ban cars"] > strengths["Keep cars"]
+
+
+def test_reset_empties_the_store():
+    store = _store()
+    store.reset()
+    assert store.summary() == {"evaluations": 0}
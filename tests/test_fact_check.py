@@ -0,0 +1,44 @@
+import threading
+
+from config import DebateConfig
+from DebateFoundation import DebateFoundation
+
+
+ARGUMENT = (
+    "Cities should price congestion. According to a 2019 study, tolls cut traffic by 20 percent. "
+    "Drivers adapt quickly to the change. Survey data shows 60 percent support after one year. "
+    "The policy is fair to everyone."
+)
+
+
+def _foundation(**overrides):
+    return DebateFoundation(DebateConfig(topic="Congestion pricing", backend="simulated", **overrides))
+
+
+def test_claims_are_checked_with_a_window_not_the_whole_argument():
+    foundation = _foundation()
+    claims = foundation._split_claims(ARGUMENT, 8)
+    excerpt = foundation._claim_excerpt(claims[0], ARGUMENT)
+
+    assert excerpt == ("Cities should price congestion. According to a 2019 study, tolls cut traffic by 20 percent. "
+                       "Drivers adapt quickly to the change.")
+    assert "The policy is fair" not in foundation._fact_check_prompt(claims[0], excerpt)
+    assert foundation._claim_excerpt(ARGUMENT, ARGUMENT) is None
+
+
+def test_fact_check_reuses_a_shared_pool():
+    foundation = _foundation(fact_check_concurrency=2)
+    threads = set()
+    check_claim = foundation._check_claim
+
+    def recording_check(claim, argument):
+        threads.add(threading.current_thread())
+        return check_claim(claim, argument)
+
+    foundation._check_claim = recording_check
+    results = [foundation.fact_check(ARGUMENT) for _ in range(3)]
+
+    assert all(len(result["claims"]) == 2 for result in results)
+    # At most two workers serve every call; a new pool per call would start new threads each time
+    assert len(threads) <= 2
+    assert all(thread.name.startswith("debate-fact-check") for thread in threads)
@@ -0,0 +1,101 @@
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+import pytest
+
+from DebateLogger import DebateLogger, configure_log_writer
+from log_store import LogStoreReader, migrate_ndjson, read_ndjson
+
+PERSONA = "Shared persona line for every prompt. " * 10
+
+
+def prompt(thread, index):
+    return f"{PERSONA}\nRound {index}: " + f"argument {thread}-{index} " * 20
+
+
+@pytest.mark.parametrize("durability", ["immediate", "buffered"])
+def test_concurrent_writers_lose_no_entries(durability):
+    writer = configure_log_writer("debate_logs.ndjson", durability=durability, dedup_prompts=True)
+
+    def log(thread):
+        logger = DebateLogger("debate_logs.ndjson", debate_id=f"debate-{thread}")
+        for index in range(50):
+            logger.log_query(prompt(thread, index), "response")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(log, range(8)))
+    writer.close()
+
+    entries = list(read_ndjson("debate_logs.ndjson"))
+    assert len(entries) == 400
+    assert sorted(entry["prompt"] for entry in entries) == sorted(
+        prompt(thread, index) for thread in range(8) for index in range(50)
+    )
+
+
+def test_writer_groups_entries_within_flush_interval():
+    writer = configure_log_writer("debate_logs.ndjson", flush_interval=0.5, batch_size=100)
+    logger = DebateLogger("debate_logs.ndjson")
+    for index in range(20):
+        logger.log_query(f"prompt {index}", "response")
+    logger.flush()
+    stats = writer.get_stats()
+    assert stats["written"] == 20
+    assert stats["batches"] == 1
+
+
+def test_writer_writes_full_batches_without_waiting():
+    writer = configure_log_writer("debate_logs.ndjson", flush_interval=60, batch_size=5)
+    logger = DebateLogger("debate_logs.ndjson")
+    for index in range(10):
+        logger.log_query(f"prompt {index}", "response")
+    deadline = time.monotonic() + 5
+    while writer.get_stats()["written"] < 10 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert writer.get_stats()["written"] == 10
+
+
+def _log_debates(path):
+    for debate_id in ("debate-a", "debate-b"):
+        logger = DebateLogger(path, debate_id=debate_id)
+        for round_number in range(3):
+            logger.log_query(prompt(debate_id, round_number), f"{debate_id} reply {round_number}",
+                             metadata={"round": round_number})
+        logger.log_error("Round failed", RuntimeError("boom"), metadata={"round": 2})
+
+
+def test_store_round_trip_reads_back_only_the_queried_entries():
+    writer = configure_log_writer("debate_logs.ndjson", storage="store", batch_size=4, dedup_prompts=True)
+    _log_debates("debate_logs.ndjson")
+    writer.close()
+
+    reader = LogStoreReader("debate_logs")
+    entries = list(reader.query(debate_id="debate-b", round_number=1))
+    assert [(entry["type"], entry["prompt"], entry["response"]) for entry in entries] == [
+        ("query", prompt("debate-b", 1), "debate-b reply 1")
+    ]
+    assert reader.blocks_read == 1
+    assert [entry["type"] for entry in reader.query(entry_type="error")] == ["error", "error"]
+    assert reader.debates() == ["debate-a", "debate-b"]
+    assert reader.stats()["entries"] == 8
+    reader.close()
+
+
+def test_migration_copies_entries_and_their_interned_prompts(tmp_path):
+    writer = configure_log_writer("debate_logs.ndjson", dedup_prompts=True)
+    _log_debates("debate_logs.ndjson")
+    writer.close()
+    logged = list(read_ndjson("debate_logs.ndjson"))
+    # A line cut off by a crash is skipped
+    with open("debate_logs.ndjson", "a") as f:
+        f.write('{"type": "query", "cut off\n')
+
+    result = migrate_ndjson(["debate_logs.ndjson"], str(tmp_path / "migrated"), block_entries=3)
+
+    assert result == {"migrated": 8, "skipped": 1, "missing_blobs": 0}
+    reader = LogStoreReader(str(tmp_path / "migrated"))
+    assert list(reader.query()) == logged
+    assert [entry["prompt"] for entry in reader.query(debate_id="debate-a", entry_type="query")] == [
+        prompt("debate-a", round_number) for round_number in range(3)
+    ]
+    reader.close()
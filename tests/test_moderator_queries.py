@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from AsyncDebateOrchestration import AsyncDebateModeration
+from config import DebateConfig
+from DebateOrchestration import DebateModeration
+from llm_backend import LLMBackendError
+from log_store import read_ndjson
+from resilience import CircuitOpenError
+
+
+def _config():
+    return DebateConfig(topic="Congestion pricing", pro_position="Price it", against_position="Keep roads free",
+                        backend="simulated", rounds=1)
+
+
+class FailingBackend:
+    def __init__(self, error):
+        self.error = error
+
+    def complete(self, messages, **params):
+        raise self.error
+
+    async def acomplete(self, messages, **params):
+        raise self.error
+
+
+def _entries(debate, kind):
+    debate.logger.writer.flush()
+    return [entry for entry in read_ndjson("debate_logs.ndjson") if entry["type"] == kind]
+
+
+def test_backend_errors_keep_their_type_and_retry_after():
+    debate = DebateModeration(_config())
+    error = LLMBackendError("rate limited", status_code=429, retry_after=7.0)
+    debate.backend = FailingBackend(error)
+
+    with pytest.raises(LLMBackendError) as raised:
+        debate.query_llm("Who wins?")
+    assert raised.value is error
+    assert raised.value.retry_after == 7.0
+
+    debate.backend = FailingBackend(CircuitOpenError("provider down"))
+    with pytest.raises(CircuitOpenError):
+        debate.query_llm("Who wins?")
+
+
+def test_unknown_errors_are_wrapped_with_their_status():
+    error = RuntimeError("boom")
+    error.status_code = 502
+
+    async def run():
+        debate = await AsyncDebateModeration.create(_config())
+        debate.backend = FailingBackend(error)
+        with pytest.raises(LLMBackendError) as raised:
+            await debate.aquery_llm("Who wins?")
+        return debate, raised.value
+
+    debate, raised = asyncio.run(run())
+    assert type(raised) is LLMBackendError
+    assert raised.status_code == 502
+    assert raised.__cause__ is error
+    assert [entry["prompt"] for entry in _entries(debate, "error")] == ["Who wins?"]
+
+
+def test_moderator_queries_are_logged():
+    debate = DebateModeration(_config())
+    response = debate.query_llm("Who wins?")
+
+    logged = [entry for entry in _entries(debate, "query") if entry["prompt"] == "Who wins?"]
+    assert [entry["response"] for entry in logged] == [response]
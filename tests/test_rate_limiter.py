@@ -0,0 +1,54 @@
+import pytest
+
+from llm_backend import SimulatedBackend
+from rate_limiter import RateLimitedBackend, RateLimiter
+
+
+def test_reserve_then_refund_unused_tokens():
+    limiter = RateLimiter(tokens_per_minute=6000)
+
+    assert limiter.acquire(1000) == 1000
+    assert limiter._token_allowance == pytest.approx(5000, abs=5)
+    limiter.reconcile(1000, 400)
+
+    assert limiter._token_allowance == pytest.approx(5600, abs=5)
+    assert limiter.get_stats()["tokens_reserved"] == 1000
+    assert limiter.get_stats()["tokens_refunded"] == 600
+
+
+def test_usage_above_the_reservation_is_charged():
+    limiter = RateLimiter(tokens_per_minute=6000)
+    limiter.reconcile(limiter.acquire(1000), 1500)
+
+    assert limiter._token_allowance == pytest.approx(4500, abs=5)
+    assert limiter.get_stats()["tokens_refunded"] == -500
+
+
+def test_oversized_request_reserves_only_the_whole_budget():
+    limiter = RateLimiter(tokens_per_minute=6000)
+    reserved = limiter.acquire(10000)
+    limiter.reconcile(reserved, 10000)
+
+    assert reserved == 6000
+    assert limiter._token_allowance == pytest.approx(-4000, abs=5)
+
+
+def test_exhausted_budget_reports_the_wait():
+    limiter = RateLimiter(requests_per_minute=2, tokens_per_minute=600)
+    limiter.acquire(100)
+    limiter.acquire(100)
+
+    wait, reserved = limiter._try_acquire(100)
+    assert reserved == 0
+    assert wait == pytest.approx(30, abs=1)  # One request refills every 30 seconds
+    assert limiter._try_acquire(0)[0] > 0
+
+
+def test_backend_reconciles_with_actual_usage():
+    limiter = RateLimiter(tokens_per_minute=60000)
+    backend = RateLimitedBackend(SimulatedBackend(), limiter)
+
+    response = backend.complete([{"role": "user", "content": "Argue for tolls."}], "gpt-4", max_tokens=1000)
+
+    stats = limiter.get_stats()
+    assert stats["tokens_reserved"] - stats["tokens_refunded"] == response.prompt_tokens + response.completion_tokens
@@ -0,0 +1,63 @@
+import asyncio
+
+from AsyncDebateOrchestration import AsyncDebateModeration
+from config import DebateConfig
+from debate_evaluation import CRITERIA, EvaluationCriteria
+from DebateOrchestration import DebateModeration
+
+POOR = EvaluationCriteria.from_ratings({name: 1 for name in CRITERIA})
+
+
+def _config():
+    return DebateConfig(topic="Congestion pricing", pro_position="Price it", against_position="Keep roads free",
+                        backend="simulated", rounds=1)
+
+
+def _fail_regeneration(agent):
+    query = agent._query
+
+    def failing(prompt, stage, *args, **kwargs):
+        return None if stage == 'regeneration' else query(prompt, stage, *args, **kwargs)
+
+    agent._query = failing
+    agent._evaluate_argument = lambda argument, context=None: POOR
+
+
+def test_failed_regeneration_keeps_the_recorded_rebuttal():
+    agent = DebateModeration(_config()).pro_agent
+    _fail_regeneration(agent)
+
+    rebuttal = agent.return_rebuttal("Tolls hurt commuters.")
+
+    assert rebuttal == agent.argument_history[-1].content
+    assert rebuttal != "Failed to generate rebuttal"
+
+
+def test_async_rebuttal_shares_the_review_and_keeps_the_recorded_rebuttal():
+    async def run():
+        debate = await AsyncDebateModeration.create(_config())
+        agent = debate.pro_agent
+        aquery = agent._aquery
+
+        async def failing(prompt, stage, *args, **kwargs):
+            return None if stage == 'regeneration' else await aquery(prompt, stage, *args, **kwargs)
+
+        async def poor(argument, context=None):
+            return POOR
+
+        agent._aquery = failing
+        agent._aevaluate_argument = poor
+        return agent, await agent.areturn_rebuttal("Tolls hurt commuters.")
+
+    agent, rebuttal = asyncio.run(run())
+    assert rebuttal == agent.argument_history[-1].content
+
+
+def test_async_rounds_record_latencies():
+    async def run():
+        debate = await AsyncDebateModeration.create(_config())
+        rounds = [result async for result in debate.arun_rounds()]
+        return debate, rounds
+
+    debate, rounds = asyncio.run(run())
+    assert len(debate.get_speculation_stats()['round_latencies']) == len(rounds) == 2
@@ -0,0 +1,63 @@
+import time
+
+import pytest
+
+from resilience import CircuitOpenError, ProviderGuard
+
+
+def _open(guard):
+    for _ in range(guard.failure_threshold):
+        probe = guard.admit(max_pause=1)
+        guard.record_failure(outage=True, probe=probe)
+
+
+def test_breaker_opens_after_consecutive_outages_and_pauses_calls():
+    guard = ProviderGuard(failure_threshold=3, reset_timeout=30)
+    _open(guard)
+
+    assert guard.state == "open"
+    assert guard.get_stats()["breaker_opens"] == 1
+    with pytest.raises(CircuitOpenError):
+        guard.admit(max_pause=0)
+
+
+def test_rate_limits_do_not_count_towards_opening():
+    guard = ProviderGuard(failure_threshold=2, reset_timeout=30)
+    for _ in range(5):
+        guard.record_failure(outage=False, probe=guard.admit(max_pause=1))
+    assert guard.state == "closed"
+
+
+def test_half_open_admits_one_probe_and_closes_on_success():
+    guard = ProviderGuard(failure_threshold=1, reset_timeout=0.05)
+    _open(guard)
+    time.sleep(0.06)
+
+    assert guard.admit(max_pause=1) is True
+    assert guard.state == "half_open"
+    # A second caller waits for the probe's outcome
+    with pytest.raises(CircuitOpenError):
+        guard.admit(max_pause=0)
+
+    guard.record_success(latency=0.1, probe=True)
+    assert guard.state == "closed"
+    assert guard.admit(max_pause=0) is False
+
+
+def test_failed_probe_reopens_the_circuit():
+    guard = ProviderGuard(failure_threshold=1, reset_timeout=0.05)
+    _open(guard)
+    time.sleep(0.06)
+
+    guard.record_failure(outage=True, probe=guard.admit(max_pause=1))
+    assert guard.state == "open"
+    assert guard.get_stats()["breaker_opens"] == 2
+
+
+def test_released_probe_lets_the_next_caller_probe():
+    guard = ProviderGuard(failure_threshold=1, reset_timeout=0.05)
+    _open(guard)
+    time.sleep(0.06)
+
+    guard.release(guard.admit(max_pause=1))
+    assert guard.admit(max_pause=0) is True
@@ -0,0 +1,47 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from semantic_cache import SemanticCache  # noqa: E402
+
+CLAIM = "Congestion tolls cut downtown traffic by 45% within a year, according to the city study"
+
+
+@pytest.fixture
+def cache():
+    cache = SemanticCache()
+    cache.put('fact_check', 'gpt-4', CLAIM, "verified")
+    return cache
+
+
+def test_rewording_hits(cache):
+    assert cache.get('fact_check', 'gpt-4', CLAIM.upper() + ".") == "verified"
+    assert cache.get('fact_check', 'gpt-4', CLAIM.replace("cut", "cuts")) == "verified"
+    assert cache.get_stats()['fact_check']['hits'] == 2
+
+
+@pytest.mark.parametrize("changed", [
+    CLAIM.replace("45%", "54%"),
+    CLAIM.replace("cut", "did not cut"),
+    CLAIM.replace("45%", "45"),
+])
+def test_different_numbers_or_negations_are_guarded_misses(cache, changed):
+    assert cache.get('fact_check', 'gpt-4', changed) is None
+    stats = cache.get_stats()['fact_check']
+    assert (stats['hits'], stats['guarded_misses']) == (0, 1)
+
+
+def test_other_models_kinds_and_unrelated_text_miss(cache):
+    assert cache.get('fact_check', 'gpt-3.5-turbo', CLAIM) is None
+    assert cache.get('context', 'gpt-4', CLAIM) is None
+    assert cache.get('fact_check', 'gpt-4', "Bike lanes reduce injuries by 45% according to the city") is None
+    assert cache.get_stats()['fact_check']['guarded_misses'] == 0
+
+
+def test_persisted_entries_survive_a_restart(tmp_path):
+    path = str(tmp_path / "semantic.jsonl")
+    SemanticCache(path).put('context', 'gpt-4', "Ban private cars downtown", "research notes")
+
+    reloaded = SemanticCache(path)
+    assert reloaded.get('context', 'gpt-4', "ban private cars downtown!") == "research notes"
+    assert reloaded.get('context', 'gpt-4', "Do not ban private cars downtown") is None
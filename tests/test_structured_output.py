@@ -0,0 +1,35 @@
+import pytest
+
+from llm_backend import LLMBackendError
+from structured_output import FACT_CHECK_SCHEMA, request_structured
+
+RESPONSE = '{"claims": ["x"], "confidence_scores": [4], "evidence": ["e"], "context_notes": []}'
+
+
+def _query(error, modes):
+    def query(prompt, response_format):
+        modes.append(response_format and response_format["type"])
+        if len(modes) == 1:
+            raise error
+        return RESPONSE
+    return query
+
+
+def test_rejected_response_format_falls_back_to_a_weaker_mode():
+    modes = []
+    error = LLMBackendError("Invalid parameter: 'response_format' of type 'json_schema' is not supported",
+                            status_code=400)
+
+    result = request_structured(_query(error, modes), "Check it", FACT_CHECK_SCHEMA)
+
+    assert result.ok
+    assert modes == ["json_schema", "json_object"]
+
+
+def test_other_bad_requests_are_raised_immediately():
+    modes = []
+    error = LLMBackendError("This model's maximum context length is 8192 tokens", status_code=400)
+
+    with pytest.raises(LLMBackendError):
+        request_structured(_query(error, modes), "Check it", FACT_CHECK_SCHEMA)
+    assert modes == ["json_schema"]
@@ -0,0 +1,36 @@
+import json
+import threading
+from dataclasses import replace
+
+from config import DebateConfig
+from DebateTournament import DebateTournament, debate_id_for, load_entries
+
+CONFIG = DebateConfig(topic="Congestion pricing", pro_position="Price it", against_position="Keep roads free",
+                      backend="simulated", rounds=1)
+
+
+def test_debate_ids_hash_every_config_field():
+    assert debate_id_for(CONFIG) == debate_id_for(replace(CONFIG))
+    assert debate_id_for(CONFIG) != debate_id_for(replace(CONFIG, temperature=0.0))
+    assert debate_id_for(CONFIG) != debate_id_for(replace(CONFIG, context_mode="retrieval"))
+
+
+def test_async_mode_records_results_off_the_event_loop(tmp_path):
+    path = tmp_path / "debates.jsonl"
+    path.write_text("\n".join(json.dumps({**CONFIG.__dict__, "temperature": t}) for t in (0.1, 0.2)) + "\n")
+    tournament = DebateTournament(load_entries(str(path)), str(tmp_path / "results.ndjson"), workers=2, mode="async")
+    threads = []
+    record = tournament._record
+
+    def recording(result):
+        threads.append(threading.current_thread())
+        record(result)
+
+    tournament._record = recording
+    summary = tournament.run()
+
+    assert summary["completed"] == 2
+    assert threads and threading.main_thread() not in threads
+    # Re-running skips the finished debates
+    assert DebateTournament(load_entries(str(path)), str(tmp_path / "results.ndjson")).pending() == []
+
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+
+import pytest
+
+from turn_scheduler import TurnScheduler, turn_graph
+
+SEATS = ["a", "b", "c"]
+
+
+def test_sequential_graph_chains_each_turn_to_the_turns_since_its_last():
+    graph = turn_graph(["pro", "against"], 0, 1, "sequential")
+
+    assert graph[(0, "pro")] == []
+    assert graph[(0, "against")] == [(0, "pro")]
+    assert graph[(1, "pro")] == [(0, "pro"), (0, "against")]
+    assert graph[(1, "against")] == [(0, "against"), (1, "pro")]
+
+
+def test_resumed_graph_keeps_dependencies_on_earlier_rounds():
+    graph = turn_graph(SEATS, 2, 3)
+
+    assert set(graph) == {(round_number, seat) for round_number in (2, 3) for seat in SEATS}
+    assert graph[(2, "a")] == [(1, seat) for seat in SEATS]
+    with pytest.raises(ValueError):
+        # Without the results of round 1 the graph cannot start
+        next(TurnScheduler().run(graph, lambda key, inputs: ""))
+
+
+def test_parallel_turns_run_at_once_and_rounds_finish_in_order():
+    barrier = threading.Barrier(len(SEATS), timeout=5)
+    seen_inputs = {}
+
+    def run_turn(key, inputs):
+        seen_inputs[key] = inputs
+        barrier.wait()  # Deadlocks unless every seat of a round runs concurrently
+        return f"{key[1]}{key[0]}"
+
+    scheduler = TurnScheduler(max_workers=len(SEATS))
+    order = [key for key, _ in scheduler.run(turn_graph(SEATS, 0, 2), run_turn)]
+
+    assert scheduler.peak_parallelism == len(SEATS)
+    assert [round_number for round_number, _ in order] == [0] * 3 + [1] * 3 + [2] * 3
+    assert seen_inputs[(1, "a")] == {(0, seat): f"{seat}0" for seat in SEATS}
+
+
+def test_async_sequential_turns_never_overlap():
+    async def run():
+        active = []
+
+        async def run_turn(key, inputs):
+            active.append(key)
+            assert len(active) == 1
+            await asyncio.sleep(0.001)
+            active.remove(key)
+            return "".join(sorted(value for value in inputs.values())) + key[1]
+
+        scheduler = TurnScheduler()
+        results = [item async for item in scheduler.arun(turn_graph(SEATS, 1, 1, "sequential"), run_turn,
+                                                        {(0, seat): seat for seat in SEATS})]
+        return scheduler, results
+
+    scheduler, results = asyncio.run(run())
+    assert scheduler.peak_parallelism == 1
+    assert [key for key, _ in results] == [(1, "a"), (1, "b"), (1, "c")]
+
+
+def test_cycles_are_reported():
+    graph = {(0, "a"): [(0, "b")], (0, "b"): [(0, "a")]}
+    with pytest.raises(ValueError, match="cycle"):
+        list(TurnScheduler().run(graph, lambda key, inputs: ""))
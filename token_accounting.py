@@ -0,0 +1,179 @@
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional, Tuple
+import threading
+from llm_backend import LLMResponse, estimate_tokens
+from prompt_templates import PROMPT_CACHE_MIN_TOKENS
+
+
+# USD per 1K (prompt, completion) tokens
+MODEL_PRICING: Dict[str, Tuple[float, float]] = {
+    "gpt-4": (0.03, 0.06),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+}
+
+
+class TokenBudgetExceeded(Exception):
+    """Raised before an LLM call that would take a debate past its hard budget"""
+
+
+@dataclass
+class UsageRecord:
+    agent_id: Optional[str]
+    round_number: int
+    stage: Optional[str]
+    prompt_tokens: int
+    completion_tokens: int
+    cost: float
+    cached: bool = False  # Served from the response cache, not billed
+    estimated: bool = False  # Counted with the local estimator rather than API usage
+    prefix_tokens: int = 0  # Estimated stable prompt prefix, eligible for provider prefix caching
+    cached_prompt_tokens: int = 0  # Prompt tokens the provider reported as served from its cache
+
+
+@dataclass
+class TokenBudget:
+    soft_tokens: Optional[int] = None  # Past this, agents truncate context and skip optional evaluation
+    hard_tokens: Optional[int] = None  # Past this, the debate is aborted
+    hard_cost: Optional[float] = None  # Same, in USD
+
+
+class TokenLedger:
+    """Per-call token and cost accounting with soft and hard budgets for one debate"""
+
+    def __init__(self, budget: Optional[TokenBudget] = None,
+                 pricing: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.budget = budget or TokenBudget()
+        self.pricing = pricing or MODEL_PRICING
+        self.records: List[UsageRecord] = []
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def over_soft_budget(self) -> bool:
+        return self.budget.soft_tokens is not None and self.total_tokens >= self.budget.soft_tokens
+
+    def price(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        prompt_rate, completion_rate = self.pricing.get(model, (0.0, 0.0))
+        return (prompt_tokens * prompt_rate + completion_tokens * completion_rate) / 1000
+
+    def check(self, model: str, prompt_tokens: int):
+        """Raise TokenBudgetExceeded if a call with this prompt would cross a hard budget"""
+        with self._lock:
+            if self.budget.hard_tokens is not None and self.total_tokens + prompt_tokens > self.budget.hard_tokens:
+                raise TokenBudgetExceeded(
+                    f"Hard token budget of {self.budget.hard_tokens} reached ({self.total_tokens} used)"
+                )
+            if self.budget.hard_cost is not None and \
+                    self.cost + self.price(model, prompt_tokens, 0) > self.budget.hard_cost:
+                raise TokenBudgetExceeded(
+                    f"Hard cost budget of ${self.budget.hard_cost:.2f} reached (${self.cost:.4f} used)"
+                )
+
+    def completion_allowance(self, prompt_tokens: int, max_tokens: Optional[int]) -> Optional[int]:
+        """Cap a call's max_tokens to what is left of the hard token budget"""
+        if self.budget.hard_tokens is None:
+            return max_tokens
+        remaining = max(1, self.budget.hard_tokens - self.total_tokens - prompt_tokens)
+        return min(max_tokens, remaining) if max_tokens else remaining
+
+    def record(self, model: str, messages: List[Dict[str, str]], response: LLMResponse,
+               agent_id: Optional[str] = None, round_number: int = 0,
+               stage: Optional[str] = None, prefix_tokens: int = 0) -> UsageRecord:
+        """Record one call, falling back to local estimates when the backend reported no usage"""
+        estimated = not (response.prompt_tokens or response.completion_tokens)
+        prompt_tokens = response.prompt_tokens
+        completion_tokens = response.completion_tokens
+        if estimated:
+            prompt_tokens = sum(estimate_tokens(m.get("content")) for m in messages)
+            completion_tokens = estimate_tokens(response.content)
+        cost = 0.0 if response.cached else self.price(model, prompt_tokens, completion_tokens)
+
+        usage = UsageRecord(
+            agent_id=agent_id,
+            round_number=round_number,
+            stage=stage,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cost=cost,
+            cached=response.cached,
+            estimated=estimated,
+            prefix_tokens=prefix_tokens,
+            cached_prompt_tokens=response.cached_prompt_tokens
+        )
+        with self._lock:
+            self.records.append(usage)
+            if not response.cached:
+                self.prompt_tokens += prompt_tokens
+                self.completion_tokens += completion_tokens
+                self.cost += cost
+        return usage
+
+    def restore(self, records: List[UsageRecord]):
+        """Replay previously recorded calls, e.g. from a checkpoint, so totals and budgets carry over"""
+        with self._lock:
+            for usage in records:
+                self.records.append(usage)
+                if not usage.cached:
+                    self.prompt_tokens += usage.prompt_tokens
+                    self.completion_tokens += usage.completion_tokens
+                    self.cost += usage.cost
+
+    def _group(self, attribute: str) -> Dict[Any, Dict[str, Any]]:
+        groups: Dict[Any, Dict[str, Any]] = {}
+        with self._lock:
+            records = list(self.records)
+        for usage in records:
+            group = groups.setdefault(getattr(usage, attribute), {
+                "calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0, "cached_calls": 0
+            })
+            group["calls"] += 1
+            if usage.cached:
+                group["cached_calls"] += 1
+                continue
+            group["prompt_tokens"] += usage.prompt_tokens
+            group["completion_tokens"] += usage.completion_tokens
+            group["cost"] += usage.cost
+        return groups
+
+    def by_agent(self) -> Dict[Any, Dict[str, Any]]:
+        return self._group("agent_id")
+
+    def by_round(self) -> Dict[Any, Dict[str, Any]]:
+        return self._group("round_number")
+
+    def by_stage(self) -> Dict[Any, Dict[str, Any]]:
+        return self._group("stage")
+
+    def prompt_cache(self) -> Dict[str, int]:
+        """How much of the billed prompt input was a stable prefix, and how much the provider actually cached"""
+        with self._lock:
+            records = [usage for usage in self.records if not usage.cached]
+        return {
+            "prefix_tokens": sum(usage.prefix_tokens for usage in records),
+            "eligible_calls": sum(usage.prefix_tokens >= PROMPT_CACHE_MIN_TOKENS for usage in records),
+            "cached_prompt_tokens": sum(usage.cached_prompt_tokens for usage in records)
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "calls": len(self.records),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "cost": self.cost,
+            "over_soft_budget": self.over_soft_budget,
+            "budget": asdict(self.budget),
+            "by_agent": self.by_agent(),
+            "by_round": self.by_round(),
+            "by_stage": self.by_stage(),
+            "prompt_cache": self.prompt_cache()
+        }
@@ -0,0 +1,219 @@
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Union
+import atexit
+import hashlib
+import json
+import os
+import secrets
+import threading
+import time
+
+
+# Durations kept per stage for percentiles; older ones are dropped
+STAGE_WINDOW = 10000
+
+
+class _NoopSpan:
+    """Returned while tracing is disabled so instrumented code pays almost nothing"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attributes: Any):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """One timed operation; use as a context manager, exceptions mark it as failed"""
+
+    __slots__ = ("tracer", "name", "trace_id", "span_id", "stage", "attributes",
+                 "start_ns", "end_ns", "duration", "error", "_started")
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, stage: Optional[str], attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.stage = stage
+        self.attributes = attributes
+        self.start_ns = 0
+        self.end_ns = 0
+        self.duration = 0.0
+        self.error: Optional[str] = None
+        self._started = 0.0
+
+    def __enter__(self) -> "Span":
+        self.start_ns = time.time_ns()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._started
+        self.end_ns = self.start_ns + int(self.duration * 1e9)
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.tracer._finish(self)
+        return False
+
+    def set(self, **attributes: Any):
+        self.attributes.update(attributes)
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _otel_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Tracer:
+    """
+    Collects spans around LLM calls. While disabled, span() returns a shared
+    no-op. Finished spans feed per-stage latency percentiles and wait in a
+    bounded buffer until exported as OpenTelemetry (OTLP/JSON) lines.
+    """
+
+    def __init__(self, enabled: bool = False, export_path: Optional[str] = None, max_spans: int = 100000,
+                 service_name: str = "debategpt"):
+        self.enabled = enabled
+        self.export_path = export_path
+        self.service_name = service_name
+        self._pending: Deque[Span] = deque(maxlen=max_spans)
+        self._stages: Dict[str, Deque[float]] = {}
+        self._errors: Dict[str, int] = {}
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def span(self, name: str, trace_key: str, stage: Optional[str] = None,
+             **attributes: Any) -> Union[Span, _NoopSpan]:
+        """
+        Args:
+            name (str): Operation name, e.g. 'llm.query'
+            trace_key (str): Groups spans into one trace, e.g. the debate id
+            stage (str, optional): Pipeline stage the latency is aggregated under
+            **attributes: Span attributes
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        trace_id = hashlib.md5(trace_key.encode("utf-8")).hexdigest()
+        return Span(self, name, trace_id, stage, attributes)
+
+    def _finish(self, span: Span):
+        stage = span.stage or "unknown"
+        with self._lock:
+            durations = self._stages.get(stage)
+            if durations is None:
+                durations = self._stages[stage] = deque(maxlen=STAGE_WINDOW)
+            durations.append(span.duration)
+            if span.error:
+                self._errors[stage] = self._errors.get(stage, 0) + 1
+            if len(self._pending) == self._pending.maxlen:
+                self.dropped += 1
+            self._pending.append(span)
+
+    def stage_latencies(self) -> Dict[str, Dict[str, float]]:
+        """Count, errors, mean, p50/p95/p99 and max seconds per stage"""
+        with self._lock:
+            stages = {stage: sorted(durations) for stage, durations in self._stages.items()}
+            errors = dict(self._errors)
+        return {
+            stage: {
+                "count": len(ordered),
+                "errors": errors.get(stage, 0),
+                "mean": sum(ordered) / len(ordered),
+                "p50": _percentile(ordered, 0.50),
+                "p95": _percentile(ordered, 0.95),
+                "p99": _percentile(ordered, 0.99),
+                "max": ordered[-1]
+            }
+            for stage, ordered in stages.items() if ordered
+        }
+
+    def _otel_span(self, span: Span) -> Dict[str, Any]:
+        attributes = dict(span.attributes)
+        if span.stage:
+            attributes["debate.stage"] = span.stage
+        return {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 3,  # SPAN_KIND_CLIENT
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [{"key": key, "value": _otel_value(value)}
+                           for key, value in attributes.items() if value is not None],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1}
+        }
+
+    def export(self, path: Optional[str] = None) -> int:
+        """Append the spans finished since the last export to `path` as one OTLP/JSON line; returns the count"""
+        path = path or self.export_path
+        if not path:
+            raise ValueError("No export path configured")
+        with self._lock:
+            spans = list(self._pending)
+            self._pending.clear()
+        if not spans:
+            return 0
+        request = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{
+                "scope": {"name": "debategpt.tracing"},
+                "spans": [self._otel_span(span) for span in spans]
+            }]
+        }]}
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(request, separators=(",", ":")) + "\n")
+        return len(spans)
+
+    def reset(self):
+        with self._lock:
+            self._pending.clear()
+            self._stages.clear()
+            self._errors.clear()
+            self.dropped = 0
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Process-wide tracer; enabled by DEBATE_TRACING=1, exporting to DEBATE_TRACE_FILE at exit when set"""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer(
+                enabled=os.getenv("DEBATE_TRACING", "").lower() in ("1", "true", "yes"),
+                export_path=os.getenv("DEBATE_TRACE_FILE")
+            )
+        return _tracer
+
+
+def configure_tracing(enabled: bool = True, export_path: Optional[str] = None) -> Tracer:
+    """Turn tracing on or off for the process; existing foundations pick the change up immediately"""
+    tracer = get_tracer()
+    with _tracer_lock:
+        tracer.enabled = enabled
+        if export_path is not None:
+            tracer.export_path = export_path
+    return tracer
+
+
+@atexit.register
+def _export_at_exit():
+    if _tracer is not None and _tracer.enabled and _tracer.export_path:
+        _tracer.export()
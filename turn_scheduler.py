@@ -0,0 +1,127 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import AsyncGenerator, Awaitable, Callable, Dict, Generator, List, Optional, Tuple
+import asyncio
+
+
+TurnKey = Tuple[int, str]  # (round number, seat), seats being 'pro' / 'against' or panelist ids
+
+TURN_ORDERS = ('parallel', 'sequential')
+
+
+def turn_graph(seats: List[str], first_round: int, last_round: int, order: str = 'parallel') -> Dict[TurnKey, List[TurnKey]]:
+    """
+    The turns every turn from `first_round` to `last_round` waits for, in speaking order.
+    'sequential' generalizes the two-sided pro -> against chain: each turn answers the
+    turns taken since its own previous one. 'parallel' lets every seat answer the whole
+    previous round at once, so a round costs about one LLM call of latency.
+    Dependencies on rounds before `first_round` are kept; the caller supplies their results.
+    """
+    if order not in TURN_ORDERS:
+        raise ValueError(f"Unknown turn order: {order}")
+    graph: Dict[TurnKey, List[TurnKey]] = {}
+    if order == 'parallel':
+        for round_number in range(first_round, last_round + 1):
+            for seat in seats:
+                graph[(round_number, seat)] = [] if round_number == 0 else [(round_number - 1, s) for s in seats]
+        return graph
+
+    speaking_order = [(round_number, seat) for round_number in range(last_round + 1) for seat in seats]
+    for index, key in enumerate(speaking_order):
+        if key[0] >= first_round:
+            graph[key] = speaking_order[max(0, index - len(seats)):index]
+    return graph
+
+
+class TurnScheduler:
+    """
+    Runs a graph of debate turns, starting each as soon as the turns it depends on
+    have finished. Results are yielded in completion order; turns a completion makes
+    ready are only started once the consumer asks for the next result, so agent state
+    is quiescent while the consumer checkpoints between rounds.
+    """
+
+    def __init__(self, max_workers: int = 8):
+        self.max_workers = max_workers
+        self.peak_parallelism = 0  # Most turns in flight at once during the last run
+
+    @staticmethod
+    def _ready(graph: Dict[TurnKey, List[TurnKey]], results: Dict[TurnKey, str],
+               started: set) -> List[TurnKey]:
+        return [key for key, dependencies in graph.items()
+                if key not in started and all(dependency in results for dependency in dependencies)]
+
+    @staticmethod
+    def _check(graph: Dict[TurnKey, List[TurnKey]], results: Dict[TurnKey, str]):
+        missing = {dependency for dependencies in graph.values() for dependency in dependencies
+                   if dependency not in graph and dependency not in results}
+        if missing:
+            raise ValueError(f"Turns depend on unknown turns: {sorted(missing)}")
+
+    def run(self, graph: Dict[TurnKey, List[TurnKey]], run_turn: Callable[[TurnKey, Dict[TurnKey, str]], str],
+            completed: Optional[Dict[TurnKey, str]] = None) -> Generator[Tuple[TurnKey, str], None, None]:
+        """
+        Args:
+            graph (dict): Turn -> turns it depends on, e.g. from turn_graph
+            run_turn (callable): Called on a worker thread with the turn and its dependencies' results
+            completed (dict, optional): Results of turns outside the graph that turns depend on
+        """
+        results = dict(completed or {})
+        self._check(graph, results)
+        started: set = set()
+        running: Dict[Future, TurnKey] = {}
+        self.peak_parallelism = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="debate-turn") as pool:
+            try:
+                while len(started) < len(graph) or running:
+                    for key in self._ready(graph, results, started):
+                        started.add(key)
+                        inputs = {dependency: results[dependency] for dependency in graph[key]}
+                        running[pool.submit(run_turn, key, inputs)] = key
+                    if not running:
+                        raise ValueError("Turn graph has a dependency cycle")
+                    self.peak_parallelism = max(self.peak_parallelism, len(running))
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    finished = []
+                    for future in done:
+                        key = running.pop(future)
+                        results[key] = future.result()
+                        finished.append(key)
+                    for key in sorted(finished):
+                        yield key, results[key]
+            finally:
+                for future in running:
+                    future.cancel()
+
+    async def arun(self, graph: Dict[TurnKey, List[TurnKey]],
+                   run_turn: Callable[[TurnKey, Dict[TurnKey, str]], Awaitable[str]],
+                   completed: Optional[Dict[TurnKey, str]] = None) -> AsyncGenerator[Tuple[TurnKey, str], None]:
+        """Async counterpart of run; turns are tasks on the running event loop"""
+        results = dict(completed or {})
+        self._check(graph, results)
+        started: set = set()
+        running: Dict[asyncio.Task, TurnKey] = {}
+        self.peak_parallelism = 0
+
+        try:
+            while len(started) < len(graph) or running:
+                for key in self._ready(graph, results, started):
+                    started.add(key)
+                    inputs = {dependency: results[dependency] for dependency in graph[key]}
+                    running[asyncio.ensure_future(run_turn(key, inputs))] = key
+                if not running:
+                    raise ValueError("Turn graph has a dependency cycle")
+                self.peak_parallelism = max(self.peak_parallelism, len(running))
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                finished = []
+                for task in done:
+                    key = running.pop(task)
+                    results[key] = task.result()
+                    finished.append(key)
+                for key in sorted(finished):
+                    yield key, results[key]
+        finally:
+            for task in running:
+                task.cancel()